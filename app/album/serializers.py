@@ -2,7 +2,10 @@
 Serializers for the album API View
 """
 
-from core.models import Album, Photo
+from django.utils.translation import gettext_lazy as _
+
+from core.models import Album, Photo, expand_thumbnail_url, expand_urls
+from core.serializers import BulkCreateListSerializer, BulkPrimaryKeyRelatedField, ValuesSerializer
 
 from rest_framework import serializers
 
@@ -10,16 +13,138 @@ from rest_framework import serializers
 class AlbumSerializer(serializers.ModelSerializer):
     """ Serializer for the album object."""
     # photos = serializers.StringRelatedField(many=True, read_only=True)
-    userId = serializers.CharField(source='user.id', read_only=True)
+    userId = serializers.CharField(source='user_id', read_only=True)
+    # Columns whose values change whenever the rendered album does.
+    version_fields = ('id', 'version')
 
     class Meta:
         model = Album
         fields = ['userId', 'id', 'title']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Albums only expose the user's id, which lives on the album row."""
+        return queryset
+
+
+DUPLICATE_URL = _('The album already has a photo with this url.')
+
+
+class PhotoListSerializer(BulkCreateListSerializer):
+    """Bulk create photos, rejecting urls their album already has."""
+
+    def to_internal_value(self, data):
+        validated = super().to_internal_value(data)
+        keys = [(attrs['albumId'].pk, attrs['url']) for attrs in validated]
+        existing = Photo.objects.existing_urls(keys)
+        errors, seen = [], set()
+        for key in keys:
+            errors.append({'url': [DUPLICATE_URL]} if key in existing or key in seen else {})
+            seen.add(key)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated
+
 
 class PhotoSerializer(serializers.ModelSerializer):
     """Serializer for the photo object."""
+    serializer_related_field = BulkPrimaryKeyRelatedField
+    # Stored split on the photo row, see core.models.compact_urls().
+    url = serializers.URLField(max_length=200)
+    thumbnailUrl = serializers.URLField(max_length=200)
+    version_fields = ('id', 'version')
 
     class Meta:
         model = Photo
         fields = ['albumId', 'id', 'title', 'url', 'thumbnailUrl']
+        list_serializer_class = PhotoListSerializer
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Join the URL prefixes; the album's id lives on the photo row."""
+        return queryset.select_related('url_prefix', 'thumbnail_prefix')
+
+    def validate(self, attrs):
+        """Reject a url the album already has; lists check all their photos at once."""
+        if isinstance(self.parent, serializers.ListSerializer) or not {'albumId', 'url'} & set(attrs):
+            return attrs
+        album_id = attrs['albumId'].pk if 'albumId' in attrs else self.instance.albumId_id
+        key = (album_id, attrs['url'] if 'url' in attrs else self.instance.url)
+        pk = Photo.objects.existing_urls([key]).get(key)
+        if pk is not None and (self.instance is None or pk != self.instance.pk):
+            raise serializers.ValidationError({'url': DUPLICATE_URL})
+        return attrs
+
+
+class PhotoValuesSerializer(ValuesSerializer):
+    """Fast read path rendering photos like PhotoSerializer."""
+    model_serializer = PhotoSerializer
+    values = (
+        'albumId', 'id', 'title', 'url_prefix__prefix', 'url_name', 'thumbnail_prefix__prefix', 'thumbnail_url',
+    )
+
+    def to_representation(self, row):
+        url, thumbnail_url = expand_urls(
+            row.url_prefix__prefix, row.url_name, row.thumbnail_prefix__prefix, row.thumbnail_url,
+        )
+        return {
+            'albumId': row.albumId,
+            'id': row.id,
+            'title': row.title,
+            'url': url,
+            'thumbnailUrl': thumbnail_url,
+        }
+
+
+class PhotoThumbnailSerializer(serializers.ModelSerializer):
+    """Serializer for photos in gallery grids, with just the thumbnail."""
+    thumbnailUrl = serializers.URLField(read_only=True)
+    version_fields = ('id', 'version')
+
+    class Meta:
+        model = Photo
+        fields = ['id', 'thumbnailUrl']
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Join the thumbnail prefix; the thumbnail needs no other."""
+        return queryset.select_related('thumbnail_prefix')
+
+
+class PhotoThumbnailValuesSerializer(ValuesSerializer):
+    """Fast read path rendering photos like PhotoThumbnailSerializer."""
+    model_serializer = PhotoThumbnailSerializer
+    values = ('id', 'url_name', 'thumbnail_prefix__prefix', 'thumbnail_url')
+
+    def to_representation(self, row):
+        return {
+            'id': row.id,
+            'thumbnailUrl': expand_thumbnail_url(row.url_name, row.thumbnail_prefix__prefix, row.thumbnail_url),
+        }
+
+
+class PhotoUpsertSerializer(serializers.ModelSerializer):
+    """Serializer for a photo synced into an album, matched on its url."""
+    url = serializers.URLField(max_length=200)
+    thumbnailUrl = serializers.URLField(max_length=200)
+
+    class Meta:
+        model = Photo
+        fields = ['title', 'url', 'thumbnailUrl']
+
+
+class PhotoUpsertResultSerializer(serializers.Serializer):
+    """Serializer for how many synced photos were written."""
+    inserted = serializers.IntegerField()
+    updated = serializers.IntegerField()
+    unchanged = serializers.IntegerField()
+
+
+class AlbumWithPhotosSerializer(AlbumSerializer):
+    """Serializer for an album with its first photos nested."""
+    photos = PhotoSerializer(source='expanded_photos', many=True, read_only=True)
+    # The nested photos are not covered by the album's stamps.
+    version_fields = ()
+
+    class Meta(AlbumSerializer.Meta):
+        fields = AlbumSerializer.Meta.fields + ['photos']
@@ -1,6 +1,10 @@
+import json
+
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
 from core.models import Album, Photo
 
 
@@ -103,6 +107,29 @@ class AlbumPhotoViewSetTest(APITestCase):
         self.photo.refresh_from_db()
         self.assertEqual(self.photo.title, "Updated Photo Title")
 
+    def test_patch_photo_url(self):
+        """Test changing only the url keeps the thumbnail."""
+        url = f'{self.photo_url}{self.photo.id}/'
+        data = {"url": "https://cdn.example.com/photos/new.jpg"}
+        response = self.client.patch(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['url'], data['url'])
+        photo = Photo.objects.get(id=self.photo.id)
+        self.assertEqual(photo.url, data['url'])
+        self.assertEqual(photo.thumbnailUrl, "http://example.com/photo_thumb.jpg")
+
+    def test_create_photo_invalid_url(self):
+        """Test photo URLs are still validated."""
+        data = {
+            "albumId": self.album.id,
+            "title": "New Photo",
+            "url": "not a url",
+            "thumbnailUrl": "http://example.com/newphoto_thumb.jpg"
+        }
+        response = self.client.post(self.photo_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('url', response.data)
+
     def test_unauthorized_access(self):
         """Test that unauthenticated users cannot access endpoints."""
         self.client.logout()
@@ -114,3 +141,384 @@ class AlbumPhotoViewSetTest(APITestCase):
         # Attempt to create an album
         response = self.client.post(self.album_url, {"title": "Unauthorized Album"})
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AlbumPhotoQueryCountTests(APITestCase):
+    """Test that album and photo endpoints run a fixed number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.album = Album.objects.create(user=self.user, title="Test Album")
+        for i in range(10):
+            other = get_user_model().objects.create_user(
+                email=f'user{i}@example.com',
+                password='password123'
+            )
+            Album.objects.create(user=other, title=f"Album {i}")
+            Photo.objects.create(
+                albumId=self.album,
+                user=other,
+                title=f"Photo {i}",
+                url=f"http://example.com/{i}.jpg",
+                thumbnailUrl=f"http://example.com/{i}_thumb.jpg"
+            )
+
+    def test_list_albums_query_count(self):
+        """Listing albums runs one query regardless of the number of albums."""
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/albums/')
+        self.assertEqual(len(response.data), 11)
+
+    def test_user_albums_query_count(self):
+        """Listing a user's albums runs an existence check and one query."""
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/albums/{self.user.id}/user_albums/')
+        self.assertEqual(len(response.data), 1)
+
+    def test_album_photos_query_count(self):
+        """Listing an album's photos runs a lookup and one query."""
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/albums/{self.album.id}/photos/')
+        self.assertEqual(len(response.data), 10)
+
+    def test_list_photos_query_count(self):
+        """Listing photos runs one query regardless of the number of photos."""
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/photos/')
+        self.assertEqual(len(response.data), 10)
+
+
+class PhotoStreamingTest(APITestCase):
+    """Test the streamed dump mode of the album and photo endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.album = Album.objects.create(user=self.user, title="Test Album")
+        Photo.objects.bulk_create(
+            Photo(
+                albumId=self.album,
+                title=f"Photo {i}",
+                url=f"http://example.com/{i}.jpg",
+                thumbnailUrl=f"http://example.com/{i}_thumb.jpg"
+            )
+            for i in range(120)
+        )
+
+    def test_stream_photos(self):
+        """Test streaming every photo as one JSON array."""
+        response = self.client.get('/api/photos/?stream=1')
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(data), 120)
+        self.assertEqual(data[-1]['title'], "Photo 119")
+
+    def test_stream_album_photos(self):
+        """Test streaming the photos of one album."""
+        response = self.client.get(f'/api/albums/{self.album.id}/photos/?stream=1')
+
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(data), 120)
+
+
+class PhotoPaginationTest(APITestCase):
+    """Test paging through the photos of large albums."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.album = Album.objects.create(user=self.user, title="Test Album")
+        self.other_album = Album.objects.create(user=self.user, title="Other Album")
+        # İki albümün fotoğrafları id sırasında karışık.
+        Photo.objects.bulk_create(
+            Photo(
+                albumId=self.album if i % 2 else self.other_album,
+                title=f"Photo {i}",
+                url=f"https://via.placeholder.com/600/{i:06x}",
+                thumbnailUrl=f"https://via.placeholder.com/150/{i:06x}"
+            )
+            for i in range(30)
+        )
+        self.album_photos = list(
+            Photo.objects.filter(albumId=self.album).order_by('id').values_list('id', flat=True)
+        )
+
+    def fetch_all(self, url, params):
+        """Follow the next links from url and return every row and the pages."""
+        rows, pages = [], 0
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            rows += response.data
+            pages += 1
+            if 'next' not in response.get('Link', ''):
+                return rows, pages
+            response = self.client.get(response['Link'].split(';')[0].strip('<>'))
+
+    def test_album_photos_pages(self):
+        """Test an album's photos are returned in id order, page by page."""
+        rows, pages = self.fetch_all(f'/api/albums/{self.album.id}/photos/', {'page_size': 4})
+
+        self.assertEqual([row['id'] for row in rows], self.album_photos)
+        self.assertEqual(pages, 4)
+
+    def test_filter_photos_by_album(self):
+        """Test listing photos with ?albumId= pages through that album only."""
+        rows, pages = self.fetch_all('/api/photos/', {'albumId': self.album.id, 'page_size': 4})
+
+        self.assertEqual([row['id'] for row in rows], self.album_photos)
+        self.assertEqual({row['albumId'] for row in rows}, {self.album.id})
+
+    def test_filter_photos_by_user(self):
+        """Test ?userId= lists the photos in the albums of that user."""
+        other = get_user_model().objects.create_user(email='other@example.com', password='password123')
+        other_album = Album.objects.create(user=other, title="Other User's Album")
+        Photo.objects.create(
+            albumId=other_album,
+            title="Other Photo",
+            url="https://via.placeholder.com/600/ffffff",
+            thumbnailUrl="https://via.placeholder.com/150/ffffff",
+        )
+
+        response = self.client.get('/api/photos/', {'userId': other.id})
+        self.assertEqual([row['albumId'] for row in response.data], [other_album.id])
+        rows, pages = self.fetch_all('/api/photos/', {'userId': self.user.id, 'page_size': 10})
+        self.assertEqual(len(rows), 30)
+
+    def test_filter_photos_by_invalid_album(self):
+        """Test a non numeric albumId is rejected."""
+        response = self.client.get('/api/photos/', {'albumId': 'x'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('albumId', response.data)
+
+    def test_thumbnails_view(self):
+        """Test ?view=thumbnails returns just ids and thumbnails."""
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/albums/{self.album.id}/photos/', {'view': 'thumbnails'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        photo = Photo.objects.get(id=self.album_photos[0])
+        self.assertEqual(response.data[0], {'id': photo.id, 'thumbnailUrl': photo.thumbnailUrl})
+
+    def test_thumbnails_view_photo_list(self):
+        """Test photo listings render thumbnails like the thumbnail serializer."""
+        response = self.client.get('/api/photos/', {'albumId': self.album.id, 'view': 'thumbnails', 'page_size': 2})
+
+        self.assertEqual([set(row) for row in response.data], [{'id', 'thumbnailUrl'}] * 2)
+        self.assertIn('next', response['Link'])
+
+    def test_invalid_view(self):
+        """Test an unknown view is rejected."""
+        response = self.client.get('/api/photos/', {'view': 'huge'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('view', response.data)
+
+
+class PhotoBulkCreateTest(APITestCase):
+    """Test creating photos from a JSON array."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.album = Album.objects.create(user=self.user, title="Test Album")
+
+    def test_bulk_create_photos(self):
+        """Test creating several photos in one request."""
+        data = [
+            {
+                "albumId": self.album.id,
+                "title": f"Photo {i}",
+                "url": f"http://example.com/{i}.jpg",
+                "thumbnailUrl": f"http://example.com/{i}_thumb.jpg"
+            }
+            for i in range(10)
+        ]
+        response = self.client.post('/api/photos/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Photo.objects.filter(albumId=self.album, user=self.user).count(), 10)
+
+    def test_bulk_create_invalid_photo(self):
+        """Test an invalid item rejects the whole batch."""
+        data = [
+            {"albumId": self.album.id, "title": "Photo", "url": "http://example.com/1.jpg",
+             "thumbnailUrl": "http://example.com/1_thumb.jpg"},
+            {"albumId": self.album.id, "title": "Photo", "url": "not a url",
+             "thumbnailUrl": "http://example.com/2_thumb.jpg"},
+        ]
+        response = self.client.post('/api/photos/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('url', response.data[1])
+        self.assertEqual(Photo.objects.count(), 0)
+
+
+class PhotoUpsertTest(APITestCase):
+    """Test syncing photos into an album with the upsert endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.album = Album.objects.create(user=self.user, title="Test Album")
+        self.url = f'/api/albums/{self.album.id}/photos/upsert/'
+
+    def photos(self, count, title="Photo"):
+        return [
+            {
+                "title": f"{title} {i}",
+                "url": f"https://via.placeholder.com/600/{i:06x}",
+                "thumbnailUrl": f"https://via.placeholder.com/150/{i:06x}"
+            }
+            for i in range(count)
+        ]
+
+    def test_upsert_inserts(self):
+        """Test new photos are inserted into the album for the user."""
+        response = self.client.post(self.url, self.photos(5), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'inserted': 5, 'updated': 0, 'unchanged': 0})
+        self.assertEqual(Photo.objects.filter(albumId=self.album, user=self.user).count(), 5)
+
+    def test_upsert_unchanged_not_written(self):
+        """Test sending the same photos again writes nothing."""
+        self.client.post(self.url, self.photos(5), format='json')
+        versions = list(Photo.objects.order_by('id').values_list('version', flat=True))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, self.photos(5), format='json')
+
+        self.assertEqual(response.data, {'inserted': 0, 'updated': 0, 'unchanged': 5})
+        self.assertEqual(list(Photo.objects.order_by('id').values_list('version', flat=True)), versions)
+        if connection.vendor != 'postgresql':
+            writes = [query['sql'] for query in queries.captured_queries
+                      if query['sql'].startswith(('INSERT', 'UPDATE'))]
+            self.assertEqual(writes, [])
+
+    def test_upsert_updates_changed(self):
+        """Test changed photos are updated and new ones inserted in one request."""
+        self.client.post(self.url, self.photos(3), format='json')
+        photos = self.photos(4)
+        photos[1]['title'] = "Renamed"
+        photos[2]['thumbnailUrl'] = "https://cdn.example.com/thumbs/2.jpg"
+
+        response = self.client.post(self.url, photos, format='json')
+
+        self.assertEqual(response.data, {'inserted': 1, 'updated': 2, 'unchanged': 1})
+        self.assertEqual(Photo.objects.count(), 4)
+        self.assertTrue(Photo.objects.filter(title="Renamed").exists())
+        photo = Photo.objects.get(title="Photo 2")
+        self.assertEqual(photo.thumbnailUrl, "https://cdn.example.com/thumbs/2.jpg")
+
+    def test_upsert_repeated_url(self):
+        """Test the last of photos repeating a url wins."""
+        photos = self.photos(1) + self.photos(1, title="Last")
+
+        response = self.client.post(self.url, photos, format='json')
+
+        self.assertEqual(response.data, {'inserted': 1, 'updated': 0, 'unchanged': 0})
+        self.assertEqual(Photo.objects.get().title, "Last 0")
+
+    def test_upsert_batches(self):
+        """Test photos are written in several statements."""
+        with override_settings(PHOTO_UPSERT_BATCH_SIZE=2):
+            response = self.client.post(self.url, self.photos(5), format='json')
+
+        self.assertEqual(response.data['inserted'], 5)
+
+    def test_upsert_invalid(self):
+        """Test invalid photos and bodies are rejected without writes."""
+        photos = self.photos(2)
+        photos[1]['url'] = "not a url"
+
+        response = self.client.post(self.url, photos, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('url', response.data[1])
+
+        response = self.client.post(self.url, self.photos(1)[0], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with override_settings(PHOTO_UPSERT_MAX_ITEMS=2):
+            response = self.client.post(self.url, self.photos(3), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Photo.objects.count(), 0)
+
+    def test_create_duplicate_url(self):
+        """Test creating a photo with a url its album has is rejected."""
+        self.client.post(self.url, self.photos(1), format='json')
+        data = dict(self.photos(1)[0], albumId=self.album.id)
+
+        response = self.client.post('/api/photos/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('url', response.data)
+
+        response = self.client.post('/api/photos/', [dict(self.photos(2)[1], albumId=self.album.id)] * 2, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('url', response.data[1])
+
+
+class AlbumExpandPhotosTest(APITestCase):
+    """Test nesting photos into album responses with ?expand=photos."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.albums = [Album.objects.create(user=self.user, title=f"Album {i}") for i in range(3)]
+        for album in self.albums:
+            Photo.objects.bulk_create(
+                Photo(
+                    albumId=album,
+                    title=f"{album.title} photo {i}",
+                    url=f"http://example.com/{i}.jpg",
+                    thumbnailUrl=f"http://example.com/{i}_thumb.jpg"
+                )
+                for i in range(4)
+            )
+
+    def test_expand_photos(self):
+        """Test each album nests its first photos, in one extra query."""
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/albums/?expand=photos&photos_limit=2')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for album in response.data:
+            self.assertEqual(
+                [photo['title'] for photo in album['photos']],
+                [f"{album['title']} photo {i}" for i in range(2)],
+            )
+
+    def test_expand_photos_retrieve(self):
+        """Test retrieving an album with its photos."""
+        response = self.client.get(f'/api/albums/{self.albums[0].id}/?expand=photos')
+
+        self.assertEqual(len(response.data['photos']), 4)
@@ -1,30 +1,93 @@
 """
 Views for the Albums API.
 """
-from rest_framework import viewsets, authentication, permissions
+from django.conf import settings
+from django.db.models import Prefetch, prefetch_related_objects
+from rest_framework import viewsets, permissions, serializers, status
+from core.authentication import CachedTokenAuthentication, SignedAccessTokenAuthentication
+from core.mixins import BulkCreateMixin, ExpandMixin, ListActionMixin, QueryParamFilterMixin
 from core.models import Album, Photo, User
-from album.serializers import AlbumSerializer, PhotoSerializer
+from core.queries import limit_per_group
+from album.serializers import (
+    AlbumSerializer,
+    AlbumWithPhotosSerializer,
+    PhotoSerializer,
+    PhotoThumbnailSerializer,
+    PhotoThumbnailValuesSerializer,
+    PhotoUpsertResultSerializer,
+    PhotoUpsertSerializer,
+    PhotoValuesSerializer,
+)
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+# ``?view=`` seçenekleri; thumbnails galeri ızgaraları içindir.
+PHOTO_VIEWS = {'full': PhotoSerializer, 'thumbnails': PhotoThumbnailSerializer}
+photo_view_field = serializers.ChoiceField(choices=list(PHOTO_VIEWS))
 
-class AlbumViewSet(viewsets.ModelViewSet):
+
+def get_photo_serializer(request):
+    """Return the photo serializer of the ``?view=`` asked for, full photos by default."""
+    try:
+        view = photo_view_field.run_validation(request.query_params.get('view', 'full'))
+    except serializers.ValidationError as exc:
+        raise serializers.ValidationError({'view': exc.detail})
+    return PHOTO_VIEWS[view]
+
+
+class AlbumViewSet(ExpandMixin, ListActionMixin, viewsets.ModelViewSet):
     """Manage Album in the database."""
-    queryset = Album.objects.all()
+    queryset = AlbumSerializer.setup_eager_loading(Album.objects.all())
     serializer_class = AlbumSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedAccessTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    allow_streaming = True
+    values_serializers = [PhotoValuesSerializer, PhotoThumbnailValuesSerializer]
+    expansions = {'photos': AlbumWithPhotosSerializer}
 
     def perform_create(self, serializer):
         """Create a new album."""
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
+
+    def expand_photos(self, albums, limit):
+        """Load the first photos of every album in one query."""
+        photos = limit_per_group(
+            Photo.objects.filter(albumId__in=[album.pk for album in albums]), 'albumId', limit,
+        )
+        prefetch_related_objects(albums, Prefetch(
+            'photos',
+            queryset=PhotoSerializer.setup_eager_loading(photos),
+            to_attr='expanded_photos',
+        ))
 
     @action(detail=True, methods=['get'])
     def photos(self, request, pk=None):
         """Belirli bir albumun photos listele."""
         album = self.get_object()
-        photos = album.photos.all()  # İlgili photos al
-        return Response(PhotoSerializer(photos, many=True).data)
+        serializer_class = get_photo_serializer(request)
+        # Sayfalar (albumId, id) indeksi üzerinden id imleciyle okunur.
+        photos = serializer_class.setup_eager_loading(Photo.objects.filter(albumId=album))
+        return self.list_response(photos, serializer_class)
+
+    @action(detail=True, methods=['post'], url_path='photos/upsert', serializer_class=PhotoUpsertSerializer)
+    def upsert_photos(self, request, pk=None):
+        """Sync a list of photos into the album, matching existing photos by url."""
+        album = self.get_object()
+        if not isinstance(request.data, list):
+            return Response({"detail": "Expected a list of photos."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > settings.PHOTO_UPSERT_MAX_ITEMS:
+            return Response(
+                {"detail": f"An upsert may contain at most {settings.PHOTO_UPSERT_MAX_ITEMS} photos."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = PhotoUpsertSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        # Yeni fotoğraflar oturum açmış kullanıcıya ait olur.
+        photos = [
+            Photo(albumId_id=album.id, user_id=request.user.id, **attrs) for attrs in serializer.validated_data
+        ]
+        counts = Photo.objects.upsert(photos, batch_size=settings.PHOTO_UPSERT_BATCH_SIZE)
+        return Response(PhotoUpsertResultSerializer(counts).data)
 
     @action(detail=True, methods=['get'], url_path='user_albums')
     def user_albums(self, request, pk=None):
@@ -34,20 +97,31 @@ class AlbumViewSet(viewsets.ModelViewSet):
                 {"detail": "Belirtilen user_id'ye sahip bir kullanıcı bulunamadı."},
                 status=404
             )
-        albums = Album.objects.filter(user__id=pk)
-        # Serileştirme işlemi
-        serializer = AlbumSerializer(albums, many=True)
-        return Response(serializer.data)
+        albums = AlbumSerializer.setup_eager_loading(Album.objects.filter(user_id=pk))
+        return self.list_response(albums, AlbumSerializer)
 
 
-class PhotoViewSet(viewsets.ModelViewSet):
+class PhotoViewSet(QueryParamFilterMixin, BulkCreateMixin, ListActionMixin, viewsets.ModelViewSet):
     """Manage photos in the database."""
-    queryset = Photo.objects.all()
+    queryset = PhotoSerializer.setup_eager_loading(Photo.objects.all())
     serializer_class = PhotoSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedAccessTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]  # Sadece giriş yapan kullanıcılar görebilir.
+    allow_streaming = True
+    values_serializers = [PhotoValuesSerializer, PhotoThumbnailValuesSerializer]
+    # Query parametreleri: (model alanı, değeri doğrulayan alan)
+    filter_params = {
+        'albumId': ('albumId_id', serializers.IntegerField()),
+        # Fotoğraflar albüm sahibine göre süzülür, kullanıcı özetindeki gibi.
+        'userId': ('albumId__user_id', serializers.IntegerField()),
+    }
+
+    def list(self, request, *args, **kwargs):
+        """List photos one page at a time, optionally of one album or user and as thumbnails only."""
+        serializer_class = get_photo_serializer(request)
+        photos = serializer_class.setup_eager_loading(self.filter_queryset(Photo.objects.all()))
+        return self.list_response(photos, serializer_class)
 
     def perform_create(self, serializer):
         """Create a new photo."""
-        user = self.request.user  # Oturum açmış kullanıcıyı alıyoruz
-        serializer.save(user=user)
+        serializer.save(user_id=self.request.user.id)  # Oturum açmış kullanıcının id'si yeterli
@@ -93,6 +93,24 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# cache (e.g. memcached) so invalidations reach every worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+
+# Logins check passwords in the hashing pool of the token endpoint.
+
+AUTHENTICATION_BACKENDS = ['user.login.PooledPasswordBackend']
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -140,4 +158,56 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-}
\ No newline at end of file
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.IdCursorPagination',
+    'PAGE_SIZE': 100,
+}
+
+# Bulk create through the list endpoints: the most items one request may
+# carry, and how many rows each INSERT statement writes.
+BULK_CREATE_MAX_ITEMS = int(os.environ.get('BULK_CREATE_MAX_ITEMS', 1000))
+BULK_CREATE_BATCH_SIZE = 500
+
+# Photo upserts into an album: the most photos one request may carry, and
+# how many rows each INSERT ... ON CONFLICT statement writes.
+PHOTO_UPSERT_MAX_ITEMS = int(os.environ.get('PHOTO_UPSERT_MAX_ITEMS', 10000))
+PHOTO_UPSERT_BATCH_SIZE = 1000
+
+# Number of counter rows a post with sharded comment counts spreads over.
+COMMENT_COUNT_SHARDS = 8
+
+# Seconds a cached page of a post's comments is kept.
+COMMENT_CACHE_TIMEOUT = 300
+
+# Seconds the to-do statistics of all users are served from a cached
+# snapshot; 0 computes them on every request.
+TODO_STATS_CACHE_TIMEOUT = int(os.environ.get('TODO_STATS_CACHE_TIMEOUT', 60))
+
+# Token authentication cache: how many tokens each process keeps, and for
+# how many seconds, which bounds how late other processes see a revoked
+# token. TOKEN_AUTH_SHARED_CACHE names an entry of CACHES to share tokens
+# between processes as well.
+TOKEN_AUTH_CACHE_SIZE = 10000
+TOKEN_AUTH_CACHE_TIMEOUT = 30
+TOKEN_AUTH_SHARED_CACHE = os.environ.get('TOKEN_AUTH_SHARED_CACHE') or None
+TOKEN_AUTH_SHARED_CACHE_TIMEOUT = 300
+
+# Seconds a signed access token from the token endpoint stays valid.
+ACCESS_TOKEN_LIFETIME = int(os.environ.get('ACCESS_TOKEN_LIFETIME', 300))
+
+# Rows per process in the company name and geo coordinate lookup caches,
+# and for how many seconds an entry is trusted.
+INTERN_CACHE_SIZE = 10000
+INTERN_CACHE_TIMEOUT = 300
+
+# Password checks of the token endpoint run in this many processes (0 runs
+# them inline). Logins beyond the queue limit, or waiting longer than the
+# timeout in seconds, get a 503.
+LOGIN_HASH_WORKERS = int(os.environ.get('LOGIN_HASH_WORKERS', os.cpu_count() or 1))
+LOGIN_HASH_QUEUE_LIMIT = int(os.environ.get('LOGIN_HASH_QUEUE_LIMIT', LOGIN_HASH_WORKERS * 8 or 1))
+LOGIN_HASH_TIMEOUT = 10
+
+# Failed logins allowed per email and per client IP, checked before hashing.
+LOGIN_RATE_LIMITS = {
+    'email': '10/min',
+    'ip': '100/min',
+}
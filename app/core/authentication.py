@@ -0,0 +1,214 @@
+"""
+Authentication classes shared by the API viewsets.
+"""
+import copy
+import time
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import caches
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework.authtoken.models import Token
+
+from core.lru import LRUCache
+
+SHARED_KEY_PREFIX = 'auth-token'
+SHARED_USER_KEY_PREFIX = 'auth-user'
+ACCESS_TOKEN_SALT = 'core.authentication.access-token'
+
+_local_tokens = LRUCache(settings.TOKEN_AUTH_CACHE_SIZE, settings.TOKEN_AUTH_CACHE_TIMEOUT)
+_local_users = LRUCache(settings.TOKEN_AUTH_CACHE_SIZE, settings.TOKEN_AUTH_CACHE_TIMEOUT)
+
+
+def _shared_cache():
+    alias = settings.TOKEN_AUTH_SHARED_CACHE
+    return caches[alias] if alias else None
+
+
+def _shared_key(key):
+    return f'{SHARED_KEY_PREFIX}:{key}'
+
+
+def _shared_user_key(user_id):
+    return f'{SHARED_USER_KEY_PREFIX}:{user_id}'
+
+
+def get_cached_token(key):
+    """Return the cached (user, token) pair for key, or None.
+
+    The shared cache only holds the user's id, so a pair found there has a
+    LazyUser that loads the user when more than its id is needed.
+    """
+    cached = _local_tokens.get(key)
+    if cached is None:
+        shared = _shared_cache()
+        cached = shared.get(_shared_key(key)) if shared is not None else None
+        if cached is None:
+            return None
+        user_id, is_active, token_key = cached
+        if not is_active:
+            return None
+        return LazyUser(user_id), Token(key=token_key, user_id=user_id)
+    # Every request gets its own copies to modify.
+    user, token = map(copy.copy, cached)
+    token.user = user
+    return user, token
+
+
+def cache_token(key, user, token):
+    """Remember an authenticated (user, token) pair.
+
+    The user object stays in this process; other processes only get its
+    id and whether it is active, never the password hash.
+    """
+    cached = (copy.copy(user), copy.copy(token))
+    cached[1].user = cached[0]
+    _local_tokens.set(key, cached)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.set(_shared_key(key), (user.pk, user.is_active, token.key), settings.TOKEN_AUTH_SHARED_CACHE_TIMEOUT)
+
+
+def invalidate_tokens(*keys):
+    """Forget the given token keys in this process and the shared cache."""
+    for key in keys:
+        _local_tokens.delete(key)
+    shared = _shared_cache()
+    if shared is not None and keys:
+        shared.delete_many([_shared_key(key) for key in keys])
+
+
+def invalidate_user_tokens(user_id):
+    """Forget the tokens and active status of a user whose account changed."""
+    invalidate_user(user_id)
+    invalidate_tokens(*Token.objects.filter(user_id=user_id).values_list('key', flat=True))
+
+
+def is_user_active(user_id):
+    """Return whether the user exists and is active, cached like tokens."""
+    active = _local_users.get(user_id)
+    if active is not None:
+        return active
+    shared = _shared_cache()
+    active = shared.get(_shared_user_key(user_id)) if shared is not None else None
+    if active is None:
+        active = get_user_model().objects.filter(pk=user_id, is_active=True).exists()
+        if shared is not None:
+            shared.set(_shared_user_key(user_id), active, settings.TOKEN_AUTH_SHARED_CACHE_TIMEOUT)
+    _local_users.set(user_id, active)
+    return active
+
+
+def invalidate_user(user_id):
+    """Forget the cached active status of a changed or deleted user."""
+    _local_users.delete(user_id)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.delete(_shared_user_key(user_id))
+
+
+def clear_token_cache():
+    _local_tokens.clear()
+    _local_users.clear()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that skips the token query for recently seen tokens.
+
+    Tokens are kept in a bounded per-process LRU map and, when
+    ``TOKEN_AUTH_SHARED_CACHE`` names a cache, in that cache too. Deleting
+    a token or saving its user drops it from this process and the shared
+    cache once the change commits; other processes notice within
+    ``TOKEN_AUTH_CACHE_TIMEOUT`` seconds, when their entry expires.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = get_cached_token(key)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        cache_token(key, user, token)
+        return user, token
+
+
+def issue_access_token(user_id):
+    """Return a signed access token for the user and its expiry timestamp."""
+    expires = int(time.time()) + settings.ACCESS_TOKEN_LIFETIME
+    access = signing.Signer(salt=ACCESS_TOKEN_SALT).sign(f'{user_id}:{expires}')
+    return access, expires
+
+
+def read_access_token(access):
+    """Return the user id and expiry a signed access token carries.
+
+    Raises AuthenticationFailed if the token was tampered with or expired.
+    """
+    try:
+        user_id, expires = signing.Signer(salt=ACCESS_TOKEN_SALT).unsign(access).split(':')
+        user_id, expires = int(user_id), int(expires)
+    except (signing.BadSignature, ValueError):
+        raise exceptions.AuthenticationFailed(_('Invalid access token.'))
+    if expires <= time.time():
+        raise exceptions.AuthenticationFailed(_('Access token expired.'))
+    return user_id, expires
+
+
+def _load_active_user(user_id):
+    try:
+        return get_user_model().objects.get(pk=user_id, is_active=True)
+    except get_user_model().DoesNotExist:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+
+class LazyUser(SimpleLazyObject):
+    """User of an access token, loaded only when more than its id is needed.
+
+    Permission checks and ``request.user.id`` are answered from the token;
+    any other attribute loads the user, failing if it is gone or inactive.
+    """
+
+    def __init__(self, user_id):
+        super().__init__(partial(_load_active_user, user_id))
+        self.__dict__.update(id=user_id, pk=user_id, is_authenticated=True, is_anonymous=False)
+
+    def __bool__(self):
+        return True
+
+
+class SignedAccessTokenAuthentication(BaseAuthentication):
+    """Authenticate ``Authorization: Bearer <access>`` without loading the user.
+
+    Access tokens are HMAC signed with the secret key and carry the user's
+    id and an expiry. They are not revoked individually: they stop working
+    at their expiry, ``ACCESS_TOKEN_LIFETIME`` seconds after being issued,
+    or once their user is deleted or deactivated. Whether the user is
+    active is cached like the stored tokens are.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid access token header.'))
+        try:
+            access = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_('Invalid access token header.'))
+        user_id, expires = read_access_token(access)
+        if not is_user_active(user_id):
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return LazyUser(user_id), {'user_id': user_id, 'expires': expires}
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,38 @@
+"""
+Benchmarks runnable with ``manage.py benchmark <name>``.
+
+Each submodule defines ``add_arguments(parser)`` (optional) and
+``run(command, options)``, which writes a report to ``command.stdout`` and
+returns its measurements as a dict. Modules that can be checked against
+earlier results also define ``compare(baseline, results, threshold)``,
+returning a message for every measurement that got worse.
+"""
+import time
+
+
+def best_of(func, repeat):
+    """Call func repeat times and return the fastest run in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def regressions(baseline, results, threshold, metrics, path=()):
+    """Return messages for metrics more than threshold (a fraction) above baseline.
+
+    Both are nested dicts of measurements; metrics names the keys where
+    lower is better. Entries missing from the baseline are skipped.
+    """
+    messages = []
+    for key, value in results.items():
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        if isinstance(value, dict):
+            messages += regressions(old, value, threshold, metrics, path + (key,))
+        elif key in metrics and value > old * (1 + threshold):
+            messages.append(f'{" ".join(path + (key,))}: {old} -> {value}')
+    return messages
@@ -0,0 +1,183 @@
+"""
+Benchmark the routes of the API through the test client.
+
+Create, update and delete requests each run in a transaction that is
+rolled back afterwards, so every request sees the same data. Their
+numbers include that transaction, and writes nested in the views' own
+atomic blocks use savepoints.
+"""
+import math
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from album import urls as album_urls
+from core.benchmarks import regressions
+from core.models import Album, Post, User
+from post import urls as post_urls
+from todo import urls as todo_urls
+from user import urls as user_urls
+
+URL_MODULES = (post_urls, album_urls, todo_urls, user_urls)
+# Detail actions whose id is not a row of their own viewset.
+ACTION_MODELS = {
+    'filter_by_post': Post,
+    'user_posts': User,
+    'user_albums': User,
+    'user_todos': User,
+}
+GATED_METRICS = ('p50_ms', 'p95_ms', 'queries', 'bytes')
+PASSWORD = 'benchmark-password'
+WRITE_METHODS = ('post', 'put', 'patch', 'delete')
+PHOTO_URLS = {
+    'url': 'https://via.placeholder.com/600/benchmark',
+    'thumbnailUrl': 'https://via.placeholder.com/150/benchmark',
+}
+
+
+def add_arguments(parser):
+    parser.add_argument('--dataset-users', type=int, default=200, help='Users in the generated dataset.')
+    parser.add_argument('--requests', type=int, default=50, help='Timed requests per route.')
+
+
+def sample_id(model):
+    """Return the id of the middle row of model."""
+    ids = model._default_manager.order_by('pk').values_list('pk', flat=True)
+    return ids[ids.count() // 2]
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of sorted values."""
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def get_routes():
+    """Yield (name, method, url) for every route and method of the API urls modules."""
+    for module in URL_MODULES:
+        router = module.router
+        for prefix, viewset, basename in router.registry:
+            model = viewset.queryset.model
+            for route in router.get_routes(viewset):
+                name = f'{module.app_name}:{route.name.format(basename=basename)}'
+                for method, action in router.get_method_map(viewset, route.mapping).items():
+                    kwargs = {'pk': sample_id(ACTION_MODELS.get(action, model))} if route.detail else {}
+                    yield name, method, reverse(name, kwargs=kwargs)
+    yield 'user:token', 'post', reverse('user:token')
+    yield 'user:token-refresh', 'post', reverse('user:token-refresh')
+
+
+def write_payloads(user):
+    """Return the request data of the write routes by route name and method."""
+    post = {'title': 'Benchmark', 'body': 'Benchmark body.'}
+    comment = {'body': 'Benchmark comment.', 'postId': sample_id(Post)}
+    album = {'title': 'Benchmark'}
+    photo = {'title': 'Benchmark', 'albumId': sample_id(Album), **PHOTO_URLS}
+    todo = {'title': 'Benchmark', 'completed': False}
+    payloads = {
+        ('post:post-list', 'post'): post,
+        ('post:comment-list', 'post'): comment,
+        ('album:album-list', 'post'): album,
+        ('album:album-upsert-photos', 'post'): [{'title': 'Benchmark', **PHOTO_URLS}],
+        ('album:photo-list', 'post'): photo,
+        ('todo:todo-list', 'post'): todo,
+        ('user:user-list', 'post'): {
+            'email': 'benchmark-new@example.com', 'username': 'benchmark-new', 'password': PASSWORD, 'name': 'New',
+        },
+    }
+    # The detail routes of users point at the benchmark user.
+    for name, data in (
+        ('post:post-detail', post),
+        ('post:comment-detail', comment),
+        ('album:album-detail', album),
+        ('album:photo-detail', photo),
+        ('todo:todo-detail', todo),
+        ('user:user-detail', {'name': 'Benchmark', 'email': user.email, 'username': user.username, 'password': PASSWORD}),
+    ):
+        payloads[name, 'put'] = data
+        # Partial updates change just the first field.
+        payloads[name, 'patch'] = dict([next(iter(data.items()))])
+    return payloads
+
+
+def measure(client, method, url, data, requests, rollback=False):
+    """Return latency percentiles, queries and bytes of requests calls.
+
+    With rollback every call runs in a transaction that is rolled back.
+    """
+    def send():
+        if not rollback:
+            return getattr(client, method)(url, data, format='json')
+        with transaction.atomic():
+            response = getattr(client, method)(url, data, format='json')
+            transaction.set_rollback(True)
+        return response
+
+    # Warm caches once, as in a running server.
+    send()
+    latencies = []
+    size = 0
+    with CaptureQueriesContext(connection) as queries:
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = send()
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                raise AssertionError(f'{method.upper()} {url} returned {response.status_code}: {content[:200]}')
+            size = len(content)
+    latencies.sort()
+    return {
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'queries': round(len(queries) / requests, 2),
+        'bytes': size,
+    }
+
+
+def seed(users):
+    """Generate a dataset and return its middle user, made staff, and a token of theirs."""
+    call_command('generate_data', users=users, password=PASSWORD, stdout=StringIO())
+    user = User.objects.get(pk=sample_id(User))
+    # Staff, so admin-only routes are measured too.
+    User.objects.filter(pk=user.pk).update(is_staff=True)
+    return user, Token.objects.create(user=user)
+
+
+def run(command, options):
+    user, token = seed(options['dataset_users'])
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    payloads = {
+        ('user:token', 'post'): {'email': user.email, 'password': PASSWORD},
+        ('user:token-refresh', 'post'): {'token': token.key},
+        **write_payloads(user),
+    }
+    results = {}
+
+    command.stdout.write(f'{"route":<36} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8} {"bytes":>9}')
+    # The test client's host, which the test runner would otherwise allow.
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        for name, method, url in get_routes():
+            # Reads keep the route name, so earlier baselines still match.
+            key = name if method == 'get' or name.startswith('user:token') else f'{method.upper()} {name}'
+            result = results[key] = measure(
+                client, method, url, payloads.get((name, method)), options['requests'],
+                rollback=key != name,
+            )
+            command.stdout.write(
+                f'{key:<36} {result["p50_ms"]:8.2f} {result["p95_ms"]:8.2f} {result["p99_ms"]:8.2f} '
+                f'{result["queries"]:8.2f} {result["bytes"]:9d}'
+            )
+    return results
+
+
+def compare(baseline, results, threshold):
+    return regressions(baseline, results, threshold, GATED_METRICS)
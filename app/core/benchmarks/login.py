@@ -0,0 +1,54 @@
+"""
+Benchmark password checks per second against the number of hashing processes.
+"""
+import os
+import time
+
+from django.contrib.auth.hashers import make_password
+
+from core.hashing import PasswordHashPool
+
+
+def add_arguments(parser):
+    parser.add_argument('--logins', type=int, default=200, help='Password checks per measurement.')
+    parser.add_argument(
+        '--workers', type=int, nargs='+',
+        help='Pool sizes to measure (default: powers of two up to the CPU count).',
+    )
+
+
+def default_workers():
+    cpus = os.cpu_count() or 1
+    workers = [1]
+    while workers[-1] * 2 <= cpus:
+        workers.append(workers[-1] * 2)
+    if workers[-1] != cpus:
+        workers.append(cpus)
+    return workers
+
+
+def run(command, options):
+    logins = options['logins']
+    encoded = make_password('benchmark-password')
+    results = {}
+
+    for workers in options['workers'] or default_workers():
+        pool = PasswordHashPool(workers, max_pending=logins)
+        try:
+            # Start the worker processes outside the measurement.
+            for future in [pool.submit('benchmark-password', encoded) for _ in range(workers)]:
+                future.result()
+            best = None
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                futures = [pool.submit('benchmark-password', encoded) for _ in range(logins)]
+                if not all(future.result() for future in futures):
+                    raise AssertionError('Password check failed')
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+        finally:
+            pool.shutdown()
+        rate = logins / best
+        results[workers] = {'logins': logins, 'seconds': round(best, 3), 'logins_per_second': round(rate, 1)}
+        command.stdout.write(f'{workers:>3} processes: {rate:8.1f} logins/s')
+    return results
@@ -0,0 +1,123 @@
+"""
+Measure the storage saved by keeping photo URLs as shared prefixes and names.
+
+On PostgreSQL the photo table is also compared with a copy storing both
+URLs whole, as the table did before.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from core.benchmarks import best_of, regressions
+from core.models import Album, Photo, UrlPrefix, expand_urls
+
+COMPACT_FIELDS = ('url_prefix', 'url_name', 'thumbnail_prefix', 'thumbnail_url')
+WIDE_TABLE = 'benchmark_wide_photo'
+GATED_METRICS = ('compact_bytes', 'compact_table_bytes')
+
+
+def add_arguments(parser):
+    parser.add_argument('--photos', type=int, default=20000, help='Photos to store.')
+
+
+def seed(photos):
+    """Create photos with JSONPlaceholder style URLs in albums of 50."""
+    user = get_user_model().objects.create(email='photos@example.com', name='Photos', password='!')
+    Album.objects.bulk_create(Album(user=user, title=f'Album {i}') for i in range(photos // 50 + 1))
+    # Re-read the albums, bulk_create does not set primary keys on every backend.
+    album_ids = list(Album.objects.order_by('id').values_list('id', flat=True))
+    # Spread the colors like random ones, but the same on every run.
+    colors = (f'{i * 2654435761 % (1 << 24):06x}' for i in range(photos))
+    Photo.objects.bulk_create(
+        (Photo(
+            albumId_id=album_ids[i // 50],
+            user=user,
+            title=f'Photo {i}',
+            url=f'https://via.placeholder.com/600/{color}',
+            thumbnailUrl=f'https://via.placeholder.com/150/{color}',
+        ) for i, color in enumerate(colors)),
+        batch_size=1000,
+    )
+
+
+def url_bytes():
+    """Return the bytes of URL data per photo, stored whole and compact."""
+    prefixes = dict(UrlPrefix.objects.values_list('id', 'prefix'))
+    full = compact = rows = 0
+    for url_prefix_id, url_name, thumbnail_prefix_id, thumbnail_url in Photo.objects.values_list(
+        'url_prefix_id', 'url_name', 'thumbnail_prefix_id', 'thumbnail_url',
+    ).iterator():
+        url, thumbnail = expand_urls(prefixes[url_prefix_id], url_name, prefixes.get(thumbnail_prefix_id), thumbnail_url)
+        full += len(url.encode()) + len(thumbnail.encode())
+        # Two four byte prefix ids, one of them possibly null.
+        compact += len(url_name.encode()) + len(thumbnail_url.encode()) + 4 + (4 if thumbnail_prefix_id else 0)
+        rows += 1
+    # The prefixes are shared by all photos.
+    compact += sum(len(prefix.encode()) + 4 for prefix in prefixes.values())
+    return round(full / rows, 1), round(compact / rows, 1)
+
+
+def table_sizes(repeat):
+    """Return the sizes and scan times of the photo table and of a copy with whole URLs."""
+    quote_name = connection.ops.quote_name
+    table = quote_name(Photo._meta.db_table)
+    columns = ', '.join(
+        f'p.{quote_name(field.column)}' for field in Photo._meta.concrete_fields if field.name not in COMPACT_FIELDS
+    )
+    prefixes = quote_name(UrlPrefix._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {WIDE_TABLE} AS SELECT {columns}, '
+            f'u.prefix || p.url_name AS url, '
+            f'COALESCE(t.prefix || p.url_name, p.thumbnail_url) AS "thumbnailUrl" '
+            f'FROM {table} p JOIN {prefixes} u ON u.id = p.url_prefix_id '
+            f'LEFT JOIN {prefixes} t ON t.id = p.thumbnail_prefix_id'
+        )
+        cursor.execute(f'VACUUM ANALYZE {table}')
+        cursor.execute(f'VACUUM ANALYZE {WIDE_TABLE}')
+        # Heap and TOAST only, the wide copy has no indexes.
+        cursor.execute(
+            f"SELECT pg_table_size('{table}') + pg_table_size('{prefixes}'), pg_table_size('{WIDE_TABLE}')"
+        )
+        compact, wide = cursor.fetchone()
+
+        def scan(name):
+            def query():
+                cursor.execute(f'SELECT max(title) FROM {name}')
+                cursor.fetchone()
+            return best_of(query, repeat)
+
+        compact_scan = scan(table)
+        wide_scan = scan(WIDE_TABLE)
+        cursor.execute(f'DROP TABLE {WIDE_TABLE}')
+    return {
+        'wide_table_bytes': wide,
+        'compact_table_bytes': compact,
+        'wide_scan_ms': round(wide_scan * 1000, 2),
+        'compact_scan_ms': round(compact_scan * 1000, 2),
+    }
+
+
+def run(command, options):
+    seed(options['photos'])
+    full, compact = url_bytes()
+    results = {
+        'photos': options['photos'],
+        'prefixes': UrlPrefix.objects.count(),
+        'full_bytes': full,
+        'compact_bytes': compact,
+    }
+    command.stdout.write(
+        f'{results["photos"]} photos, {results["prefixes"]} prefixes: URL data {full} bytes/row whole, '
+        f'{compact} bytes/row compact ({1 - compact / full:.0%} smaller)'
+    )
+    if connection.vendor == 'postgresql':
+        results.update(table_sizes(options['repeat']))
+        command.stdout.write(
+            f'photo table {results["wide_table_bytes"]} bytes whole, {results["compact_table_bytes"]} compact; '
+            f'scan {results["wide_scan_ms"]:.1f} ms whole, {results["compact_scan_ms"]:.1f} ms compact'
+        )
+    return results
+
+
+def compare(baseline, results, threshold):
+    return regressions(baseline, results, threshold, GATED_METRICS)
@@ -0,0 +1,88 @@
+"""
+Benchmark the values() read path against the model serializers.
+"""
+from django.contrib.auth import get_user_model
+
+from rest_framework.renderers import JSONRenderer
+
+from album.serializers import PhotoValuesSerializer
+from core.benchmarks import best_of
+from core.models import Album, Comment, Photo, Post, ToDo
+from post.serializers import CommentValuesSerializer, PostValuesSerializer
+from todo.serializers import ToDoValuesSerializer
+
+
+def add_arguments(parser):
+    parser.add_argument('--rows', type=int, default=10000, help='Rows per page.')
+
+
+def seed(rows):
+    """Create rows posts, comments, photos and to-dos."""
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(email=f'bench{i}@example.com', name=f'Bench User {i}', password='!') for i in range(100)
+    )
+    # Re-read the users, bulk_create does not set primary keys on every backend.
+    users = list(User.objects.order_by('id'))
+    post = Post.objects.create(user=users[0], title='Post', body='Body')
+    album = Album.objects.create(user=users[0], title='Album')
+    Post.objects.bulk_create(
+        (Post(user=users[i % 100], title=f'Post title {i}', body='Post body ' * 20) for i in range(rows)),
+        batch_size=1000,
+    )
+    Comment.objects.bulk_create(
+        (Comment(postId=post, user=users[i % 100], body='Comment body ' * 10) for i in range(rows)),
+        batch_size=1000,
+    )
+    Photo.objects.bulk_create(
+        (Photo(albumId=album, title=f'Photo {i}', url=f'https://via.placeholder.com/600/{i:06x}',
+               thumbnailUrl=f'https://via.placeholder.com/150/{i:06x}') for i in range(rows)),
+        batch_size=1000,
+    )
+    ToDo.objects.bulk_create(
+        (ToDo(user=users[i % 100], title=f'ToDo {i}', completed=bool(i % 3)) for i in range(rows)),
+        batch_size=1000,
+    )
+
+
+def run(command, options):
+    rows = options['rows']
+    repeat = options['repeat']
+    seed(rows)
+    renderer = JSONRenderer()
+    results = {}
+
+    for values_serializer, model in (
+        (PostValuesSerializer, Post),
+        (CommentValuesSerializer, Comment),
+        (PhotoValuesSerializer, Photo),
+        (ToDoValuesSerializer, ToDo),
+    ):
+        model_serializer = values_serializer.model_serializer
+        queryset = model_serializer.setup_eager_loading(model.objects.order_by('id'))[:rows]
+        values_queryset = values_serializer.get_queryset(
+            model_serializer.setup_eager_loading(model.objects.order_by('id'))
+        )[:rows]
+
+        def render_model():
+            return renderer.render(model_serializer(list(queryset.all()), many=True).data)
+
+        def render_values():
+            return renderer.render(values_serializer(list(values_queryset.all()), many=True).data)
+
+        if render_model() != render_values():
+            raise AssertionError(f'{values_serializer.__name__} output differs')
+        model_time = best_of(render_model, repeat)
+        values_time = best_of(render_values, repeat)
+        name = model.__name__
+        results[name] = {
+            'rows': rows,
+            'model_serializer_ms': round(model_time * 1000, 2),
+            'values_serializer_ms': round(values_time * 1000, 2),
+            'speedup': round(model_time / values_time, 2),
+        }
+        command.stdout.write(
+            f'{name:<8} {rows} rows: ModelSerializer {model_time * 1000:8.1f} ms, '
+            f'values {values_time * 1000:8.1f} ms, {model_time / values_time:5.1f}x faster'
+        )
+    return results
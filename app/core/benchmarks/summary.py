@@ -0,0 +1,63 @@
+"""
+Benchmark the user summary endpoint against counting from five per-user listings.
+
+Uses the dataset size of the endpoints benchmark, ``--dataset-users``.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.benchmarks import best_of
+from core.benchmarks.endpoints import seed
+
+
+def profile_urls(user_id):
+    """Return the per-user listings the profile screen would need to count a user's rows."""
+    page = {'page_size': 1000}
+    return [
+        (reverse('post:post-user-posts', kwargs={'pk': user_id}), page),
+        (reverse('album:album-user-albums', kwargs={'pk': user_id}), page),
+        (reverse('todo:todo-user-todos', kwargs={'pk': user_id}), page),
+        (reverse('post:comment-list'), {'userId': user_id, **page}),
+        (reverse('album:photo-list'), {'userId': user_id, **page}),
+    ]
+
+
+def measure(client, requests, repeat):
+    """Return the best time, the queries and the bytes of sending requests."""
+    def send():
+        return [client.get(url, data) for url, data in requests]
+
+    with CaptureQueriesContext(connection) as queries:
+        responses = send()
+    if any(response.status_code != 200 for response in responses):
+        raise AssertionError('Request failed')
+    return {
+        'queries': len(queries),
+        'bytes': sum(len(response.content) for response in responses),
+        'ms': round(best_of(send, repeat) * 1000, 2),
+    }
+
+
+def run(command, options):
+    user, token = seed(options['dataset_users'])
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    results = {}
+
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        results['five_calls'] = measure(client, profile_urls(user.id), options['repeat'])
+        results['summary'] = measure(
+            client, [(reverse('user:user-summary', kwargs={'pk': user.id}), None)], options['repeat'],
+        )
+    results['speedup'] = round(results['five_calls']['ms'] / results['summary']['ms'], 1)
+
+    for name, result in results.items():
+        if name != 'speedup':
+            command.stdout.write(
+                f'{name:<10} {result["ms"]:8.1f} ms {result["queries"]:4d} queries {result["bytes"]:9d} bytes'
+            )
+    command.stdout.write(f'summary is {results["speedup"]}x faster')
+    return results
@@ -0,0 +1,168 @@
+"""
+Helpers for loading large data files in batches.
+"""
+import json
+import sys
+from contextlib import contextmanager
+from io import StringIO
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connection
+
+from core.models import Address, Album, Comment, Photo, Post, ToDo, User
+
+# Tables the bulk loading commands write, in dependency order, parents first.
+TABLES = (
+    ('addresses', Address),
+    ('users', User),
+    ('posts', Post),
+    ('comments', Comment),
+    ('albums', Album),
+    ('photos', Photo),
+    ('todos', ToDo),
+)
+WHITESPACE = ' \t\r\n'
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+@contextmanager
+def open_records(path):
+    """Open a data file for reading, ``-`` meaning standard input."""
+    if path == '-':
+        yield sys.stdin
+    else:
+        with open(path, encoding='utf-8') as stream:
+            yield stream
+
+
+def iter_records(stream, chunk_size=64 * 1024):
+    """Yield the objects of a JSON array or of NDJSON lines one at a time.
+
+    Only ``chunk_size`` characters plus the record being decoded are held
+    in memory, so files much larger than memory can be read.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+    while True:
+        # Skip whitespace and the array's brackets and commas.
+        while pos < len(buffer) and buffer[pos] in WHITESPACE + '[],':
+            pos += 1
+        if pos < len(buffer):
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield record
+                continue
+        if eof:
+            return
+        # The next record is incomplete; read on.
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+
+def batched(iterable, size):
+    """Yield lists of up to size items from iterable."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def create_with_ids(model, objs, batch_size=None):
+    """Insert objs and set their primary keys.
+
+    Backends that can't return the ids of a bulk insert get one INSERT
+    per row instead.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model._base_manager.bulk_create(objs, batch_size=batch_size)
+    for obj in objs:
+        obj.save(force_insert=True)
+    return objs
+
+
+def copy_value(value):
+    """Return value as a field of PostgreSQL's COPY text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return str(value).translate(COPY_ESCAPES)
+
+
+def insert_rows(model, objs):
+    """Insert objs, which have their primary keys set, as fast as the backend allows.
+
+    PostgreSQL gets one COPY per call; other backends fall back to
+    bulk_create. No signals are sent either way.
+    """
+    if connection.vendor != 'postgresql':
+        model._base_manager.bulk_create(objs)
+        return
+    fields = model._meta.concrete_fields
+    rows = StringIO()
+    for obj in objs:
+        values = (field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields)
+        rows.write('\t'.join(map(copy_value, values)) + '\n')
+    rows.seek(0)
+    quote_name = connection.ops.quote_name
+    columns = ', '.join(quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY {quote_name(model._meta.db_table)} ({columns}) FROM STDIN', rows)
+
+
+@contextmanager
+def deferred_indexes(*models):
+    """Drop the models' secondary indexes on PostgreSQL and rebuild them on exit.
+
+    Building an index once over the loaded rows is much faster than
+    updating it for every inserted row, but queries on the tables go
+    without the indexes until the rebuild. Yields the dropped indexes.
+    """
+    indexes = [(model, index) for model in models for index in model._meta.indexes]
+    if connection.vendor != 'postgresql' or not indexes:
+        yield []
+        return
+    with connection.schema_editor() as schema_editor:
+        for model, index in indexes:
+            schema_editor.remove_index(model, index)
+    try:
+        yield [index for model, index in indexes]
+    finally:
+        with connection.schema_editor() as schema_editor:
+            for model, index in indexes:
+                schema_editor.add_index(model, index)
+
+
+def add_defer_indexes_argument(parser):
+    """Add the --defer-indexes option of the bulk loading commands."""
+    parser.add_argument(
+        '--defer-indexes', action='store_true',
+        help='Drop secondary indexes during the load and rebuild them afterwards. Faster for large '
+             'loads, but queries on the tables run without the indexes meanwhile.',
+    )
+
+
+@contextmanager
+def load_indexes(models, options, stdout):
+    """Defer the models' indexes during a load if --defer-indexes was given, reporting which."""
+    with deferred_indexes(*(models if options['defer_indexes'] else [])) as dropped:
+        if dropped:
+            stdout.write(f"Dropped indexes {', '.join(index.name for index in dropped)}, rebuilding them after the load.")
+        yield
+
+
+def reset_sequences(*models):
+    """Move the id sequences of models past rows inserted with explicit ids."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
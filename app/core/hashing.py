@@ -0,0 +1,96 @@
+"""
+Password hash verification in a pool of worker processes.
+
+PBKDF2 keeps a CPU busy for the whole check, so during login storms every
+request worker ends up hashing and all other requests queue behind them.
+The pool runs checks in a fixed number of separate processes and caps how
+many may wait, turning overload into a fast refusal.
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from django.contrib.auth.hashers import check_password, make_password
+
+
+class PasswordHashPoolBusy(Exception):
+    """Raised when the pool already has its limit of checks waiting."""
+
+
+def _check_password(password, encoded):
+    return check_password(password, encoded)
+
+
+class PasswordHashPool:
+    """Verify passwords in ``workers`` processes, with at most ``max_pending`` checks queued.
+
+    With no workers checks run inline, which suits development and tests.
+    Processes are started on first use.
+    """
+
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _reset_executor(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def submit(self, password, encoded):
+        """Queue a check and return its future; raise PasswordHashPoolBusy if full."""
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashPoolBusy()
+        executor = self._get_executor()
+        try:
+            future = executor.submit(_check_password, password, encoded)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next check.
+            self._slots.release()
+            self._reset_executor(executor)
+            raise PasswordHashPoolBusy()
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda future: self._slots.release())
+        return future
+
+    def check_password(self, password, encoded, timeout=None):
+        """Return whether password matches the encoded hash.
+
+        Raises PasswordHashPoolBusy if the queue is full or the check does
+        not finish within timeout seconds.
+        """
+        if not self.workers:
+            return _check_password(password, encoded)
+        future = self.submit(password, encoded)
+        try:
+            return future.result(timeout)
+        except (FutureTimeout, BrokenProcessPool):
+            raise PasswordHashPoolBusy()
+
+    def make_passwords(self, passwords):
+        """Return the hashes of passwords, computed across the workers.
+
+        Meant for bulk imports, so it ignores the pending limit.
+        """
+        if not self.workers:
+            return [make_password(password) for password in passwords]
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return list(self._get_executor().map(make_password, passwords, chunksize=chunksize))
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,65 @@
+"""
+Django command to run performance benchmarks.
+"""
+import json
+from importlib import import_module
+from pkgutil import iter_modules
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    """ Django command to run benchmarks against a scratch test database."""
+    help = 'Run the named benchmarks from core.benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='+', help='Benchmark module names, e.g. serializers.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement, best is kept.')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between runs.')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--baseline', help='Fail if results are worse than in this JSON file of earlier results.')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Allowed regression against the baseline, as a fraction.',
+        )
+        for info in iter_modules(benchmarks.__path__):
+            module = import_module(f'core.benchmarks.{info.name}')
+            if hasattr(module, 'add_arguments'):
+                module.add_arguments(parser)
+
+    def handle(self, *args, **options):
+        """ Entrypoint for command"""
+        known = {info.name for info in iter_modules(benchmarks.__path__)}
+        unknown = set(options['names']) - known
+        if unknown:
+            raise CommandError(f'Unknown benchmark: {", ".join(sorted(unknown))}.')
+
+        baseline = {}
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as stream:
+                baseline = json.load(stream)
+
+        results = {}
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            for name in options['names']:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'Benchmark: {name}'))
+                # Through JSON, so keys compare equal to a stored baseline.
+                results[name] = json.loads(json.dumps(import_module(f'core.benchmarks.{name}').run(self, options)))
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                json.dump(results, stream, indent=2, sort_keys=True)
+
+        messages = []
+        for name, result in results.items():
+            module = import_module(f'core.benchmarks.{name}')
+            if name in baseline and hasattr(module, 'compare'):
+                messages += [f'{name} {message}' for message in module.compare(baseline[name], result, options['threshold'])]
+        if messages:
+            raise CommandError('Regressed against the baseline:\n' + '\n'.join(messages))
@@ -0,0 +1,169 @@
+"""
+Django command to generate synthetic data for scale testing.
+"""
+import random
+import time
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from core.bulk import TABLES, add_defer_indexes_argument, insert_rows, load_indexes, reset_sequences
+from core.models import Address, Album, Comment, Company, Geo, Photo, Post, ToDo, User
+
+MODELS = tuple(model for name, model in TABLES)
+WORDS = (
+    'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor '
+    'incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud'
+).split()
+
+
+class Command(BaseCommand):
+    """ Django command to generate users with posts, comments, albums, photos and todos."""
+    help = (
+        'Generate a synthetic dataset. The same seed gives the same data on an '
+        'empty database. Per-user and per-parent counts are drawn from '
+        'exponential distributions with the given means; posts of celebrity '
+        'users get --celebrity-factor times more comments.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--posts-per-user', type=float, default=10, help='Mean posts per user.')
+        parser.add_argument('--comments-per-post', type=float, default=5, help='Mean comments per post.')
+        parser.add_argument('--albums-per-user', type=float, default=10, help='Mean albums per user.')
+        parser.add_argument('--photos-per-album', type=float, default=50, help='Mean photos per album.')
+        parser.add_argument('--todos-per-user', type=float, default=20, help='Mean todos per user.')
+        parser.add_argument('--celebrities', type=float, default=0.01, help='Fraction of celebrity users.')
+        parser.add_argument(
+            '--celebrity-factor', type=float, default=100, help='Times more comments posts of celebrities get.',
+        )
+        parser.add_argument('--companies', type=int, default=100, help='Distinct companies users work for.')
+        parser.add_argument('--password', default='password', help='Password of every generated user.')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows buffered before writing.')
+        add_defer_indexes_argument(parser)
+
+    def handle(self, *args, **options):
+        """ Entrypoint for command"""
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        # Ids are assigned here so rows can point at parents not written yet.
+        self.ids = {model: (model._base_manager.aggregate(top=Max('pk'))['top'] or 0) + 1 for model in MODELS}
+        self.pending = {model: [] for model in MODELS}
+        self.pending_geos = []
+        self.counts = Counter()
+        self.first_user_id = self.ids[User]
+        # One hash for everyone; generated users don't need their own salt.
+        self.password = make_password(options['password'])
+        self.companies = list(
+            Company.objects.intern_many((f'Company {n}',) for n in range(options['companies'])).values()
+        )
+        self.companies.sort(key=lambda company: company.name)
+
+        start = time.perf_counter()
+        with load_indexes(MODELS, options, self.stdout):
+            for _ in range(options['users']):
+                self.generate_user()
+                if max(map(len, self.pending.values())) >= options['batch_size']:
+                    self.flush()
+            self.flush()
+        reset_sequences(*MODELS)
+
+        elapsed = time.perf_counter() - start
+        rows = sum(self.counts.values())
+        summary = ', '.join(f'{self.counts[model]} {name}' for name, model in TABLES)
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {summary} in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/s).'
+        ))
+
+    def count(self, mean, factor=1):
+        """Draw how many children a row gets."""
+        mean *= factor
+        return round(self.rng.expovariate(1 / mean)) if mean > 0 else 0
+
+    def words(self, count):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(count))
+
+    def new(self, model, **fields):
+        """Queue a row of model with the next id."""
+        obj = model(id=self.ids[model], **fields)
+        self.ids[model] += 1
+        self.pending[model].append(obj)
+        return obj
+
+    def generate_user(self):
+        rng, options = self.rng, self.options
+        factor = options['celebrity_factor'] if rng.random() < options['celebrities'] else 1
+
+        address = self.new(
+            Address,
+            street=self.words(2).title(),
+            suite=f'Apt. {rng.randrange(1000)}',
+            city=self.words(1).title(),
+            zipcode=f'{rng.randrange(100000):05}',
+        )
+        self.pending_geos.append((address, (round(rng.uniform(-90, 90), 4), round(rng.uniform(-180, 180), 4))))
+        user = self.new(
+            User,
+            password=self.password,
+            name=self.words(2).title(),
+            phone=f'{rng.randrange(10 ** 10):010}',
+            website=f'{self.words(1)}.example.org',
+            address=address,
+            company=rng.choice(self.companies) if self.companies else None,
+        )
+        user.email = f'user{user.id}@example.com'
+        user.username = f'user{user.id}'
+
+        for _ in range(self.count(options['posts_per_user'])):
+            comments = self.count(options['comments_per_post'], factor)
+            post = self.new(Post, user_id=user.id, title=self.words(5), body=self.words(30), comment_count=comments)
+            for _ in range(comments):
+                self.new(
+                    Comment,
+                    postId_id=post.id,
+                    user_id=rng.randint(self.first_user_id, user.id),
+                    body=self.words(15),
+                )
+
+        for _ in range(self.count(options['albums_per_user'])):
+            album = self.new(Album, user_id=user.id)
+            # Album titles are unique.
+            album.title = f'{self.words(4)} {album.id}'
+            colors = set()
+            for _ in range(self.count(options['photos_per_album'])):
+                # A url appears once per album.
+                color = f'{rng.getrandbits(24):06x}'
+                while color in colors:
+                    color = f'{rng.getrandbits(24):06x}'
+                colors.add(color)
+                self.new(
+                    Photo,
+                    albumId_id=album.id,
+                    user_id=user.id,
+                    title=self.words(5),
+                    url=f'https://via.placeholder.com/600/{color}',
+                    thumbnailUrl=f'https://via.placeholder.com/150/{color}',
+                )
+
+        for _ in range(self.count(options['todos_per_user'])):
+            self.new(ToDo, user_id=user.id, title=self.words(4), completed=rng.random() < 0.5)
+
+    def flush(self):
+        """Write the queued rows, parents first."""
+        with transaction.atomic():
+            geos = Geo.objects.intern_many(value for address, value in self.pending_geos)
+            for address, value in self.pending_geos:
+                address.geo = geos[Geo.objects.normalize(value)]
+            Photo.objects.resolve_urls(self.pending[Photo])
+            for model, objs in self.pending.items():
+                if objs:
+                    insert_rows(model, objs)
+                    self.counts[model] += len(objs)
+        self.pending = {model: [] for model in MODELS}
+        self.pending_geos = []
+        if self.options['verbosity'] > 1:
+            self.stdout.write(f'Generated {sum(self.counts.values())} rows...')
@@ -0,0 +1,155 @@
+"""
+Django command to load JSONPlaceholder data files.
+"""
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.bulk import (
+    TABLES, add_defer_indexes_argument, batched, insert_rows, iter_records, load_indexes, open_records,
+    reset_sequences,
+)
+from core.models import Album, Comment, Photo, Post, ToDo, User
+
+# Users come from import_users, every other table from a file of its own.
+FILE_TABLES = tuple((name, model) for name, model in TABLES if name not in ('addresses', 'users'))
+
+
+class Command(BaseCommand):
+    """ Django command to bulk load posts, comments, albums, photos and todos."""
+    help = (
+        'Load JSONPlaceholder JSON or NDJSON files, keeping their ids. Rows '
+        'that already exist or whose parent is missing are skipped, so an '
+        'interrupted load is resumed by running it again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            help='Users file to import first; userId then refers to its ids instead of user primary keys.',
+        )
+        for name, model in FILE_TABLES:
+            parser.add_argument(f'--{name}', help=f'{name.capitalize()} file, or - for standard input.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        add_defer_indexes_argument(parser)
+
+    def handle(self, *args, **options):
+        """ Entrypoint for command"""
+        self.verbosity = options['verbosity']
+        self.user_ids = self.load_users(options['users']) if options['users'] else None
+        tables = [(name, model) for name, model in FILE_TABLES if options[name]]
+        models = [model for name, model in tables]
+
+        with load_indexes(models, options, self.stdout):
+            for name, model in tables:
+                self.load(name, model, options[name], options['batch_size'])
+        reset_sequences(*models)
+
+        if Comment in models:
+            # Comments are inserted without signals; count them once at the end.
+            call_command('recount_comments', stdout=self.stdout)
+
+    def load_users(self, path):
+        """Import the users file and return its user ids mapped to primary keys."""
+        call_command('import_users', path, stdout=self.stdout)
+        user_ids = {}
+        with open_records(path) as stream:
+            for records in batched(iter_records(stream), 5000):
+                emails = {User.objects.normalize_email(record['email']): record['id'] for record in records}
+                for email, pk in User.objects.filter(email__in=emails).values_list('email', 'pk'):
+                    user_ids[emails[email]] = pk
+        return user_ids
+
+    def load(self, name, model, path, batch_size):
+        """Insert the new rows of one file in batches."""
+        build = getattr(self, f'build_{name}')
+        start = time.perf_counter()
+        loaded = skipped = 0
+        with open_records(path) as stream:
+            for records in batched(iter_records(stream), batch_size):
+                existing = set(
+                    model._base_manager.filter(pk__in=[record['id'] for record in records]).values_list('pk', flat=True)
+                )
+                objs = build([record for record in records if record['id'] not in existing])
+                if objs:
+                    with transaction.atomic():
+                        insert_rows(model, objs)
+                loaded += len(objs)
+                skipped += len(records) - len(objs)
+                if self.verbosity > 1:
+                    self.stdout.write(f'Loaded {loaded} {name}...')
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Loaded {loaded} {name}, skipped {skipped} in {elapsed:.1f}s '
+            f'({loaded / elapsed if elapsed else 0:.0f} rows/s).'
+        ))
+
+    def users_of(self, records):
+        """Return the userIds of records mapped to existing user primary keys."""
+        source_ids = {record['userId'] for record in records}
+        if self.user_ids is None:
+            candidates = {source_id: source_id for source_id in source_ids}
+        else:
+            candidates = {source_id: self.user_ids[source_id] for source_id in source_ids if source_id in self.user_ids}
+        found = set(User.objects.filter(pk__in=candidates.values()).values_list('pk', flat=True))
+        return {source_id: pk for source_id, pk in candidates.items() if pk in found}
+
+    def build_posts(self, records):
+        users = self.users_of(records)
+        return [
+            Post(id=record['id'], user_id=users[record['userId']], title=record['title'], body=record['body'])
+            for record in records if record['userId'] in users
+        ]
+
+    def build_comments(self, records):
+        posts = set(Post.objects.filter(pk__in={record['postId'] for record in records}).values_list('pk', flat=True))
+        users = dict(
+            User.objects.filter(email__in={record.get('email') for record in records}).values_list('email', 'pk')
+        )
+        return [
+            Comment(id=record['id'], postId_id=record['postId'], user_id=users.get(record.get('email')), body=record['body'])
+            for record in records if record['postId'] in posts
+        ]
+
+    def build_albums(self, records):
+        users = self.users_of(records)
+        return [
+            Album(id=record['id'], user_id=users[record['userId']], title=record['title'])
+            for record in records if record['userId'] in users
+        ]
+
+    def build_photos(self, records):
+        owners = dict(
+            Album.objects.filter(pk__in={record['albumId'] for record in records}).values_list('pk', 'user_id')
+        )
+        # A url appears once per album; later copies are skipped like existing rows.
+        seen = set(Photo.objects.existing_urls((record['albumId'], record['url']) for record in records))
+        unique = []
+        for record in records:
+            key = (record['albumId'], record['url'])
+            if key not in seen:
+                seen.add(key)
+                unique.append(record)
+        photos = [
+            Photo(
+                id=record['id'],
+                albumId_id=record['albumId'],
+                user_id=owners[record['albumId']],
+                title=record['title'],
+                url=record['url'],
+                thumbnailUrl=record['thumbnailUrl'],
+            )
+            for record in unique if record['albumId'] in owners
+        ]
+        Photo.objects.resolve_urls(photos)
+        return photos
+
+    def build_todos(self, records):
+        users = self.users_of(records)
+        return [
+            ToDo(id=record['id'], user_id=users[record['userId']], title=record['title'], completed=record['completed'])
+            for record in records if record['userId'] in users
+        ]
@@ -0,0 +1,79 @@
+"""
+Django command to recompute the comment counts of posts.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from core.models import Comment, Post, PostCommentCountShard, new_version
+
+
+class Command(BaseCommand):
+    """ Django command to repair drifted comment counts."""
+    help = 'Recompute Post.comment_count from the comments table, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """ Entrypoint for command"""
+        batch_size = options['batch_size']
+        last_id = 0
+        checked = repaired = 0
+        while True:
+            post_ids = list(
+                Post.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not post_ids:
+                break
+            last_id = post_ids[-1]
+            checked += len(post_ids)
+            repaired += self.recount(post_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} posts, repaired {repaired}."
+        ))
+
+    def recount(self, post_ids):
+        """Recount one batch of posts, fold their shards and return how many drifted."""
+        with transaction.atomic():
+            # Comments update their post's count in the transaction that
+            # writes them, and that update waits for the locks taken here
+            # before counting. So a comment is either committed and in the
+            # count below, or its update lands on top of it after the commit.
+            posts = list(
+                Post.objects.select_for_update().filter(pk__in=post_ids).only('comment_count', 'comment_count_sharded')
+            )
+            sharded = [post.pk for post in posts if post.comment_count_sharded]
+            shard_totals = {}
+            if sharded:
+                # Sharded posts are updated through their shards, so every
+                # shard must exist to be locked: a new one would not wait.
+                PostCommentCountShard.objects.bulk_create(
+                    (PostCommentCountShard(post_id=post_id, shard=shard)
+                     for post_id in sharded for shard in range(settings.COMMENT_COUNT_SHARDS)),
+                    ignore_conflicts=True,
+                )
+                shards = PostCommentCountShard.objects.select_for_update().filter(post__in=sharded)
+                for shard in shards:
+                    shard_totals[shard.post_id] = shard_totals.get(shard.post_id, 0) + shard.count
+            counts = dict(
+                Comment.objects.filter(postId__in=post_ids).values_list('postId').annotate(total=Count('id'))
+            )
+
+            stale = []
+            drifted = 0
+            for post in posts:
+                actual = counts.get(post.pk, 0)
+                stored = post.comment_count + shard_totals.get(post.pk, 0)
+                drifted += stored != actual
+                if shard_totals.get(post.pk) or stored != actual:
+                    post.comment_count = actual
+                    post.version = new_version()
+                    stale.append(post)
+            Post.objects.bulk_update(stale, ['comment_count', 'version'])
+            if shard_totals:
+                PostCommentCountShard.objects.filter(post__in=list(shard_totals)).delete()
+
+        return drifted
@@ -0,0 +1,50 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def count_comments(apps, schema_editor):
+    """Fill comment_count for the existing posts."""
+    Post = apps.get_model('core', 'Post')
+    Comment = apps.get_model('core', 'Comment')
+    counts = Comment.objects.filter(postId=OuterRef('pk')).values('postId').annotate(
+        total=Count('id'),
+    ).values('total')
+    Post.objects.update(comment_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count_sharded',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(count_comments, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='PostCommentCountShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('post', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='comment_count_shards', to='core.post')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='postcommentcountshard',
+            constraint=models.UniqueConstraint(fields=('post', 'shard'), name='unique_post_comment_count_shard'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:41
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='album',
+            name='version',
+            field=models.BigIntegerField(default=core.models.new_version, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='version',
+            field=models.BigIntegerField(default=core.models.new_version, editable=False),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='version',
+            field=models.BigIntegerField(default=core.models.new_version, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='version',
+            field=models.BigIntegerField(default=core.models.new_version, editable=False),
+        ),
+        migrations.AddField(
+            model_name='todo',
+            name='version',
+            field=models.BigIntegerField(default=core.models.new_version, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='version',
+            field=models.BigIntegerField(default=core.models.new_version, editable=False),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:12
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_geos(apps, schema_editor):
+    """Point addresses at the oldest of equal geo rows and drop the rest."""
+    Geo = apps.get_model('core', 'Geo')
+    Address = apps.get_model('core', 'Address')
+    duplicates = Geo.objects.values('lat', 'lng').annotate(keep=Min('id'), rows=Count('id')).filter(rows__gt=1)
+    for duplicate in duplicates:
+        same = Geo.objects.filter(lat=duplicate['lat'], lng=duplicate['lng']).exclude(id=duplicate['keep'])
+        Address.objects.filter(geo__in=same).update(geo_id=duplicate['keep'])
+        same.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_row_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_geos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='geo',
+            constraint=models.UniqueConstraint(fields=('lat', 'lng'), name='unique_geo_lat_lng'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_intern_company_geo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['completed', 'id'], name='todo_completed_id_idx'),
+        ),
+    ]
@@ -0,0 +1,146 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 2000
+
+
+# Copies of the core.models helpers as of this migration, so later changes
+# to them don't change what it writes.
+def split_url(url):
+    """Split url after its last slash into (prefix, name)."""
+    prefix, slash, name = url.rpartition('/')
+    return prefix + slash, name
+
+
+def compact_urls(url, thumbnail_url):
+    """Return the (url prefix, url name, thumbnail prefix, thumbnail url) stored for two URLs."""
+    url_prefix, url_name = split_url(url)
+    thumbnail_prefix, thumbnail_name = split_url(thumbnail_url)
+    if thumbnail_url and thumbnail_name == url_name:
+        return url_prefix, url_name, thumbnail_prefix, ''
+    return url_prefix, url_name, None, thumbnail_url
+
+
+def expand_urls(url_prefix, url_name, thumbnail_prefix, thumbnail_url):
+    """Return the (url, thumbnail url) stored by compact_urls."""
+    if thumbnail_prefix is None:
+        return url_prefix + url_name, thumbnail_url
+    return url_prefix + url_name, thumbnail_prefix + url_name
+
+
+def photo_batches(Photo):
+    """Yield the photos in batches of BATCH_SIZE, by id."""
+    last_id = 0
+    while True:
+        photos = list(Photo.objects.filter(id__gt=last_id).order_by('id')[:BATCH_SIZE])
+        if not photos:
+            return
+        yield photos
+        last_id = photos[-1].id
+
+
+def compact_photo_urls(apps, schema_editor):
+    """Split the photo URLs into shared prefixes and names."""
+    Photo = apps.get_model('core', 'Photo')
+    UrlPrefix = apps.get_model('core', 'UrlPrefix')
+    for photos in photo_batches(Photo):
+        urls = {photo.id: compact_urls(photo.url, photo.thumbnailUrl) for photo in photos}
+        prefixes = {prefix for url_prefix, name, thumbnail_prefix, thumbnail_url in urls.values()
+                    for prefix in (url_prefix, thumbnail_prefix) if prefix is not None}
+        UrlPrefix.objects.bulk_create((UrlPrefix(prefix=prefix) for prefix in prefixes), ignore_conflicts=True)
+        ids = dict(UrlPrefix.objects.filter(prefix__in=prefixes).values_list('prefix', 'id'))
+        for photo in photos:
+            url_prefix, photo.url_name, thumbnail_prefix, photo.thumbnail_url = urls[photo.id]
+            photo.url_prefix_id = ids[url_prefix]
+            photo.thumbnail_prefix_id = ids.get(thumbnail_prefix)
+        Photo.objects.bulk_update(photos, ['url_prefix', 'url_name', 'thumbnail_prefix', 'thumbnail_url'])
+
+
+def expand_photo_urls(apps, schema_editor):
+    """Join the photo URLs back together."""
+    Photo = apps.get_model('core', 'Photo')
+    UrlPrefix = apps.get_model('core', 'UrlPrefix')
+    prefixes = dict(UrlPrefix.objects.values_list('id', 'prefix'))
+    for photos in photo_batches(Photo):
+        for photo in photos:
+            photo.url, photo.thumbnailUrl = expand_urls(
+                prefixes[photo.url_prefix_id],
+                photo.url_name,
+                prefixes.get(photo.thumbnail_prefix_id),
+                photo.thumbnail_url,
+            )
+        Photo.objects.bulk_update(photos, ['url', 'thumbnailUrl'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_todo_completed_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UrlPrefix',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('prefix', models.CharField(max_length=200, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='url_prefix',
+            field=models.ForeignKey(
+                db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT,
+                related_name='+', to='core.urlprefix',
+            ),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='url_name',
+            field=models.CharField(default='', max_length=200),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='thumbnail_prefix',
+            field=models.ForeignKey(
+                blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT,
+                related_name='+', to='core.urlprefix',
+            ),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='thumbnail_url',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.RunPython(compact_photo_urls, expand_photo_urls),
+        migrations.AlterField(
+            model_name='photo',
+            name='url_prefix',
+            field=models.ForeignKey(
+                db_index=False, on_delete=django.db.models.deletion.PROTECT,
+                related_name='+', to='core.urlprefix',
+            ),
+        ),
+        # Blank, so the columns can be added back empty when migrating backwards.
+        migrations.AlterField(
+            model_name='photo',
+            name='url',
+            field=models.URLField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='photo',
+            name='thumbnailUrl',
+            field=models.URLField(blank=True),
+        ),
+        migrations.RemoveField(
+            model_name='photo',
+            name='url',
+        ),
+        migrations.RemoveField(
+            model_name='photo',
+            name='thumbnailUrl',
+        ),
+    ]
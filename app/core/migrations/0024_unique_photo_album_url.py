@@ -0,0 +1,54 @@
+# Generated by Django 3.2.25 on 2026-10-18 07:26
+
+from django.db import IntegrityError, migrations, models
+from django.db.models import Count
+
+# Duplicate groups listed in the error, the rest are only counted.
+LISTED_DUPLICATES = 20
+
+
+def check_duplicate_photos(apps, schema_editor):
+    """Refuse to add the constraint while an album has the same url twice.
+
+    Which of the duplicates to keep is for the operator to decide, so they
+    are listed instead of deleted.
+    """
+    Photo = apps.get_model('core', 'Photo')
+    UrlPrefix = apps.get_model('core', 'UrlPrefix')
+    duplicates = list(
+        Photo.objects.values('albumId', 'url_prefix', 'url_name').annotate(rows=Count('id'))
+        .filter(rows__gt=1).order_by('albumId', 'url_prefix', 'url_name')
+    )
+    if not duplicates:
+        return
+    prefixes = dict(UrlPrefix.objects.filter(
+        id__in={duplicate['url_prefix'] for duplicate in duplicates[:LISTED_DUPLICATES]},
+    ).values_list('id', 'prefix'))
+    lines = [
+        f"  albumId={duplicate['albumId']} url={prefixes[duplicate['url_prefix']]}{duplicate['url_name']} "
+        f"({duplicate['rows']} photos)"
+        for duplicate in duplicates[:LISTED_DUPLICATES]
+    ]
+    if len(duplicates) > LISTED_DUPLICATES:
+        lines.append(f'  and {len(duplicates) - LISTED_DUPLICATES} more')
+    raise IntegrityError(
+        f'{len(duplicates)} (albumId, url) pairs belong to more than one photo. Delete or change all '
+        f'but one photo of each pair and migrate again:\n' + '\n'.join(lines)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_compact_photo_urls'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_photos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='photo',
+            constraint=models.UniqueConstraint(
+                fields=('albumId', 'url_prefix', 'url_name'), name='unique_photo_album_url',
+            ),
+        ),
+    ]
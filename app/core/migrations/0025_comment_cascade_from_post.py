@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:12
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_unique_photo_album_url'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='postId',
+            field=models.ForeignKey(
+                db_index=False, on_delete=core.models.cascade_from_post,
+                related_name='comments', to='core.post',
+            ),
+        ),
+    ]
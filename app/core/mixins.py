@@ -0,0 +1,187 @@
+"""
+Mixins shared by the API viewsets.
+"""
+from django.conf import settings
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+from core.etags import etag_matches, make_etag, not_modified, stamp_of
+from core.streaming import is_stream_requested, streaming_json_response
+
+
+class ListActionMixin:
+    """Render list endpoints, custom list actions and retrieve the same way.
+
+    Serializers that declare ``version_fields`` get strong ETags built from
+    those columns of the rendered rows, and a matching ``If-None-Match`` is
+    answered with ``304`` before the objects are loaded or serialized.
+    """
+    # Allow ``?stream=1`` to dump the whole queryset as a streamed JSON array.
+    allow_streaming = False
+    stream_chunk_size = 2000
+    # ValuesSerializer classes used instead of their model serializer.
+    values_serializers = ()
+
+    def list(self, request, *args, **kwargs):
+        """List the objects of the viewset, one page at a time."""
+        return self.list_response(self.filter_queryset(self.get_queryset()), expand=True)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve one object, unless the client's copy is current."""
+        instance = self.get_object()
+        etag = None
+        version_fields = getattr(self.get_serializer_class(), 'version_fields', None)
+        if version_fields:
+            etag = make_etag(request, stamp_of(instance, version_fields))
+            if etag_matches(request, etag):
+                return not_modified(etag)
+        self.expand_objects([instance])
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data, headers={'ETag': etag} if etag else None)
+
+    def list_response(self, queryset, serializer_class=None, expand=False):
+        """Paginate the queryset and serialize the page."""
+        serializer_class = serializer_class or self.get_serializer_class()
+        streaming = self.allow_streaming and is_stream_requested(self.request)
+        version_fields = None if streaming else getattr(serializer_class, 'version_fields', None)
+        etag = None
+        if version_fields and 'HTTP_IF_NONE_MATCH' in self.request.META:
+            etag = self.get_list_etag(queryset, version_fields)
+            if etag_matches(self.request, etag):
+                return not_modified(etag)
+        values_serializer = self.get_values_serializer(serializer_class)
+        if values_serializer is not None:
+            queryset = values_serializer.get_queryset(queryset)
+            serializer_class = values_serializer
+        if streaming:
+            serializer = serializer_class(context=self.get_serializer_context())
+            return streaming_json_response(queryset, serializer, self.stream_chunk_size)
+        page = self.paginate_queryset(queryset)
+        if expand:
+            self.expand_objects(page)
+        if version_fields and etag is None:
+            etag = self.make_page_etag(page, version_fields, self.paginator, queryset)
+        serializer = serializer_class(page, many=True, context=self.get_serializer_context())
+        response = self.get_paginated_response(serializer.data)
+        if etag is not None:
+            response['ETag'] = etag
+        return response
+
+    def get_list_etag(self, queryset, version_fields):
+        """Return the ETag of the page the request asks for.
+
+        Only the version columns of the page are read, through a separate
+        paginator, so a match costs one narrow query and a miss still
+        loads the page as usual.
+        """
+        stamps = queryset.values_list(*version_fields, named=True)
+        paginator = self.pagination_class() if self.pagination_class else None
+        page = paginator.paginate_queryset(stamps, self.request, view=self) if paginator else None
+        return self.make_page_etag(page, version_fields, paginator, stamps)
+
+    def make_page_etag(self, page, version_fields, paginator, queryset=None):
+        """Build the ETag of a page from the stamps of its rows."""
+        if page is None:
+            # Pagination is off; the response is the whole queryset.
+            page = queryset
+        rows = [stamp_of(row, version_fields) for row in page]
+        # Whether a next page exists shows in the Link header.
+        return make_etag(self.request, (rows, getattr(paginator, 'has_next', None)))
+
+    def get_values_serializer(self, serializer_class):
+        """Return the fast read serializer standing in for serializer_class."""
+        for values_serializer in self.values_serializers:
+            if values_serializer.model_serializer is serializer_class:
+                return values_serializer
+        return None
+
+    def expand_objects(self, objects):
+        """Hook to load related objects for a page before it is serialized."""
+
+
+class QueryParamFilterMixin:
+    """Narrow listings by query parameters.
+
+    ``filter_params`` maps each parameter to the model field it filters
+    and a serializer field validating its value; invalid values are a 400
+    keyed by the parameter. Only the ``filter_actions`` are filtered.
+    """
+    filter_params = {}
+    filter_actions = ('list',)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in self.filter_actions:
+            return queryset
+        for param, (field_name, field) in self.get_filter_params().items():
+            if param not in self.request.query_params:
+                continue
+            try:
+                value = field.run_validation(self.request.query_params[param])
+            except serializers.ValidationError as exc:
+                raise serializers.ValidationError({param: exc.detail})
+            queryset = queryset.filter(**{field_name: value})
+        return queryset
+
+    def get_filter_params(self):
+        """Return the filter_params applying to the current action."""
+        return self.filter_params
+
+
+class BulkCreateMixin:
+    """Accept a JSON array on create and insert the objects in batches."""
+    bulk_create_max_items = None
+
+    def create(self, request, *args, **kwargs):
+        """Create one object, or many when the body is a list."""
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+
+        max_items = self.bulk_create_max_items or settings.BULK_CREATE_MAX_ITEMS
+        if len(request.data) > max_items:
+            return Response(
+                {"detail": f"A bulk request may contain at most {max_items} items."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class ExpandMixin:
+    """Nest related objects into list and retrieve responses on ``?expand=``.
+
+    ``expansions`` maps each expandable name to the serializer used when it
+    is requested. For every name the viewset defines ``expand_<name>``,
+    which loads the related objects of a whole page in one query.
+    ``<name>_limit`` caps how many are nested per object.
+    """
+    expansions = {}
+    expand_limit_default = 5
+    expand_limit_max = 50
+
+    def get_expand(self):
+        """Return the requested expansions this viewset supports."""
+        if self.action not in ('list', 'retrieve') or is_stream_requested(self.request):
+            return []
+        requested = self.request.query_params.get('expand', '').split(',')
+        return [name for name in self.expansions if name in requested]
+
+    def get_expand_limit(self, name):
+        """Return how many related objects to nest for the expansion."""
+        try:
+            limit = int(self.request.query_params[f'{name}_limit'])
+        except (KeyError, ValueError):
+            return self.expand_limit_default
+        return max(0, min(limit, self.expand_limit_max))
+
+    def get_serializer_class(self):
+        expand = self.get_expand()
+        if expand:
+            return self.expansions[expand[0]]
+        return super().get_serializer_class()
+
+    def expand_objects(self, objects):
+        for name in self.get_expand():
+            getattr(self, f'expand_{name}')(objects, self.get_expand_limit(name))
@@ -2,7 +2,12 @@
 Database models
 """
 
-from django.db import models
+import random
+from decimal import Decimal
+from functools import partial
+
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import F, Func, OuterRef, Subquery, Sum
 from django.conf import settings
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -10,6 +15,37 @@ from django.contrib.auth.models import (
     PermissionsMixin,
 )
 
+from core.lru import LRUCache
+
+
+def new_version():
+    """Return a fresh version stamp for a row being written."""
+    return random.getrandbits(63)
+
+
+class VersionedModel(models.Model):
+    """Model whose rows get a new version stamp every time they are saved.
+
+    The API builds ETags from the stamps instead of hashing rendered
+    bodies. Stamps are random rather than counters, so concurrent writes
+    never end up with the same stamp for different content.
+    """
+    version = models.BigIntegerField(default=new_version, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.version = new_version()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+
+
+def count_rows(queryset):
+    """Return an expression for the number of rows of a correlated queryset."""
+    return Subquery(queryset.order_by().annotate(count=Func(F('pk'), function='COUNT')).values('count'))
+
 
 class UserManager(BaseUserManager):
     """ Manager for users."""
@@ -24,6 +60,22 @@ class UserManager(BaseUserManager):
 
         return user
 
+    def with_activity_counts(self):
+        """Annotate users with how many posts, comments, albums, photos and to-dos they have.
+
+        Every count is a subquery on an index of the user's rows, so all of
+        them come back with the user in one query.
+        """
+        user = OuterRef('pk')
+        return self.annotate(
+            post_count=count_rows(Post.objects.filter(user=user)),
+            comment_count=count_rows(Comment.objects.filter(user=user)),
+            album_count=count_rows(Album.objects.filter(user=user)),
+            photo_count=count_rows(Photo.objects.filter(albumId__user=user)),
+            todo_count=count_rows(ToDo.objects.filter(user=user)),
+            completed_todo_count=count_rows(ToDo.objects.filter(user=user, completed=True)),
+        )
+
     def create_superuser(self, email, password):
         """ Create and return a new superuser."""
         user = self.create_user(email, password)
@@ -34,18 +86,103 @@ class UserManager(BaseUserManager):
         return user
 
 
+class InterningManager(models.Manager):
+    """Manager sharing one row between all users of equal values.
+
+    ``intern_many`` resolves values to rows, inserting the missing ones
+    with ON CONFLICT DO NOTHING so concurrent callers end up with the same
+    row. Resolved ids are kept in a bounded per-process cache; subclasses
+    define the ``fields`` that make up a row's value.
+    """
+    fields = ()
+
+    def __init__(self):
+        super().__init__()
+        self.ids = LRUCache(settings.INTERN_CACHE_SIZE, settings.INTERN_CACHE_TIMEOUT)
+
+    def normalize(self, value):
+        """Return value as the tuple stored in the row."""
+        return tuple(value)
+
+    def _instance(self, pk, value):
+        instance = self.model(pk=pk, **dict(zip(self.fields, value)))
+        instance._state.adding = False
+        instance._state.db = self.db
+        return instance
+
+    def _lookup(self, values):
+        lookup = {f'{field}__in': {value[i] for value in values} for i, field in enumerate(self.fields)}
+        rows = self.filter(**lookup).values_list('pk', *self.fields)
+        return {tuple(value): pk for pk, *value in rows if tuple(value) in values}
+
+    def _remember(self, ids):
+        for value, pk in ids.items():
+            self.ids.set(value, pk)
+
+    def intern_many(self, values):
+        """Return a dict mapping each value to its row, creating missing rows."""
+        values = {self.normalize(value) for value in values}
+        ids = {}
+        for value in values:
+            pk = self.ids.get(value)
+            if pk is not None:
+                ids[value] = pk
+        missing = values - set(ids)
+        if missing:
+            found = self._lookup(missing)
+            if len(found) < len(missing):
+                self.bulk_create(
+                    [self.model(**dict(zip(self.fields, value))) for value in missing - set(found)],
+                    ignore_conflicts=True,
+                )
+                found.update(self._lookup(missing - set(found)))
+            # Rows inserted by a transaction that rolls back must not be cached.
+            transaction.on_commit(partial(self._remember, found), using=self.db)
+            ids.update(found)
+        return {value: self._instance(pk, value) for value, pk in ids.items()}
+
+    def intern(self, *value):
+        """Return the row for value, creating it if needed."""
+        value = self.normalize(value)
+        return self.intern_many([value])[value]
+
+
+class CompanyManager(InterningManager):
+    """Manager resolving company names to shared rows."""
+    fields = ('name',)
+
+
 class Company(models.Model):
     """Company information."""
     name = models.CharField(max_length=255, unique=True)
 
+    objects = CompanyManager()
+
     def __str__(self):
         return self.name
 
 
+class GeoManager(InterningManager):
+    """Manager resolving coordinates to shared rows."""
+    fields = ('lat', 'lng')
+
+    def normalize(self, value):
+        # Match the stored precision so 1.5 and '1.500000000' are one row.
+        places = Decimal(1).scaleb(-9)
+        return tuple(Decimal(str(coordinate)).quantize(places) for coordinate in value)
+
+
 class Geo(models.Model):
     lat = models.DecimalField(max_digits=12, decimal_places=9, blank=True)
     lng = models.DecimalField(max_digits=12, decimal_places=9, blank=True)
 
+    objects = GeoManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['lat', 'lng'], name='unique_geo_lat_lng'),
+        ]
+
     def __str__(self):
         return f"({self.lat}, {self.lng})"
 
@@ -62,7 +199,7 @@ class Address(models.Model):
         return f"{self.street}, {self.city}"
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(VersionedModel, AbstractBaseUser, PermissionsMixin):
     """ User in the system."""
     email = models.EmailField(max_length=255, unique=True)
     username = models.CharField(max_length=255)  # username alanı eklendi
@@ -81,23 +218,130 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
-
-class Post(models.Model):
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the fields embedded in comments to notice changes.
+        instance._loaded_contact = (instance.__dict__.get('name'), instance.__dict__.get('email'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_contact = (self.__dict__.get('name'), self.__dict__.get('email'))
+
+
+class PostManager(models.Manager):
+    """Manager for posts."""
+
+    def adjust_comment_count(self, post_id, delta):
+        """Atomically add delta to the comment count of a post.
+
+        Posts with sharded counters spread the update over a random shard
+        row so concurrent comments don't queue on the post's row lock.
+        """
+        updated = self.filter(pk=post_id, comment_count_sharded=False).update(
+            comment_count=F('comment_count') + delta,
+            version=new_version(),
+        )
+        if updated:
+            return
+        if not self.filter(pk=post_id, comment_count_sharded=True).exists():
+            return
+        shard = random.randrange(settings.COMMENT_COUNT_SHARDS)
+        shards = PostCommentCountShard.objects.filter(post_id=post_id, shard=shard)
+        if shards.update(count=F('count') + delta):
+            return
+        try:
+            with transaction.atomic():
+                PostCommentCountShard.objects.create(post_id=post_id, shard=shard, count=delta)
+        except IntegrityError:
+            # Another comment created the shard first, or the post is gone.
+            shards.update(count=F('count') + delta)
+
+
+class Post(VersionedModel):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,  # Kullanıcı modeliyle ilişki
         on_delete=models.CASCADE,
-        related_name='posts'
+        related_name='posts',
+        db_index=False,  # Covered by the (user, id) index.
     )
     title = models.CharField(max_length=255)
     body = models.TextField()
+    comment_count = models.IntegerField(default=0)
+    # Hot posts keep their count in PostCommentCountShard rows instead.
+    comment_count_sharded = models.BooleanField(default=False)
+
+    objects = PostManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='post_user_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def total_comment_count(self):
+        """Comment count including any sharded counters."""
+        if not self.comment_count_sharded:
+            return self.comment_count
+        shard_total = getattr(self, 'shard_comment_count', None)
+        if shard_total is None:
+            shard_total = self.comment_count_shards.aggregate(total=Sum('count'))['total']
+        return self.comment_count + (shard_total or 0)
+
+
+class PostCommentCountShard(models.Model):
+    """One slice of the comment count of a post with sharded counters."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='comment_count_shards',
+        db_index=False,  # Covered by the unique (post, shard) constraint.
+    )
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'shard'], name='unique_post_comment_count_shard'),
+        ]
+
+
+class CommentManager(models.Manager):
+    """Manager for comments."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Create comments in bulk; bulk_create itself sends no post_save."""
+        from core.signals import comments_bulk_created
+
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            comments_bulk_created.send(sender=self.model, objs=objs)
+        return objs
+
 
 # Comment Model
-class Comment(models.Model):
-    postId = models.ForeignKey(Post, related_name="comments", on_delete=models.CASCADE)
+def cascade_from_post(collector, field, sub_objs, using):
+    """CASCADE that flags the comments as deleted along with their post.
+
+    Their delete handlers then leave the counts of the post alone. The flag
+    lives on the instances, so nothing outlasts a delete that fails.
+    """
+    for comment in sub_objs:
+        comment._deleted_with_post = True
+    models.CASCADE(collector, field, sub_objs, using)
+
+
+class Comment(VersionedModel):
+    postId = models.ForeignKey(
+        Post,
+        related_name="comments",
+        on_delete=cascade_from_post,
+        db_index=False,  # Covered by the (postId, id) index.
+    )
     user = models.ForeignKey(
         'User',
         null=True,
@@ -107,9 +351,29 @@ class Comment(models.Model):
     )
     body = models.TextField()
 
+    objects = CommentManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['postId', 'id'], name='comment_post_id_idx'),
+        ]
+
     def __str__(self):
         return f"Comment on {self.postId.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the post the comment was loaded with to notice moves.
+        instance._loaded_post_id = instance.__dict__.get('postId_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The post_save count update commits together with the row.
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+        self._loaded_post_id = self.__dict__.get('postId_id')
+
     @property
     def name(self):
         """Get the name of the user who commented."""
@@ -121,20 +385,200 @@ class Comment(models.Model):
         return self.user.email if self.user else None
 
 
-class Album(models.Model):
+class Album(VersionedModel):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,  # Kullanıcı modeliyle ilişki
         on_delete=models.CASCADE,
-        related_name='albums'
+        related_name='albums',
+        db_index=False,  # Covered by the (user, id) index.
     )
     title = models.CharField(max_length=255, unique=True, blank=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='album_user_id_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
 
-class Photo(models.Model):
-    albumId = models.ForeignKey(Album, related_name="photos", on_delete=models.CASCADE)
+def split_url(url):
+    """Split url after its last slash into (prefix, name)."""
+    prefix, slash, name = url.rpartition('/')
+    return prefix + slash, name
+
+
+def compact_urls(url, thumbnail_url):
+    """Return the (url prefix, url name, thumbnail prefix, thumbnail url) stored for two URLs.
+
+    A thumbnail ending in the same name as the URL is stored as just its
+    prefix; any other thumbnail is kept whole, with no prefix.
+    """
+    url_prefix, url_name = split_url(url)
+    thumbnail_prefix, thumbnail_name = split_url(thumbnail_url)
+    if thumbnail_url and thumbnail_name == url_name:
+        return url_prefix, url_name, thumbnail_prefix, ''
+    return url_prefix, url_name, None, thumbnail_url
+
+
+def expand_thumbnail_url(url_name, thumbnail_prefix, thumbnail_url):
+    """Return the thumbnail url stored by compact_urls; it doesn't need the url's prefix."""
+    if thumbnail_prefix is None:
+        return thumbnail_url
+    return thumbnail_prefix + url_name
+
+
+def expand_urls(url_prefix, url_name, thumbnail_prefix, thumbnail_url):
+    """Return the (url, thumbnail url) stored by compact_urls."""
+    return url_prefix + url_name, expand_thumbnail_url(url_name, thumbnail_prefix, thumbnail_url)
+
+
+class UrlPrefixManager(InterningManager):
+    """Manager resolving URL prefixes to shared rows."""
+    fields = ('prefix',)
+
+
+class UrlPrefix(models.Model):
+    """Start of photo URLs, stored once for all photos sharing it."""
+    # Four byte keys keep the two references on every photo row small.
+    id = models.AutoField(primary_key=True)
+    prefix = models.CharField(max_length=200, unique=True)
+
+    objects = UrlPrefixManager()
+
+    def __str__(self):
+        return self.prefix
+
+
+class PhotoManager(models.Manager):
+    """Manager for photos."""
+
+    def resolve_urls(self, photos):
+        """Store the URLs assigned to photos as prefix rows and names.
+
+        All prefixes are looked up or created together, so a batch of
+        photos costs a query or two however many there are.
+        """
+        pending = [(photo, compact_urls(*photo._new_urls)) for photo in photos if '_new_urls' in photo.__dict__]
+        if not pending:
+            return
+        prefixes = UrlPrefix.objects.intern_many(
+            (prefix,) for photo, urls in pending for prefix in (urls[0], urls[2]) if prefix is not None
+        )
+        for photo, (url_prefix, url_name, thumbnail_prefix, thumbnail_url) in pending:
+            photo.url_prefix = prefixes[(url_prefix,)]
+            photo.url_name = url_name
+            photo.thumbnail_prefix = None if thumbnail_prefix is None else prefixes[(thumbnail_prefix,)]
+            photo.thumbnail_url = thumbnail_url
+            del photo._new_urls
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Create photos in bulk, resolving all their URL prefixes at once."""
+        objs = list(objs)
+        self.resolve_urls(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def existing_urls(self, keys):
+        """Return the (album id, url) of keys that photos have, mapped to the photo ids."""
+        keys = set(keys)
+        if not keys:
+            return {}
+        names = {split_url(url)[1] for album_id, url in keys}
+        rows = self.filter(
+            albumId__in={album_id for album_id, url in keys}, url_name__in=names,
+        ).values_list('albumId_id', 'url_prefix__prefix', 'url_name', 'id')
+        return {(album_id, prefix + name): pk for album_id, prefix, name, pk in rows if (album_id, prefix + name) in keys}
+
+    def upsert(self, photos, batch_size=1000):
+        """Insert photos, or update the photo with the same album and url.
+
+        Title and thumbnail of a matched photo are overwritten; its owner is
+        kept. Photos equal to the stored one are not written at all. Later
+        photos win over earlier ones with the same key. Returns how many
+        photos were inserted, updated and unchanged.
+        """
+        unique = {}
+        for photo in photos:
+            unique[(photo.albumId_id, photo.url)] = photo
+        photos = list(unique.values())
+        self.resolve_urls(photos)
+        upsert_batch = self._upsert_batch if connection.vendor == 'postgresql' else self._upsert_batch_orm
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        with transaction.atomic():
+            for start in range(0, len(photos), batch_size):
+                inserted, updated = upsert_batch(photos[start:start + batch_size])
+                counts['inserted'] += inserted
+                counts['updated'] += updated
+        counts['unchanged'] = len(photos) - counts['inserted'] - counts['updated']
+        return counts
+
+    def _upsert_batch(self, photos):
+        """Upsert photos with one INSERT ... ON CONFLICT DO UPDATE.
+
+        The update only applies to rows whose values differ, and RETURNING
+        yields just the written rows; xmax is 0 for the inserted ones.
+        """
+        meta = self.model._meta
+        quote_name = connection.ops.quote_name
+        fields = [field for field in meta.concrete_fields if not field.primary_key]
+        updated_fields = [meta.get_field(name) for name in ('title', 'thumbnail_prefix', 'thumbnail_url')]
+        key = ', '.join(quote_name(meta.get_field(name).column) for name in ('albumId', 'url_prefix', 'url_name'))
+        row = '(' + ', '.join(['%s'] * len(fields)) + ')'
+        params = []
+        for photo in photos:
+            photo.version = new_version()
+            params += [field.get_db_prep_save(getattr(photo, field.attname), connection) for field in fields]
+        table = quote_name(meta.db_table)
+        columns = ', '.join(quote_name(field.column) for field in fields)
+        assignments = ', '.join(
+            f'{quote_name(field.column)} = EXCLUDED.{quote_name(field.column)}'
+            for field in updated_fields + [meta.get_field('version')]
+        )
+        stored = ', '.join(f'{table}.{quote_name(field.column)}' for field in updated_fields)
+        sent = ', '.join(f'EXCLUDED.{quote_name(field.column)}' for field in updated_fields)
+        sql = (
+            f'INSERT INTO {table} ({columns}) VALUES {", ".join([row] * len(photos))} '
+            f'ON CONFLICT ({key}) DO UPDATE SET {assignments} '
+            f'WHERE ({stored}) IS DISTINCT FROM ({sent}) '
+            f'RETURNING xmax = 0'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            written = [inserted for inserted, in cursor.fetchall()]
+        inserted = sum(written)
+        return inserted, len(written) - inserted
+
+    def _upsert_batch_orm(self, photos):
+        """Upsert photos by reading the matching rows first, for other backends."""
+        stored = {
+            (row[0], row[1], row[2]): row[3:]
+            for row in self.filter(
+                albumId__in={photo.albumId_id for photo in photos},
+                url_name__in={photo.url_name for photo in photos},
+            ).values_list('albumId_id', 'url_prefix_id', 'url_name', 'id', 'title', 'thumbnail_prefix_id', 'thumbnail_url')
+        }
+        new, changed = [], []
+        for photo in photos:
+            row = stored.get((photo.albumId_id, photo.url_prefix_id, photo.url_name))
+            if row is None:
+                new.append(photo)
+            elif row[1:] != (photo.title, photo.thumbnail_prefix_id, photo.thumbnail_url):
+                photo.id = row[0]
+                photo.version = new_version()
+                changed.append(photo)
+        super().bulk_create(new)
+        self.bulk_update(changed, ['title', 'thumbnail_prefix', 'thumbnail_url', 'version'])
+        return len(new), len(changed)
+
+
+class Photo(VersionedModel):
+    albumId = models.ForeignKey(
+        Album,
+        related_name="photos",
+        on_delete=models.CASCADE,
+        db_index=False,  # Covered by the (albumId, id) index.
+    )
     user = models.ForeignKey(
         'User',
         null=True,
@@ -143,26 +587,101 @@ class Photo(models.Model):
         related_name='user_photos',
     )
     title = models.CharField(max_length=255)
-    url = models.URLField()
-    thumbnailUrl = models.URLField()
+    # url and thumbnailUrl are stored split, see compact_urls().
+    url_prefix = models.ForeignKey(UrlPrefix, on_delete=models.PROTECT, related_name='+', db_index=False)
+    url_name = models.CharField(max_length=200)
+    thumbnail_prefix = models.ForeignKey(
+        UrlPrefix,
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name='+',
+        db_index=False,
+    )
+    thumbnail_url = models.CharField(max_length=200, blank=True)
+
+    objects = PhotoManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['albumId', 'id'], name='photo_album_id_idx'),
+        ]
+        constraints = [
+            # A url appears once per album; photo upserts match on it.
+            models.UniqueConstraint(fields=['albumId', 'url_prefix', 'url_name'], name='unique_photo_album_url'),
+        ]
 
     def __str__(self):
         return f"Album on {self.albumId.title}"
 
+    def set_urls(self, url=None, thumbnail_url=None):
+        """Change the photo's URLs; they are split when the photo is saved."""
+        new_urls = [self.url, self.thumbnailUrl]
+        if url is not None:
+            new_urls[0] = url
+        if thumbnail_url is not None:
+            new_urls[1] = thumbnail_url
+        self._new_urls = new_urls
+
+    @property
+    def url(self):
+        if '_new_urls' in self.__dict__:
+            return self._new_urls[0]
+        if self.url_prefix_id is None:
+            return ''
+        return self.url_prefix.prefix + self.url_name
+
+    @url.setter
+    def url(self, value):
+        self.set_urls(url=value)
+
+    @property
+    def thumbnailUrl(self):
+        if '_new_urls' in self.__dict__:
+            return self._new_urls[1]
+        # Only the thumbnail's own prefix is loaded, for gallery listings.
+        thumbnail_prefix = self.thumbnail_prefix.prefix if self.thumbnail_prefix_id is not None else None
+        return expand_thumbnail_url(self.url_name, thumbnail_prefix, self.thumbnail_url)
+
+    @thumbnailUrl.setter
+    def thumbnailUrl(self, value):
+        self.set_urls(thumbnail_url=value)
+
+    def refresh_from_db(self, *args, **kwargs):
+        self.__dict__.pop('_new_urls', None)
+        super().refresh_from_db(*args, **kwargs)
+
+    def save(self, *args, **kwargs):
+        Photo.objects.resolve_urls([self])
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'url', 'thumbnailUrl'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) - {'url', 'thumbnailUrl'} | {
+                'url_prefix', 'url_name', 'thumbnail_prefix', 'thumbnail_url',
+            }
+        super().save(*args, **kwargs)
+
     @property
     def email(self):
         """Get the email of the user who Photo."""
         return self.user.email if self.user else None
 
 
-class ToDo(models.Model):
+class ToDo(VersionedModel):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,  # Kullanıcı modeliyle ilişki
         on_delete=models.CASCADE,
-        related_name='todo'
+        related_name='todo',
+        db_index=False,  # Covered by the (user, completed, id) index.
     )
     title = models.CharField(max_length=255)
     completed = models.BooleanField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='todo_user_id_idx'),
+            models.Index(fields=['user', 'completed', 'id'], name='todo_user_completed_id_idx'),
+            models.Index(fields=['completed', 'id'], name='todo_completed_id_idx'),
+        ]
+
     def __str__(self):
         return self.title
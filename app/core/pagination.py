@@ -0,0 +1,39 @@
+"""
+Pagination for the API.
+"""
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class IdCursorPagination(CursorPagination):
+    """Keyset pagination over the primary key.
+
+    Pages stay a plain JSON array so responses keep the JSONPlaceholder
+    shape; the opaque cursors for the neighbouring pages are sent in the
+    ``Link`` header.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    # Cursors only carry an offset when stepping back over a page boundary,
+    # never let a crafted cursor turn into a deep OFFSET scan.
+    offset_cutoff = max_page_size
+
+    def get_paginated_response(self, data):
+        links = []
+        next_link = self.get_next_link()
+        if next_link:
+            links.append(f'<{next_link}>; rel="next"')
+        previous_link = self.get_previous_link()
+        if previous_link:
+            links.append(f'<{previous_link}>; rel="prev"')
+        headers = {'Link': ', '.join(links)} if links else None
+        return Response(data, headers=headers)
+
+    def get_paginated_response_schema(self, schema):
+        return schema
+
+
+class UserIdCursorPagination(IdCursorPagination):
+    """Keyset pagination over rows grouped by user, such as per-user statistics."""
+    ordering = 'user_id'
@@ -0,0 +1,26 @@
+"""
+Reusable query building blocks.
+"""
+from django.db.models import F, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+
+
+def limit_per_group(queryset, group_field, limit, order_by='id'):
+    """Keep only the first ``limit`` rows of each group of the queryset.
+
+    Rows are ranked with ``ROW_NUMBER() OVER (PARTITION BY group_field)``
+    in a subquery, so one query returns the top rows of every group. The
+    queryset should already be filtered down to the wanted groups.
+    """
+    ranked = queryset.annotate(group_rank=Window(
+        expression=RowNumber(),
+        partition_by=[F(group_field)],
+        order_by=F(order_by).asc(),
+    )).order_by().values('pk', 'group_rank')
+    sql, params = ranked.query.sql_with_params()
+    pk_column = queryset.model._meta.pk.column
+    return queryset.model._default_manager.filter(pk__in=RawSQL(
+        f'SELECT ranked.{pk_column} FROM ({sql}) ranked WHERE ranked.group_rank <= %s',
+        (*params, limit),
+    )).order_by(order_by)
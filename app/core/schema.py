@@ -0,0 +1,17 @@
+"""
+OpenAPI schema extensions for the custom API classes.
+"""
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+
+
+class SignedAccessTokenScheme(OpenApiAuthenticationExtension):
+    """Describe signed access tokens as an HTTP Bearer scheme."""
+    target_class = 'core.authentication.SignedAccessTokenAuthentication'
+    name = 'accessTokenAuth'
+
+    def get_security_definition(self, auto_schema):
+        return {
+            'type': 'http',
+            'scheme': 'bearer',
+            'description': 'Access token from the token endpoint, sent as `Authorization: Bearer <access>`.',
+        }
@@ -0,0 +1,87 @@
+"""
+Serializer helpers shared by the API apps.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from rest_framework import serializers
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field that can resolve from objects loaded in bulk."""
+
+    def to_internal_value(self, data):
+        preloaded = getattr(self, 'preloaded', None)
+        if preloaded is not None and self.pk_field is None and not isinstance(data, bool):
+            instance = preloaded.get(str(data))
+            if instance is not None:
+                return instance
+        return super().to_internal_value(data)
+
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    """List serializer that validates and inserts many objects at once."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self._preload_related(data)
+        return super().to_internal_value(data)
+
+    def _preload_related(self, data):
+        """Fetch every referenced object in one query per relation."""
+        for name, field in self.child.fields.items():
+            if field.read_only or not isinstance(field, BulkPrimaryKeyRelatedField):
+                continue
+            pks = set()
+            for item in data:
+                value = item.get(field.source) if isinstance(item, dict) else None
+                if isinstance(value, (int, str)) and str(value).isdigit():
+                    pks.add(int(value))
+            objects = field.get_queryset().in_bulk(pks) if pks else {}
+            field.preloaded = {str(pk): obj for pk, obj in objects.items()}
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        objects = [model(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            return model._default_manager.bulk_create(
+                objects, batch_size=settings.BULK_CREATE_BATCH_SIZE,
+            )
+
+
+class ValuesSerializer:
+    """Read-only serializer building representations from ``values_list()`` rows.
+
+    Skips model instantiation and per-field dispatch on hot list endpoints.
+    Subclasses name the ``model_serializer`` they stand in for, the
+    ``values`` to select and a ``to_representation`` that must produce the
+    same output as that serializer.
+    """
+    model_serializer = None
+    values = ()
+
+    def __init__(self, instance=None, many=False, context=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @classmethod
+    def get_queryset(cls, queryset):
+        """Return the queryset selecting just the needed columns.
+
+        The ``version_fields`` of the model serializer come along so the
+        page's ETag can be built from the same rows.
+        """
+        version_fields = getattr(cls.model_serializer, 'version_fields', ())
+        values = cls.values + tuple(field for field in version_fields if field not in cls.values)
+        return queryset.values_list(*values, named=True)
+
+    @property
+    def data(self):
+        if self.many:
+            to_representation = self.to_representation
+            return [to_representation(row) for row in self.instance]
+        return self.to_representation(self.instance)
+
+    def to_representation(self, row):
+        raise NotImplementedError
@@ -0,0 +1,86 @@
+"""
+Signal handlers keeping denormalized and cached data in sync.
+"""
+from collections import Counter
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from rest_framework.authtoken.models import Token
+
+from core.authentication import invalidate_tokens, invalidate_user, invalidate_user_tokens
+from core.models import Comment, Company, Geo, Post, UrlPrefix, User
+
+# Sent by Comment.objects.bulk_create with the created comments as ``objs``.
+comments_bulk_created = Signal()
+
+
+def is_deleted_with_post(comment):
+    """Return True if the comment is removed by its post's cascade."""
+    return getattr(comment, '_deleted_with_post', False)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    """Increment the comment count of the post a comment was added or moved to."""
+    if raw:
+        return
+    if created:
+        Post.objects.adjust_comment_count(instance.postId_id, 1)
+        return
+    loaded_post_id = getattr(instance, '_loaded_post_id', None)
+    if loaded_post_id is not None and loaded_post_id != instance.postId_id:
+        Post.objects.adjust_comment_count(loaded_post_id, -1)
+        Post.objects.adjust_comment_count(instance.postId_id, 1)
+
+
+@receiver(comments_bulk_created, sender=Comment)
+def count_bulk_created_comments(sender, objs, **kwargs):
+    """Add bulk created comments to their posts, one update per post."""
+    for post_id, count in Counter(obj.postId_id for obj in objs).items():
+        Post.objects.adjust_comment_count(post_id, count)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    """Decrement the comment count of the post a comment was removed from."""
+    if is_deleted_with_post(instance):
+        return
+    Post.objects.adjust_comment_count(instance.postId_id, -1)
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """Stop accepting a revoked token from the authentication cache."""
+    # After the commit, so a request in between can't cache the token again.
+    transaction.on_commit(partial(invalidate_tokens, instance.key))
+
+
+@receiver(post_save, sender=User)
+def forget_changed_user_tokens(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Drop cached tokens of a changed or deactivated user."""
+    if created or raw:
+        return
+    if update_fields is not None and update_fields <= {'last_login', 'version'}:
+        # Logging in changes nothing the cached tokens depend on.
+        return
+    transaction.on_commit(partial(invalidate_user_tokens, instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user(sender, instance, **kwargs):
+    """Stop accepting access tokens of a deleted user."""
+    transaction.on_commit(partial(invalidate_user, instance.pk))
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Geo)
+@receiver(post_save, sender=UrlPrefix)
+@receiver(post_delete, sender=Company)
+@receiver(post_delete, sender=Geo)
+@receiver(post_delete, sender=UrlPrefix)
+def forget_interned_rows(sender, instance, created=False, **kwargs):
+    """Drop cached ids once an interned row is changed or deleted."""
+    if not created:
+        sender.objects.ids.clear()
@@ -0,0 +1,42 @@
+"""
+Streaming JSON responses for full table dumps.
+"""
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def iter_json_array(queryset, serializer, chunk_size=2000, buffer_size=65536):
+    """Yield the queryset as a JSON array, serializing one row at a time.
+
+    Rows are read with a server-side cursor in chunks of ``chunk_size`` and
+    the encoded output is flushed every ``buffer_size`` characters, so
+    memory use does not grow with the number of rows.
+    """
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    buffer = ['[']
+    buffered = 1
+    separator = ''
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        chunk = separator + encoder.encode(serializer.to_representation(instance))
+        separator = ','
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= buffer_size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            buffered = 0
+    buffer.append(']')
+    yield ''.join(buffer).encode('utf-8')
+
+
+def streaming_json_response(queryset, serializer, chunk_size=2000):
+    """Return a response streaming the whole queryset ordered by id."""
+    return StreamingHttpResponse(
+        iter_json_array(queryset.order_by('id'), serializer, chunk_size=chunk_size),
+        content_type='application/json',
+    )
+
+
+def is_stream_requested(request):
+    """Return True if the client asked for a streamed dump."""
+    return request.query_params.get('stream', '').lower() in ('1', 'true', 'yes')
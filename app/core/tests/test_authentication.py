@@ -0,0 +1,252 @@
+"""
+Tests for the API authentication classes.
+"""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from core.authentication import (
+    LazyUser, _shared_key, clear_token_cache, get_cached_token, issue_access_token,
+)
+from core.lru import LRUCache
+from core.models import Post, ToDo
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test token lookups are cached and revoked on changes."""
+
+    def setUp(self):
+        cache.clear()
+        clear_token_cache()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.todo = ToDo.objects.create(user=self.user, title='To-do', completed=False)
+        self.url = f'/api/todo/{self.todo.id}/'
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_lookup_is_cached(self):
+        """Test only the first request looks the token up."""
+        with self.assertNumQueries(2):
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_invalid_token_rejected(self):
+        """Test unknown tokens are still rejected."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected(self):
+        """Test a revoked token stops working right away."""
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating a user drops the cached token."""
+        self.client.get(self.url)
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_rejected(self):
+        """Test deleting a user drops the cached token."""
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+
+        res = self.client.get(f'/api/todo/{self.user.id}/user_todos/')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_AUTH_SHARED_CACHE='default')
+    def test_shared_cache(self):
+        """Test a process with a cold local cache reads the shared one."""
+        self.client.get(self.url)
+        clear_token_cache()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        clear_token_cache()
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_AUTH_SHARED_CACHE='default')
+    def test_shared_cache_keeps_no_user(self):
+        """Test the shared cache holds the user id, not the user with its password."""
+        self.client.get(self.url)
+
+        cached = cache.get(_shared_key(self.token.key))
+
+        self.assertEqual(cached, (self.user.id, True, self.token.key))
+
+    def test_revoked_after_commit(self):
+        """Test the cached token is dropped when the delete commits, not before."""
+        self.client.get(self.url)
+        key = self.token.key
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.token.delete()
+            self.assertIsNotNone(get_cached_token(key))
+        for callback in callbacks:
+            callback()
+
+        self.assertIsNone(get_cached_token(key))
+
+
+class LRUCacheTests(TestCase):
+    """Test the bounded in-process cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest unused entry is dropped when full."""
+        lru = LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), 3)
+        self.assertEqual(len(lru), 2)
+
+    def test_entries_expire(self):
+        """Test entries are gone after the timeout."""
+        lru = LRUCache(10, timeout=30)
+        with mock.patch('core.lru.time.monotonic', return_value=100):
+            lru.set('a', 1)
+        with mock.patch('core.lru.time.monotonic', return_value=129):
+            self.assertEqual(lru.get('a'), 1)
+        with mock.patch('core.lru.time.monotonic', return_value=130):
+            self.assertIsNone(lru.get('a'))
+
+
+class SignedAccessTokenAuthenticationTests(TestCase):
+    """Test stateless Bearer access tokens."""
+
+    def setUp(self):
+        clear_token_cache()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        access, expires = issue_access_token(self.user.id)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_create_without_user_query(self):
+        """Test creating a to-do authenticates and saves with just the insert."""
+        self.client.get('/api/todo/')
+
+        with self.assertNumQueries(1):
+            res = self.client.post('/api/todo/', {'title': 'New', 'completed': False})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(ToDo.objects.get().user, self.user)
+
+    def test_create_comment_with_lazy_user(self):
+        """Test views that need the whole user still get it."""
+        post = Post.objects.create(user=self.user, title='Post', body='Body')
+
+        res = self.client.post('/api/comments/', {'postId': post.id, 'body': 'Hi'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['email'], 'test@example.com')
+
+    def test_tampered_token_rejected(self):
+        """Test a token with a different user id is rejected."""
+        access, expires = issue_access_token(self.user.id)
+        forged = access.replace(f'{self.user.id}:', f'{self.user.id + 1}:', 1)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {forged}')
+
+        res = self.client.get('/api/todo/')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_expired_token_rejected(self):
+        """Test tokens stop working after their expiry."""
+        with mock.patch('core.authentication.time.time', return_value=0):
+            access, expires = issue_access_token(self.user.id)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        res = self.client.get('/api/todo/')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res['WWW-Authenticate'], 'Token')
+
+    def test_deleted_user_rejected(self):
+        """Test access tokens of a deleted user get a 401."""
+        self.client.get('/api/todo/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+
+        res = self.client.post('/api/todo/', {'title': 'New', 'completed': False})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test access tokens stop working once their user is deactivated."""
+        self.client.get('/api/todo/')
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        res = self.client.get('/api/todo/')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_schema_describes_bearer_scheme(self):
+        """Test the API schema documents access tokens as a Bearer scheme."""
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+
+        scheme = schema['components']['securitySchemes']['accessTokenAuth']
+        self.assertEqual((scheme['type'], scheme['scheme']), ('http', 'bearer'))
+
+    def test_lazy_user_loads_on_demand(self):
+        """Test the user id needs no query and other attributes load the user."""
+        user = LazyUser(self.user.id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(user.id, self.user.id)
+            self.assertTrue(user and user.is_authenticated)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'test@example.com')
+
+    def test_lazy_user_deactivated(self):
+        """Test loading a deactivated user fails authentication."""
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            LazyUser(self.user.id).email
@@ -0,0 +1,75 @@
+"""
+Tests for the bulk loading helpers.
+"""
+import json
+from io import StringIO
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.bulk import batched, copy_value, deferred_indexes, iter_records
+from core.models import Photo
+
+
+class IterRecordsTests(SimpleTestCase):
+    """Test reading records incrementally."""
+
+    records = [{'id': 1, 'title': 'a, [b]'}, {'id': 2, 'title': '{"c"}'}, {'id': 3, 'title': 'd\n'}]
+
+    def test_json_array(self):
+        """Test records split across many small reads are decoded whole."""
+        stream = StringIO(json.dumps(self.records, indent=2))
+
+        self.assertEqual(list(iter_records(stream, chunk_size=5)), self.records)
+
+    def test_ndjson(self):
+        """Test one record per line is read too."""
+        stream = StringIO(''.join(json.dumps(record) + '\n' for record in self.records))
+
+        self.assertEqual(list(iter_records(stream, chunk_size=7)), self.records)
+
+    def test_truncated_file(self):
+        """Test a file ending inside a record is an error."""
+        stream = StringIO(json.dumps(self.records)[:-5])
+
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_records(stream, chunk_size=8))
+
+    def test_batched(self):
+        """Test items are grouped in order."""
+        self.assertEqual(list(batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+    def test_copy_value(self):
+        """Test values are escaped for COPY."""
+        self.assertEqual(copy_value(None), '\\N')
+        self.assertEqual(copy_value(True), 't')
+        self.assertEqual(copy_value('a\tb\\c\n'), 'a\\tb\\\\c\\n')
+
+
+class DeferredIndexesTests(SimpleTestCase):
+    """Test secondary indexes are dropped for a load and rebuilt after it."""
+
+    @mock.patch('core.bulk.connection')
+    def test_indexes_rebuilt_after_failed_load(self, patched_connection):
+        """Test the dropped indexes are reported and rebuilt even if the load fails."""
+        patched_connection.vendor = 'postgresql'
+        schema_editor = patched_connection.schema_editor.return_value.__enter__.return_value
+
+        with self.assertRaises(ValueError):
+            with deferred_indexes(Photo) as dropped:
+                self.assertEqual(dropped, Photo._meta.indexes)
+                schema_editor.add_index.assert_not_called()
+                raise ValueError()
+
+        self.assertEqual(schema_editor.remove_index.call_count, len(Photo._meta.indexes))
+        self.assertEqual(schema_editor.add_index.call_count, len(Photo._meta.indexes))
+
+    @mock.patch('core.bulk.connection')
+    def test_other_backends_keep_indexes(self, patched_connection):
+        """Test nothing is dropped outside PostgreSQL."""
+        patched_connection.vendor = 'sqlite'
+
+        with deferred_indexes(Photo) as dropped:
+            self.assertEqual(dropped, [])
+
+        patched_connection.schema_editor.assert_not_called()
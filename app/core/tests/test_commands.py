@@ -2,13 +2,21 @@
 Test custom Django management commands.
 """
 
+import json
+import os
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2Error
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+
+from core.models import Address, Album, Comment, Company, Geo, Photo, Post, ToDo, User
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -33,3 +41,291 @@ class Command(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+@patch('core.management.commands.benchmark.teardown_databases')
+@patch('core.management.commands.benchmark.setup_databases')
+class BenchmarkCommandTests(TestCase):
+    """ Test the benchmark command."""
+
+    def test_serializers_benchmark(self, patched_setup, patched_teardown):
+        """ Test the serializers benchmark runs on a scratch database."""
+        out = StringIO()
+
+        call_command('benchmark', 'serializers', rows=20, repeat=1, stdout=out)
+
+        patched_setup.assert_called_once()
+        patched_teardown.assert_called_once()
+        self.assertIn('faster', out.getvalue())
+
+    def test_login_benchmark(self, patched_setup, patched_teardown):
+        """ Test the login benchmark measures each pool size."""
+        out = StringIO()
+
+        call_command('benchmark', 'login', logins=2, workers=[1], repeat=1, stdout=out)
+
+        self.assertIn('logins/s', out.getvalue())
+
+    def test_endpoints_benchmark(self, patched_setup, patched_teardown):
+        """ Test the endpoints benchmark measures every route and writes JSON."""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+
+            call_command('benchmark', 'endpoints', dataset_users=3, requests=2, output=output, stdout=StringIO())
+
+            with open(output, encoding='utf-8') as stream:
+                results = json.load(stream)['endpoints']
+        self.assertEqual(
+            set(results['post:post-list']), {'p50_ms', 'p95_ms', 'p99_ms', 'queries', 'bytes'},
+        )
+        for name in ('post:comment-filter-by-post', 'album:album-user-albums', 'todo:todo-detail', 'user:token'):
+            self.assertIn(name, results)
+        self.assertGreater(results['post:post-list']['bytes'], 0)
+        for name in ('POST post:post-list', 'PUT album:photo-detail', 'PATCH user:user-detail', 'DELETE todo:todo-detail'):
+            self.assertIn(name, results)
+        # The writes were rolled back.
+        self.assertFalse(Post.objects.filter(title='Benchmark').exists())
+
+    def test_summary_benchmark(self, patched_setup, patched_teardown):
+        """ Test the summary benchmark compares against the five listings."""
+        out = StringIO()
+
+        call_command('benchmark', 'summary', dataset_users=3, repeat=1, stdout=out)
+
+        self.assertIn('x faster', out.getvalue())
+
+    def test_photo_storage_benchmark(self, patched_setup, patched_teardown):
+        """ Test the photo storage benchmark measures the URL bytes saved."""
+        out = StringIO()
+
+        call_command('benchmark', 'photo_storage', photos=60, repeat=1, stdout=out)
+
+        self.assertIn('bytes/row compact', out.getvalue())
+
+    def test_benchmark_baseline_regression(self, patched_setup, patched_teardown):
+        """ Test results worse than the baseline fail the command."""
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, 'baseline.json')
+            with open(baseline, 'w', encoding='utf-8') as stream:
+                json.dump({'endpoints': {'todo:todo-list': {'queries': 0.5, 'bytes': 10 ** 9}}}, stream)
+
+            with self.assertRaisesRegex(CommandError, 'todo:todo-list queries: 0.5 -> '):
+                call_command(
+                    'benchmark', 'endpoints', dataset_users=3, requests=2, baseline=baseline, stdout=StringIO(),
+                )
+
+    def test_unknown_benchmark(self, patched_setup, patched_teardown):
+        """ Test an unknown benchmark name is an error."""
+        with self.assertRaises(CommandError):
+            call_command('benchmark', 'nope')
+
+        patched_setup.assert_not_called()
+
+
+def placeholder_user(n, **overrides):
+    user = {
+        'id': n,
+        'name': f'User {n}',
+        'username': f'user{n}',
+        'email': f'user{n}@Example.com',
+        'address': {
+            'street': f'Street {n}',
+            'suite': 'Apt. 1',
+            'city': 'City',
+            'zipcode': '12345',
+            'geo': {'lat': '-37.3159', 'lng': '81.1496'},
+        },
+        'phone': '1-770-736-8031 x56442',
+        'website': 'example.org',
+        'company': {'name': 'Shared Company', 'catchPhrase': 'Phrase', 'bs': 'bs'},
+    }
+    user.update(overrides)
+    return user
+
+
+class ImportUsersCommandTests(TestCase):
+    """ Test the import_users command."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'users.json')
+
+    def write(self, records, ndjson=False):
+        with open(self.path, 'w', encoding='utf-8') as stream:
+            if ndjson:
+                stream.writelines(json.dumps(record) + '\n' for record in records)
+            else:
+                json.dump(records, stream)
+
+    def test_import_users(self):
+        """ Test users are created with their address, geo and company wired up."""
+        self.write([
+            placeholder_user(1),
+            placeholder_user(2, password='secret123'),
+            placeholder_user(3, address=None, company=None),
+        ])
+        out = StringIO()
+
+        call_command('import_users', self.path, batch_size=2, workers=0, stdout=out)
+
+        self.assertIn('Imported 3 users', out.getvalue())
+        first, second, third = User.objects.order_by('username')
+        self.assertEqual(first.email, 'user1@example.com')
+        self.assertEqual(first.address.street, 'Street 1')
+        self.assertEqual(first.address.geo, second.address.geo)
+        self.assertEqual(first.company, second.company)
+        self.assertEqual(Geo.objects.count(), 1)
+        self.assertEqual(Company.objects.get().name, 'Shared Company')
+        self.assertFalse(first.has_usable_password())
+        self.assertTrue(second.check_password('secret123'))
+        self.assertIsNone(third.address)
+        self.assertIsNone(third.company)
+
+    def test_import_resumes(self):
+        """ Test running the import again only adds the missing users."""
+        self.write([placeholder_user(1)], ndjson=True)
+        call_command('import_users', self.path, workers=0, stdout=StringIO())
+        self.write([placeholder_user(1), placeholder_user(2)], ndjson=True)
+        out = StringIO()
+
+        call_command('import_users', self.path, workers=0, password='secret123', stdout=out)
+
+        self.assertIn('Imported 1 users, skipped 1', out.getvalue())
+        self.assertEqual(User.objects.count(), 2)
+        self.assertTrue(User.objects.get(username='user2').check_password('secret123'))
+
+    def test_import_hashes_in_processes(self):
+        """ Test passwords hashed by worker processes are valid."""
+        self.write([placeholder_user(n) for n in range(3)])
+
+        call_command('import_users', self.path, workers=2, password='secret123', stdout=StringIO())
+
+        self.assertTrue(all(user.check_password('secret123') for user in User.objects.all()))
+
+
+class LoadPlaceholderCommandTests(TestCase):
+    """ Test the load_placeholder command."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.files = {
+            'users': [placeholder_user(1), placeholder_user(2)],
+            'posts': [
+                {'userId': 1, 'id': 1, 'title': 'Post 1', 'body': 'Body\twith\ttabs'},
+                {'userId': 2, 'id': 2, 'title': 'Post 2', 'body': 'Body'},
+                {'userId': 9, 'id': 3, 'title': 'No user', 'body': 'Body'},
+            ],
+            'comments': [
+                {'postId': 1, 'id': 1, 'name': 'n', 'email': 'user2@example.com', 'body': 'Hi'},
+                {'postId': 1, 'id': 2, 'name': 'n', 'email': 'someone@example.com', 'body': 'Hi'},
+                {'postId': 3, 'id': 3, 'name': 'n', 'email': 'someone@example.com', 'body': 'No post'},
+            ],
+            'albums': [{'userId': 2, 'id': 1, 'title': 'Album'}],
+            'photos': [
+                {'albumId': 1, 'id': 1, 'title': 'Photo', 'url': 'https://via.placeholder.com/600/92c952',
+                 'thumbnailUrl': 'https://via.placeholder.com/150/92c952'},
+            ],
+            'todos': [{'userId': 1, 'id': 1, 'title': 'To-do', 'completed': True}],
+        }
+        self.paths = {}
+        for name, records in self.files.items():
+            self.paths[name] = os.path.join(self.directory, f'{name}.json')
+            with open(self.paths[name], 'w', encoding='utf-8') as stream:
+                json.dump(records, stream)
+
+    def test_load_placeholder(self):
+        """ Test rows are loaded with their ids and foreign keys mapped."""
+        out = StringIO()
+
+        call_command('load_placeholder', batch_size=2, stdout=out, **self.paths)
+
+        first = User.objects.get(email='user1@example.com')
+        second = User.objects.get(email='user2@example.com')
+        self.assertIn('Loaded 2 posts, skipped 1', out.getvalue())
+        self.assertEqual(Post.objects.get(pk=1).user, first)
+        self.assertEqual(Post.objects.get(pk=1).body, 'Body\twith\ttabs')
+        self.assertEqual(Post.objects.get(pk=1).comment_count, 2)
+        self.assertEqual(Comment.objects.get(pk=1).user, second)
+        self.assertIsNone(Comment.objects.get(pk=2).user)
+        self.assertFalse(Comment.objects.filter(pk=3).exists())
+        self.assertEqual(Album.objects.get().user, second)
+        self.assertEqual(Photo.objects.get().user, second)
+        self.assertEqual(Photo.objects.get().thumbnailUrl, 'https://via.placeholder.com/150/92c952')
+        self.assertEqual(ToDo.objects.get().user, first)
+
+    def test_load_placeholder_resumes(self):
+        """ Test loading again skips the rows already there."""
+        call_command('load_placeholder', stdout=StringIO(), **self.paths)
+        out = StringIO()
+
+        call_command('load_placeholder', stdout=out, **self.paths)
+
+        self.assertIn('Loaded 0 photos, skipped 1', out.getvalue())
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Post.objects.get(pk=1).comment_count, 2)
+
+
+class GenerateDataCommandTests(TestCase):
+    """ Test the generate_data command."""
+
+    options = {
+        'users': 20,
+        'posts_per_user': 3,
+        'comments_per_post': 2,
+        'albums_per_user': 1,
+        'photos_per_album': 3,
+        'todos_per_user': 2,
+        'companies': 3,
+        'celebrities': 0.1,
+        'celebrity_factor': 10,
+        'batch_size': 50,
+    }
+
+    def snapshot(self):
+        return (
+            list(User.objects.order_by('pk').values_list('email', 'name', 'company__name', 'address__geo__lat')),
+            list(Post.objects.order_by('pk').values_list('user_id', 'title', 'comment_count')),
+            list(Comment.objects.order_by('pk').values_list('postId_id', 'user_id', 'body')),
+            list(Photo.objects.order_by('pk').values_list('albumId__user_id', 'url_prefix__prefix', 'url_name')),
+            list(ToDo.objects.order_by('pk').values_list('user_id', 'completed')),
+        )
+
+    def test_generate_data(self):
+        """ Test rows are generated with consistent foreign keys and counts."""
+        out = StringIO()
+
+        call_command('generate_data', stdout=out, **self.options)
+
+        self.assertIn('Generated', out.getvalue())
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Company.objects.count(), 3)
+        self.assertEqual(User.objects.filter(address__geo__isnull=False).count(), 20)
+        self.assertTrue(User.objects.get(email='user1@example.com').check_password('password'))
+        self.assertGreater(Post.objects.count(), 0)
+        self.assertEqual(sum(Post.objects.values_list('comment_count', flat=True)), Comment.objects.count())
+        self.assertFalse(Photo.objects.exclude(user=F('albumId__user')).exists())
+
+    def test_generate_data_is_deterministic(self):
+        """ Test the same seed generates the same data."""
+        call_command('generate_data', seed=7, stdout=StringIO(), **self.options)
+        first = self.snapshot()
+        User.objects.all().delete()
+        for model in (Address, Company, Geo):
+            model.objects.all().delete()
+        for model in (Company, Geo):
+            model.objects.ids.clear()
+
+        call_command('generate_data', seed=7, stdout=StringIO(), **self.options)
+
+        self.assertEqual(self.snapshot(), first)
+
+    def test_generate_data_appends(self):
+        """ Test running again adds rows after the existing ones."""
+        call_command('generate_data', stdout=StringIO(), **self.options)
+
+        call_command('generate_data', seed=1, stdout=StringIO(), **self.options)
+
+        self.assertEqual(User.objects.count(), 40)
@@ -0,0 +1,149 @@
+"""
+Tests for the denormalized comment counts of posts.
+"""
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError, transaction
+from django.db.models.signals import pre_delete
+from django.test import TestCase, override_settings
+
+from core.models import Comment, Post, PostCommentCountShard
+
+
+def comment_count(post):
+    """Reload post and return its total comment count."""
+    return Post.objects.get(pk=post.pk).total_comment_count
+
+
+class CommentCountTests(TestCase):
+    """Test comment counts follow comment writes."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('test@example.com', 'testpass123')
+        self.post = Post.objects.create(user=self.user, title='Post', body='Body')
+
+    def test_create_and_delete(self):
+        """Test creating and deleting comments updates the count."""
+        comment = Comment.objects.create(postId=self.post, body='First')
+        Comment.objects.create(postId=self.post, body='Second')
+        self.assertEqual(comment_count(self.post), 2)
+
+        comment.delete()
+        self.assertEqual(comment_count(self.post), 1)
+
+    def test_move_comment(self):
+        """Test moving a comment to another post moves the count."""
+        other = Post.objects.create(user=self.user, title='Other', body='Body')
+        comment = Comment.objects.create(postId=self.post, body='Comment')
+
+        comment = Comment.objects.get(pk=comment.pk)
+        comment.postId = other
+        comment.save()
+
+        self.assertEqual(comment_count(self.post), 0)
+        self.assertEqual(comment_count(other), 1)
+
+    def test_bulk_create(self):
+        """Test bulk created comments are counted."""
+        Comment.objects.bulk_create(Comment(postId=self.post, body='Bulk') for _ in range(5))
+
+        self.assertEqual(comment_count(self.post), 5)
+
+    def test_queryset_delete(self):
+        """Test deleting comments through a queryset updates the count."""
+        Comment.objects.bulk_create(Comment(postId=self.post, body='Bulk') for _ in range(5))
+        pks = list(Comment.objects.values_list('pk', flat=True)[:2])
+        Comment.objects.filter(pk__in=pks).delete()
+
+        self.assertEqual(comment_count(self.post), 3)
+
+    def test_user_delete_keeps_count(self):
+        """Test comments kept with a NULL user still count."""
+        commenter = get_user_model().objects.create_user('commenter@example.com', 'testpass123')
+        Comment.objects.create(postId=self.post, user=commenter, body='Comment')
+
+        commenter.delete()
+
+        self.assertEqual(comment_count(self.post), 1)
+
+    def test_post_cascade_skips_updates(self):
+        """Test deleting a post does not update it once per cascaded comment."""
+        Comment.objects.bulk_create(Comment(postId=self.post, body='Bulk') for _ in range(5))
+
+        with self.assertNumQueries(4):
+            # Collect the comments, then delete shards, comments and post.
+            self.post.delete()
+
+        self.assertFalse(Comment.objects.exists())
+
+    def test_failed_post_delete_keeps_counting(self):
+        """Test a post delete that rolls back leaves later comment deletes counted."""
+        comment = Comment.objects.create(postId=self.post, body='First')
+        Comment.objects.create(postId=self.post, body='Second')
+
+        def fail(sender, **kwargs):
+            raise DatabaseError('delete failed')
+
+        pre_delete.connect(fail, sender=Post)
+        self.addCleanup(pre_delete.disconnect, fail, sender=Post)
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            Post.objects.get(pk=self.post.pk).delete()
+        pre_delete.disconnect(fail, sender=Post)
+
+        comment.delete()
+        self.assertEqual(comment_count(self.post), 1)
+
+    @override_settings(COMMENT_COUNT_SHARDS=4)
+    def test_sharded_counts(self):
+        """Test hot posts count comments in shard rows."""
+        Post.objects.filter(pk=self.post.pk).update(comment_count_sharded=True)
+        comments = [Comment.objects.create(postId=self.post, body=str(i)) for i in range(20)]
+        comments[0].delete()
+
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.comment_count, 0)
+        self.assertTrue(PostCommentCountShard.objects.filter(post=post).exists())
+        self.assertLessEqual(PostCommentCountShard.objects.filter(post=post).count(), 4)
+        self.assertEqual(post.total_comment_count, 19)
+
+
+class RecountCommentsCommandTests(TestCase):
+    """Test the recount_comments command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('test@example.com', 'testpass123')
+
+    def test_repairs_drift(self):
+        """Test drifted counts are recomputed and shards folded."""
+        posts = [Post.objects.create(user=self.user, title=str(i), body='Body') for i in range(5)]
+        for post in posts:
+            Comment.objects.bulk_create(Comment(postId=post, body='Bulk') for _ in range(3))
+        Post.objects.filter(pk=posts[0].pk).update(comment_count=42)
+        Post.objects.filter(pk=posts[1].pk).update(comment_count_sharded=True, comment_count=0)
+        PostCommentCountShard.objects.create(post=posts[1], shard=0, count=2)
+
+        out = StringIO()
+        call_command('recount_comments', batch_size=2, stdout=out)
+
+        self.assertIn('Checked 5 posts, repaired 2.', out.getvalue())
+        for post in posts:
+            self.assertEqual(comment_count(post), 3)
+        self.assertFalse(PostCommentCountShard.objects.exists())
+
+    @override_settings(COMMENT_COUNT_SHARDS=4)
+    def test_sharded_post_without_drift_unchanged(self):
+        """Test the shards locked for a sharded post leave an accurate post as it was."""
+        post = Post.objects.create(user=self.user, title='Post', body='Body', comment_count_sharded=True)
+        Comment.objects.bulk_create(Comment(postId=post, body='Bulk') for _ in range(3))
+        Post.objects.filter(pk=post.pk).update(comment_count=3)
+        PostCommentCountShard.objects.filter(post=post).delete()
+        version = Post.objects.get(pk=post.pk).version
+
+        out = StringIO()
+        call_command('recount_comments', stdout=out)
+
+        self.assertIn('Checked 1 posts, repaired 0.', out.getvalue())
+        self.assertEqual(Post.objects.get(pk=post.pk).version, version)
+        self.assertFalse(PostCommentCountShard.objects.exists())
@@ -0,0 +1,150 @@
+"""
+Tests for ETags and conditional GET requests.
+"""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Album, Comment, Photo, Post, ToDo
+from post.serializers import CommentValuesSerializer, PostSerializer
+
+
+class ConditionalGetTests(TestCase):
+    """Test strong ETags built from row version stamps."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test User',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.post = Post.objects.create(user=self.user, title='Post', body='Body')
+        self.comment = Comment.objects.create(postId=self.post, user=self.user, body='Comment')
+        self.album = Album.objects.create(user=self.user, title='Album')
+        Photo.objects.create(albumId=self.album, title='Photo', url='https://x.y/1', thumbnailUrl='https://x.y/t/1')
+        self.todo = ToDo.objects.create(user=self.user, title='To-do', completed=False)
+
+    def assertNotModified(self, url):
+        """Fetch url, then check revalidating it returns an empty 304."""
+        res = self.client.get(url)
+        etag = res['ETag']
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['ETag'], etag)
+        return etag
+
+    def test_retrieve_not_modified(self):
+        """Test revalidating an unchanged post skips the serializer."""
+        url = f'/api/posts/{self.post.id}/'
+        etag = self.client.get(url)['ETag']
+
+        with mock.patch.object(PostSerializer, 'to_representation') as to_representation:
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        to_representation.assert_not_called()
+
+    def test_retrieve_modified(self):
+        """Test saving a post or commenting on it changes its ETag."""
+        url = f'/api/posts/{self.post.id}/'
+        etag = self.assertNotModified(url)
+
+        self.post.refresh_from_db()
+        self.post.title = 'Edited'
+        self.post.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+        etag = res['ETag']
+        Comment.objects.create(postId=self.post, user=self.user, body='Another')
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['comment_count'], 2)
+
+    def test_list_not_modified_query_count(self):
+        """Test a matching list revalidation reads only the version columns."""
+        url = '/api/comments/'
+        etag = self.client.get(url)['ETag']
+
+        with mock.patch.object(CommentValuesSerializer, 'to_representation') as to_representation:
+            with self.assertNumQueries(1):
+                res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        to_representation.assert_not_called()
+
+    def test_custom_actions_not_modified(self):
+        """Test the polled custom actions answer 304 while unchanged."""
+        self.assertNotModified(f'/api/todo/{self.user.id}/user_todos/')
+        self.assertNotModified(f'/api/posts/{self.post.id}/comments/')
+        self.assertNotModified(f'/api/albums/{self.album.id}/photos/')
+
+    def test_weak_and_listed_etags_match(self):
+        """Test If-None-Match is compared weakly against each listed tag."""
+        url = f'/api/todo/{self.todo.id}/'
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=f'"other", W/{etag}')
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_pages_have_distinct_etags(self):
+        """Test the ETag covers the requested page."""
+        ToDo.objects.create(user=self.user, title='Second', completed=True)
+        url = f'/api/todo/{self.user.id}/user_todos/'
+
+        first = self.client.get(url, {'page_size': 1})
+        both = self.client.get(url, {'page_size': 2})
+
+        self.assertNotEqual(first['ETag'], both['ETag'])
+
+    def test_user_rename_changes_comment_etag(self):
+        """Test renaming the commenter changes the ETag of the comment list."""
+        url = f'/api/comments/{self.post.id}/filter-by-post/'
+        etag = self.assertNotModified(url)
+
+        self.user.name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]['name'], 'Renamed')
+
+    def test_list_etag_changes_on_insert(self):
+        """Test adding a row to the last page changes its ETag."""
+        url = f'/api/albums/{self.album.id}/photos/'
+        etag = self.assertNotModified(url)
+
+        Photo.objects.create(albumId=self.album, title='New', url='https://x.y/2', thumbnailUrl='https://x.y/t/2')
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+
+    def test_deleted_object_is_not_found(self):
+        """Test revalidating a deleted object returns 404, not 304."""
+        url = f'/api/posts/{self.post.id}/'
+        etag = self.client.get(url)['ETag']
+        self.post.delete()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stream_has_no_etag(self):
+        """Test streamed dumps are sent without an ETag."""
+        res = self.client.get('/api/posts/', {'stream': '1'})
+
+        self.assertFalse(res.has_header('ETag'))
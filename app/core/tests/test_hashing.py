@@ -0,0 +1,41 @@
+"""
+Tests for the password hashing pool.
+"""
+from django.contrib.auth.hashers import make_password
+from django.test import SimpleTestCase
+
+from core.hashing import PasswordHashPool, PasswordHashPoolBusy
+
+
+class PasswordHashPoolTests(SimpleTestCase):
+    """Test verifying passwords in worker processes."""
+
+    def setUp(self):
+        self.encoded = make_password('testpass123')
+
+    def test_check_password(self):
+        """Test checks in worker processes give the same answers."""
+        pool = PasswordHashPool(workers=1, max_pending=2)
+        self.addCleanup(pool.shutdown)
+
+        self.assertTrue(pool.check_password('testpass123', self.encoded))
+        self.assertFalse(pool.check_password('wrong', self.encoded))
+
+    def test_inline_without_workers(self):
+        """Test a pool without workers checks on the calling thread."""
+        pool = PasswordHashPool(workers=0, max_pending=1)
+
+        self.assertTrue(pool.check_password('testpass123', self.encoded))
+
+    def test_full_queue_is_refused(self):
+        """Test checks beyond max_pending are refused right away."""
+        pool = PasswordHashPool(workers=1, max_pending=1)
+        self.addCleanup(pool.shutdown)
+        future = pool.submit('testpass123', self.encoded)
+
+        with self.assertRaises(PasswordHashPoolBusy):
+            pool.submit('testpass123', self.encoded)
+
+        self.assertTrue(future.result())
+        # The slot is free again once the check is done.
+        self.assertFalse(pool.check_password('wrong', self.encoded))
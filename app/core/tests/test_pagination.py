@@ -0,0 +1,88 @@
+"""
+Tests for cursor pagination of the list endpoints.
+"""
+import re
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from rest_framework.test import APIClient
+
+from core.models import Post, Comment
+
+
+def next_link(response):
+    """Return the rel="next" link of a response, if any."""
+    match = re.search(r'<([^>]+)>; rel="next"', response.get('Link', ''))
+    return match.group(1) if match else None
+
+
+class CursorPaginationTests(TestCase):
+    """Test the keyset pagination of list endpoints and custom actions."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.post = Post.objects.create(user=self.user, title='Post', body='Body')
+        Comment.objects.bulk_create(
+            Comment(postId=self.post, user=self.user, body=f'Comment {i}')
+            for i in range(25)
+        )
+
+    def walk(self, url):
+        """Follow next links from url and return every page."""
+        pages = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            pages.append(res.data)
+            url = next_link(res)
+        return pages
+
+    def test_list_is_paginated_by_id(self):
+        """Test walking the comment list returns every comment once, in id order."""
+        pages = self.walk('/api/comments/?page_size=10')
+
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        ids = [comment['id'] for page in pages for comment in page]
+        self.assertEqual(ids, sorted(Comment.objects.values_list('id', flat=True)))
+
+    def test_custom_action_is_paginated(self):
+        """Test custom list actions use the same cursor pagination."""
+        pages = self.walk(f'/api/posts/{self.post.id}/comments/?page_size=20')
+
+        self.assertEqual([len(page) for page in pages], [20, 5])
+
+    def test_page_size_is_capped(self):
+        """Test a client cannot request more than the maximum page size."""
+        res = self.client.get('/api/comments/?page_size=1000000')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data), 25)
+
+    def test_page_query_count_is_constant(self):
+        """Test fetching a later page costs the same single query."""
+        res = self.client.get('/api/comments/?page_size=5')
+        url = next_link(res)
+        res = self.client.get(url)
+        url = next_link(res)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url)
+        self.assertEqual(res.data[0]['body'], 'Comment 10')
+
+    def test_last_page_has_no_next_link(self):
+        """Test a single page response carries no next link."""
+        res = self.client.get('/api/comments/')
+
+        self.assertIsNone(next_link(res))
+
+    def test_invalid_cursor(self):
+        """Test a tampered cursor is rejected."""
+        res = self.client.get('/api/comments/?cursor=bogus')
+
+        self.assertEqual(res.status_code, 404)
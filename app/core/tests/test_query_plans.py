@@ -0,0 +1,124 @@
+"""
+Query plan regression tests for the viewset querysets.
+"""
+import re
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.test import APIClient
+
+from core.models import Album, Comment, Photo, Post, ToDo
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN output is PostgreSQL specific.')
+class QueryPlanTests(TestCase):
+    """Test the endpoints never fall back to sequential scans on large tables."""
+
+    USERS = 1000
+    POSTS_PER_USER = 5
+    COMMENTS_PER_POST = 5
+    ALBUMS_PER_USER = 2
+    PHOTOS_PER_ALBUM = 10
+    TODOS_PER_USER = 10
+    SEEDED_TABLES = {
+        model._meta.db_table
+        for model in (get_user_model(), Post, Comment, Album, Photo, ToDo)
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        users = User.objects.bulk_create(
+            User(email=f'user{i}@example.com', name=f'User {i}', password='!')
+            for i in range(cls.USERS)
+        )
+        posts = Post.objects.bulk_create(
+            Post(user=user, title='Post', body='Body')
+            for user in users for _ in range(cls.POSTS_PER_USER)
+        )
+        Comment.objects.bulk_create(
+            (Comment(postId=post, user=users[i % cls.USERS], body='Comment')
+             for i, post in enumerate(posts) for _ in range(cls.COMMENTS_PER_POST)),
+            batch_size=5000,
+        )
+        albums = Album.objects.bulk_create(
+            Album(user=user, title=f'Album {user.id} {i}')
+            for user in users for i in range(cls.ALBUMS_PER_USER)
+        )
+        Photo.objects.bulk_create(
+            (Photo(albumId=album, title='Photo', url=f'http://example.com/{i}.jpg',
+                   thumbnailUrl=f'http://example.com/{i}_thumb.jpg')
+             for album in albums for i in range(cls.PHOTOS_PER_ALBUM)),
+            batch_size=5000,
+        )
+        ToDo.objects.bulk_create(
+            (ToDo(user=user, title='ToDo', completed=bool(i % 2))
+             for user in users for i in range(cls.TODOS_PER_USER)),
+            batch_size=5000,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.user = users[len(users) // 2]
+        cls.post = posts[len(posts) // 2]
+        cls.album = albums[len(albums) // 2]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def assertNoSeqScan(self, url):
+        """Request url and EXPLAIN every query it ran against the seeded tables."""
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200, url)
+
+        for query in context.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN ' + query['sql'])
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+            scans = set(re.findall(r'Seq Scan on (\w+)', plan)) & self.SEEDED_TABLES
+            self.assertEqual(scans, set(), f'{url}\n{query["sql"]}\n{plan}')
+
+    def test_post_plans(self):
+        """Test post endpoints use index scans."""
+        self.assertNoSeqScan('/api/posts/')
+        self.assertNoSeqScan(f'/api/posts/{self.post.id}/')
+        self.assertNoSeqScan(f'/api/posts/{self.post.id}/comments/')
+        self.assertNoSeqScan(f'/api/posts/{self.user.id}/user_posts/')
+
+    def test_comment_plans(self):
+        """Test comment endpoints use index scans."""
+        self.assertNoSeqScan('/api/comments/')
+        self.assertNoSeqScan(f'/api/comments/{self.post.id}/filter-by-post/')
+
+    def test_album_plans(self):
+        """Test album endpoints use index scans."""
+        self.assertNoSeqScan('/api/albums/')
+        self.assertNoSeqScan(f'/api/albums/{self.album.id}/photos/')
+        self.assertNoSeqScan(f'/api/albums/{self.album.id}/photos/?view=thumbnails')
+        self.assertNoSeqScan(f'/api/albums/{self.user.id}/user_albums/')
+
+    def test_photo_plans(self):
+        """Test photo endpoints use index scans."""
+        self.assertNoSeqScan('/api/photos/')
+        self.assertNoSeqScan(f'/api/photos/?albumId={self.album.id}')
+
+    def test_todo_plans(self):
+        """Test to-do endpoints use index scans."""
+        self.assertNoSeqScan('/api/todo/')
+        self.assertNoSeqScan(f'/api/todo/{self.user.id}/user_todos/')
+        self.assertNoSeqScan('/api/todo/?completed=true')
+        self.assertNoSeqScan(f'/api/todo/?userId={self.user.id}&completed=false')
+        self.assertNoSeqScan(f'/api/todo/stats/?userId={self.user.id}')
+
+    def test_user_plans(self):
+        """Test user endpoints use index scans."""
+        self.assertNoSeqScan('/api/users/')
+        self.assertNoSeqScan(f'/api/users/{self.user.id}/')
+        self.assertNoSeqScan(f'/api/users/{self.user.id}/summary/')
@@ -0,0 +1,42 @@
+"""
+Tests for the streaming JSON helpers.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core.models import ToDo
+from core.streaming import iter_json_array
+from todo.serializers import ToDoSerializer
+
+
+class StreamingTests(TestCase):
+    """Test streaming querysets as JSON arrays."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+
+    def test_empty_queryset(self):
+        """Test an empty queryset streams an empty array."""
+        chunks = list(iter_json_array(ToDo.objects.all(), ToDoSerializer()))
+
+        self.assertEqual(json.loads(b''.join(chunks)), [])
+
+    def test_output_is_flushed_in_chunks(self):
+        """Test output is flushed in several chunks that join into valid JSON."""
+        ToDo.objects.bulk_create(
+            ToDo(user=self.user, title=f'ToDo {i}', completed=False)
+            for i in range(50)
+        )
+
+        chunks = list(iter_json_array(
+            ToDo.objects.order_by('id'), ToDoSerializer(), chunk_size=7, buffer_size=256,
+        ))
+
+        self.assertGreater(len(chunks), 1)
+        data = json.loads(b''.join(chunks))
+        self.assertEqual([todo['title'] for todo in data], [f'ToDo {i}' for i in range(50)])
@@ -0,0 +1,73 @@
+"""
+Tests for the fast values() based read serializers.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from rest_framework.renderers import JSONRenderer
+
+from album.serializers import PhotoThumbnailValuesSerializer, PhotoValuesSerializer
+from core.models import Album, Comment, Photo, Post, ToDo
+from post.serializers import CommentValuesSerializer, PostValuesSerializer
+from todo.serializers import ToDoValuesSerializer
+
+
+class ValuesSerializerTests(TestCase):
+    """Test values serializers render exactly like their model serializers."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Zoë "quoted" \\ name',
+        )
+        post = Post.objects.create(user=user, title='Ünïcode ✓', body='Line\nbreak')
+        hot = Post.objects.create(user=user, title='Hot', body='', comment_count_sharded=True)
+        Comment.objects.create(postId=post, user=user, body='With user')
+        Comment.objects.create(postId=post, body='Without user')
+        Comment.objects.create(postId=hot, user=user, body='Sharded')
+        album = Album.objects.create(user=user, title='Album')
+        Photo.objects.create(
+            albumId=album,
+            title='Photo',
+            url='https://via.placeholder.com/600/92c952',
+            thumbnailUrl='https://via.placeholder.com/150/92c952',
+        )
+        Photo.objects.create(
+            albumId=album,
+            title='Other thumbnail',
+            url='http://example.com/photo.jpg',
+            thumbnailUrl='http://example.com/photo_thumb.jpg',
+        )
+        ToDo.objects.create(user=user, title='Open', completed=False)
+        ToDo.objects.create(user=user, title='Done', completed=True)
+
+    def assertRendersIdentically(self, values_serializer, model):
+        """Render every row of model both ways and compare the bytes."""
+        model_serializer = values_serializer.model_serializer
+        queryset = model_serializer.setup_eager_loading(model.objects.order_by('id'))
+        expected = JSONRenderer().render(model_serializer(queryset, many=True).data)
+        rows = values_serializer.get_queryset(queryset)
+        actual = JSONRenderer().render(values_serializer(rows, many=True).data)
+
+        self.assertEqual(actual, expected)
+
+    def test_posts(self):
+        """Test posts, including sharded comment counts."""
+        self.assertRendersIdentically(PostValuesSerializer, Post)
+
+    def test_comments(self):
+        """Test comments, including comments without a user."""
+        self.assertRendersIdentically(CommentValuesSerializer, Comment)
+
+    def test_photos(self):
+        """Test photos."""
+        self.assertRendersIdentically(PhotoValuesSerializer, Photo)
+
+    def test_photo_thumbnails(self):
+        """Test photo thumbnails."""
+        self.assertRendersIdentically(PhotoThumbnailValuesSerializer, Photo)
+
+    def test_todos(self):
+        """Test to-dos."""
+        self.assertRendersIdentically(ToDoValuesSerializer, ToDo)
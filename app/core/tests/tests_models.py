@@ -2,9 +2,12 @@
 Tests for models
 """
 
+from django.db import transaction
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
+from core.models import Album, Company, Geo, Photo, UrlPrefix
+
 
 class ModelTests(TestCase):
     """ Test models."""
@@ -46,3 +49,136 @@ class ModelTests(TestCase):
         )
         self.assertTrue(user.is_superuser)
         self.assertTrue(user.is_staff)
+
+
+class InterningTests(TestCase):
+    """ Test shared company and geo rows."""
+
+    def setUp(self):
+        Company.objects.ids.clear()
+        Geo.objects.ids.clear()
+
+    def test_intern_company_reuses_row(self):
+        """Test interning a name twice returns the same row."""
+        first = Company.objects.intern('Acme')
+        second = Company.objects.intern('Acme')
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Company.objects.count(), 1)
+
+    def test_intern_geo_normalizes_coordinates(self):
+        """Test equal coordinates given as floats and strings share a row."""
+        first = Geo.objects.intern(1.5, -2.25)
+        second = Geo.objects.intern('1.500000000', '-2.250000000')
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Geo.objects.count(), 1)
+
+    def test_intern_many(self):
+        """Test interning a batch inserts only the missing rows."""
+        existing = Company.objects.create(name='Existing')
+
+        companies = Company.objects.intern_many([('Existing',), ('New',), ('New',)])
+
+        self.assertEqual(companies[('Existing',)].pk, existing.pk)
+        self.assertEqual(set(Company.objects.values_list('name', flat=True)), {'Existing', 'New'})
+
+    def test_cached_after_commit(self):
+        """Test resolved ids are served from the cache once committed."""
+        with self.captureOnCommitCallbacks(execute=True):
+            company = Company.objects.intern('Acme')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(Company.objects.intern('Acme').pk, company.pk)
+
+    def test_rolled_back_rows_not_cached(self):
+        """Test rows of a rolled back transaction are not cached."""
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Company.objects.intern('Acme')
+                    raise RuntimeError()
+            except RuntimeError:
+                pass
+
+        self.assertIsNone(Company.objects.ids.get(('Acme',)))
+
+    def test_delete_clears_cache(self):
+        """Test deleting an interned row drops the cached ids."""
+        with self.captureOnCommitCallbacks(execute=True):
+            company = Company.objects.intern('Acme')
+        Company.objects.get(pk=company.pk).delete()
+
+        self.assertIsNone(Company.objects.ids.get(('Acme',)))
+
+
+class PhotoUrlTests(TestCase):
+    """Test photo URLs stored as shared prefixes and names."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(email='test@example.com', password='testpass123')
+        self.album = Album.objects.create(user=user, title='Album')
+
+    def test_thumbnail_derived_from_url(self):
+        """Test a thumbnail with the url's name is stored as a prefix only."""
+        photo = Photo.objects.create(
+            albumId=self.album,
+            title='Photo',
+            url='https://via.placeholder.com/600/92c952',
+            thumbnailUrl='https://via.placeholder.com/150/92c952',
+        )
+
+        photo = Photo.objects.get(pk=photo.pk)
+        self.assertEqual(photo.url_prefix.prefix, 'https://via.placeholder.com/600/')
+        self.assertEqual(photo.url_name, '92c952')
+        self.assertEqual(photo.thumbnail_prefix.prefix, 'https://via.placeholder.com/150/')
+        self.assertEqual(photo.thumbnail_url, '')
+        self.assertEqual(photo.url, 'https://via.placeholder.com/600/92c952')
+        self.assertEqual(photo.thumbnailUrl, 'https://via.placeholder.com/150/92c952')
+
+    def test_other_thumbnail_kept_whole(self):
+        """Test a thumbnail not following the url is stored as given."""
+        photo = Photo.objects.create(
+            albumId=self.album,
+            title='Photo',
+            url='http://example.com/photo.jpg',
+            thumbnailUrl='http://example.com/photo_thumb.jpg',
+        )
+
+        photo = Photo.objects.get(pk=photo.pk)
+        self.assertIsNone(photo.thumbnail_prefix)
+        self.assertEqual(photo.thumbnail_url, 'http://example.com/photo_thumb.jpg')
+        self.assertEqual(photo.thumbnailUrl, 'http://example.com/photo_thumb.jpg')
+
+    def test_bulk_create_shares_prefixes(self):
+        """Test photos in bulk resolve their prefixes together and share them."""
+        photos = [
+            Photo(
+                albumId=self.album,
+                title=f'Photo {i}',
+                url=f'https://via.placeholder.com/600/{i:06x}',
+                thumbnailUrl=f'https://via.placeholder.com/150/{i:06x}',
+            )
+            for i in range(20)
+        ]
+
+        Photo.objects.bulk_create(photos)
+
+        self.assertEqual(UrlPrefix.objects.count(), 2)
+        self.assertEqual(
+            [photo.url for photo in Photo.objects.select_related('url_prefix').order_by('title')[:2]],
+            ['https://via.placeholder.com/600/000000', 'https://via.placeholder.com/600/000001'],
+        )
+
+    def test_save_update_fields(self):
+        """Test saving url in update_fields writes the stored columns."""
+        photo = Photo.objects.create(
+            albumId=self.album, title='Photo', url='https://a.example/1', thumbnailUrl='https://b.example/1',
+        )
+
+        photo.url = 'https://c.example/2'
+        photo.save(update_fields=['url'])
+
+        photo = Photo.objects.get(pk=photo.pk)
+        self.assertEqual(photo.url, 'https://c.example/2')
+        self.assertEqual(photo.thumbnailUrl, 'https://b.example/1')
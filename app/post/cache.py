@@ -0,0 +1,108 @@
+"""
+Cache for the comment listings of a post.
+
+Pages are cached per post, route, format, cursor and page size. Every post
+has a version stamp in the cache that is part of its page keys;
+invalidating a post gives it a new stamp, so its old pages are never read
+again and expire on their own. Stamps are random and never reused, and a
+post without one has no cached pages.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from core.etags import etag_matches, not_modified
+from core.models import new_version
+from core.streaming import is_stream_requested
+
+KEY_PREFIX = 'post-comments'
+CACHED_HEADERS = ('Link', 'ETag')
+HITS_KEY = f'{KEY_PREFIX}:hits'
+MISSES_KEY = f'{KEY_PREFIX}:misses'
+
+
+def _version_key(post_id):
+    return f'{KEY_PREFIX}:{post_id}:version'
+
+
+def _page_key(post_id, version, request):
+    # Link and ETag depend on the route and the rendered format.
+    cursor = request.query_params.get('cursor', '')
+    page_size = request.query_params.get('page_size', '')
+    renderer_format = request.accepted_renderer.format
+    return f'{KEY_PREFIX}:{post_id}:{version}:{renderer_format}:{request.path}:{page_size}:{cursor}'
+
+
+def _get_version(post_id):
+    """Return the post's version stamp, starting a new one if it has none."""
+    key = _version_key(post_id)
+    version = cache.get(key)
+    if version is None:
+        # An evicted or never set stamp: no page is cached under a new one.
+        cache.add(key, new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _normalize(post_id):
+    """Return the post id as a canonical string, or None if not cacheable."""
+    post_id = str(post_id)
+    return str(int(post_id)) if post_id.isdigit() else None
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_response(post_id, request):
+    """Return the cached comment page for the request and the post's version.
+
+    On a miss the response is None; the version is read before the page is
+    queried and must be passed to set_response, so a page rendered while
+    the post was invalidated is stored under the old version. Requests that
+    are not cached get no version either.
+    """
+    post_id = _normalize(post_id)
+    if post_id is None or is_stream_requested(request):
+        return None, None
+    version = _get_version(post_id)
+    cached = cache.get(_page_key(post_id, version, request))
+    if cached is None:
+        _count(MISSES_KEY)
+        return None, version
+    _count(HITS_KEY)
+    data, headers = cached
+    if 'ETag' in headers and etag_matches(request, headers['ETag']):
+        return not_modified(headers['ETag']), version
+    return Response(data, headers=headers), version
+
+
+def set_response(post_id, request, response, version):
+    """Cache a successful comment page rendered for the request under version."""
+    post_id = _normalize(post_id)
+    if post_id is None or version is None or response.status_code != 200 or response.streaming:
+        return
+    headers = {name: response[name] for name in CACHED_HEADERS if response.has_header(name)}
+    cache.set(
+        _page_key(post_id, version, request),
+        (response.data, headers),
+        settings.COMMENT_CACHE_TIMEOUT,
+    )
+
+
+def invalidate(*post_ids):
+    """Drop the cached comment pages of the given posts."""
+    cache.set_many({_version_key(post_id): new_version() for post_id in set(post_ids)}, timeout=None)
+
+
+def get_stats():
+    """Return the hit and miss counters."""
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {
+        'hits': counters.get(HITS_KEY, 0),
+        'misses': counters.get(MISSES_KEY, 0),
+    }
@@ -2,25 +2,96 @@
 Serializers for the posts API View
 """
 
-from core.models import Post, Comment
+from django.db.models import Case, IntegerField, OuterRef, Subquery, Sum, When
+
+from core.models import Post, Comment, PostCommentCountShard
+from core.serializers import BulkCreateListSerializer, BulkPrimaryKeyRelatedField, ValuesSerializer
 from rest_framework import serializers
 
 
 class PostSerializer(serializers.ModelSerializer):
     """ Serializer for the post object."""
     # comments = serializers.StringRelatedField(many=True, read_only=True)
-    userId = serializers.CharField(source='user.id', read_only=True)
+    userId = serializers.CharField(source='user_id', read_only=True)
+    comment_count = serializers.IntegerField(source='total_comment_count', read_only=True)
+    # Columns whose values change whenever the rendered post does.
+    version_fields = ('id', 'version', 'shard_comment_count')
 
     class Meta:
         model = Post
-        fields = ['userId', 'id', 'title', 'body']
+        fields = ['userId', 'id', 'title', 'body', 'comment_count']
+        list_serializer_class = BulkCreateListSerializer
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Sum the counter shards of hot posts in the same query."""
+        shard_totals = PostCommentCountShard.objects.filter(
+            post=OuterRef('pk'),
+        ).values('post').annotate(total=Sum('count')).values('total')
+        return queryset.annotate(shard_comment_count=Case(
+            When(comment_count_sharded=True, then=Subquery(shard_totals)),
+            output_field=IntegerField(),
+        ))
 
 
 class CommentSerializer(serializers.ModelSerializer):
     """Serializer for the comment object."""
+    serializer_related_field = BulkPrimaryKeyRelatedField
     name = serializers.CharField(source='user.name', read_only=True)  # Kullanıcı adı otomatik alınacak
     email = serializers.EmailField(source='user.email', read_only=True)  # Kullanıcı e-postası otomatik alınacak
+    version_fields = ('id', 'version', 'user__version')
 
     class Meta:
         model = Comment
         fields = ['postId', 'id', 'name', 'email', 'body']
+        list_serializer_class = BulkCreateListSerializer
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Join the commenting user and load only the columns we render."""
+        return queryset.select_related('user').only(
+            'id', 'postId', 'body', 'version', 'user__name', 'user__email', 'user__version',
+        )
+
+
+class PostValuesSerializer(ValuesSerializer):
+    """Fast read path rendering posts like PostSerializer."""
+    model_serializer = PostSerializer
+    values = ('user_id', 'id', 'title', 'body', 'comment_count', 'shard_comment_count')
+
+    def to_representation(self, row):
+        return {
+            'userId': str(row.user_id),
+            'id': row.id,
+            'title': row.title,
+            'body': row.body,
+            'comment_count': row.comment_count + (row.shard_comment_count or 0),
+        }
+
+
+class CommentValuesSerializer(ValuesSerializer):
+    """Fast read path rendering comments like CommentSerializer."""
+    model_serializer = CommentSerializer
+    values = ('postId', 'id', 'user_id', 'user__name', 'user__email', 'body')
+
+    def to_representation(self, row):
+        if row.user_id is None:
+            # CommentSerializer skips name and email without a user.
+            return {'postId': row.postId, 'id': row.id, 'body': row.body}
+        return {
+            'postId': row.postId,
+            'id': row.id,
+            'name': row.user__name,
+            'email': row.user__email,
+            'body': row.body,
+        }
+
+
+class PostWithCommentsSerializer(PostSerializer):
+    """Serializer for a post with its first comments nested."""
+    comments = CommentSerializer(source='expanded_comments', many=True, read_only=True)
+    # The nested comments are not covered by the post's stamps.
+    version_fields = ()
+
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ['comments']
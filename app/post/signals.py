@@ -0,0 +1,79 @@
+"""
+Signal handlers invalidating the comment listing cache.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from core.models import Comment, Post, User
+from core.signals import comments_bulk_created, is_deleted_with_post
+from post import cache
+
+
+def invalidate_on_commit(post_ids):
+    """Drop the pages of the posts once the change commits.
+
+    Dropping them earlier would let a request still reading the old rows
+    cache them again before the commit.
+    """
+    post_ids = set(post_ids)
+    if post_ids:
+        transaction.on_commit(partial(cache.invalidate, *post_ids))
+
+
+@receiver(post_save, sender=Comment)
+def invalidate_saved_comment(sender, instance, created, **kwargs):
+    """Drop the pages of the post a comment was added to, changed on or moved from."""
+    post_ids = [instance.postId_id]
+    loaded_post_id = getattr(instance, '_loaded_post_id', None)
+    if loaded_post_id is not None:
+        post_ids.append(loaded_post_id)
+    invalidate_on_commit(post_ids)
+
+
+@receiver(comments_bulk_created, sender=Comment)
+def invalidate_bulk_created_comments(sender, objs, **kwargs):
+    """Drop the pages of every post that received bulk created comments."""
+    invalidate_on_commit(obj.postId_id for obj in objs)
+
+
+@receiver(post_delete, sender=Comment)
+def invalidate_deleted_comment(sender, instance, **kwargs):
+    """Drop the pages of the post a comment was removed from."""
+    if not is_deleted_with_post(instance):
+        invalidate_on_commit([instance.postId_id])
+
+
+@receiver(post_save, sender=Post)
+def invalidate_new_post(sender, instance, created, **kwargs):
+    """Never serve pages cached for an earlier post with the same id."""
+    if created:
+        invalidate_on_commit([instance.pk])
+
+
+@receiver(pre_delete, sender=Post)
+def invalidate_deleted_post(sender, instance, **kwargs):
+    """Drop the pages of a deleted post once, not once per comment."""
+    invalidate_on_commit([instance.pk])
+
+
+def _commented_post_ids(user):
+    return Comment.objects.filter(user=user).values_list('postId', flat=True).distinct()
+
+
+@receiver(post_save, sender=User)
+def invalidate_renamed_user(sender, instance, created, **kwargs):
+    """Drop the pages showing a user whose name or email changed."""
+    loaded = getattr(instance, '_loaded_contact', None)
+    current = (instance.__dict__.get('name'), instance.__dict__.get('email'))
+    if created or loaded is None or loaded == current:
+        return
+    invalidate_on_commit(_commented_post_ids(instance))
+
+
+@receiver(pre_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    """Drop the pages whose comments lose their user."""
+    invalidate_on_commit(_commented_post_ids(instance))
@@ -1,18 +1,30 @@
 """
 Tests for the post API.
 """
+import json
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
 from core.models import Post, Comment
+from django.core.cache import cache
 from django.urls import reverse
-from rest_framework.test import APIClient
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+
+from post import cache as comment_cache
+from post.views import PostViewSet
 
 
 class PostTests(APITestCase):
 
     def setUp(self):
         """Test için gerekli verileri oluşturuyoruz."""
+        # Yorum sayfaları önceki testlerden kalmasın
+        cache.clear()
         # Kullanıcı oluşturma
         self.client = APIClient()
         User = get_user_model()
@@ -222,6 +234,17 @@ class PostTests(APITestCase):
         self.assertEqual(response.data[0]['body'], self.comment.body)
         self.assertEqual(response.data[0]['postId'], self.post.id)
 
+    def test_filter_comments_by_user(self):
+        """Yorumlar ?userId= ile kullanıcıya göre süzülebilmeli."""
+        Comment.objects.create(postId=self.post, user=self.user, body="User comment")
+
+        response = self.client.get('/api/comments/', {'userId': self.user.id})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([comment['body'] for comment in response.data], ["User comment"])
+        response = self.client.get('/api/comments/', {'userId': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_get_post_comments_invalid_post(self):
         """Geçersiz bir post ID ile yorum alma testi."""
         invalid_post_id = 9999
@@ -241,3 +264,369 @@ class PostTests(APITestCase):
         # Doğrulamalar
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
         self.assertIn('Authentication credentials were not provided.', str(response.data))
+
+
+class PostQueryCountTests(APITestCase):
+    """Test that post and comment endpoints run a fixed number of queries."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        User = get_user_model()
+        self.user = User.objects.create_user(email='owner@example.com', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.post = Post.objects.create(user=self.user, title='Post', body='Body')
+        for i in range(10):
+            author = User.objects.create_user(email=f'author{i}@example.com', password='testpassword', name=f'Author {i}')
+            Post.objects.create(user=author, title=f'Post {i}', body='Body')
+            Comment.objects.create(postId=self.post, user=author, body=f'Comment {i}')
+
+    def test_list_posts_query_count(self):
+        """Listing posts runs one query regardless of the number of posts."""
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/posts/')
+        self.assertEqual(len(response.data), 11)
+
+    def test_comment_count_query_count(self):
+        """Comment counts, sharded ones included, come with the post query."""
+        Post.objects.filter(pk=self.post.pk).update(comment_count_sharded=True)
+        Comment.objects.create(postId=self.post, body='Sharded')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/posts/')
+        self.assertEqual(response.data[0]['comment_count'], 11)
+        self.assertEqual(response.data[1]['comment_count'], 0)
+
+    def test_user_posts_query_count(self):
+        """Listing a user's posts runs an existence check and one query."""
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/posts/{self.user.id}/user_posts/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_post_comments_query_count(self):
+        """Listing a post's comments does not query each comment's user."""
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/posts/{self.post.id}/comments/')
+        self.assertEqual(len(response.data), 10)
+        self.assertEqual(response.data[0]['email'], 'author0@example.com')
+
+    def test_list_comments_query_count(self):
+        """Listing comments runs one query regardless of the number of comments."""
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/comments/')
+        self.assertEqual(len(response.data), 10)
+        self.assertEqual(response.data[0]['name'], 'Author 0')
+
+    def test_filter_by_post_query_count(self):
+        """Filtering comments by post runs an existence check and one query."""
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/comments/{self.post.id}/filter-by-post/')
+        self.assertEqual(len(response.data), 10)
+
+
+class PostStreamingTests(APITestCase):
+    """Test the streamed dump mode of the post and comment endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='user@example.com', password='testpassword', name='Üser')
+        self.client.force_authenticate(user=self.user)
+        self.post = Post.objects.create(user=self.user, title='Post', body='Body')
+        Comment.objects.bulk_create(
+            Comment(postId=self.post, user=self.user, body=f'Comment {i}')
+            for i in range(150)
+        )
+
+    def test_stream_comments(self):
+        """Streaming returns every comment, past the page size."""
+        response = self.client.get('/api/comments/?stream=1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(data), 150)
+        self.assertEqual(data[0]['name'], 'Üser')
+
+    def test_stream_matches_paginated_output(self):
+        """A streamed dump renders rows exactly like the paginated list."""
+        url = f'/api/posts/{self.post.id}/comments/'
+        paged = self.client.get(url, {'page_size': 1000})
+        streamed = self.client.get(url, {'stream': 'true'})
+
+        self.assertEqual(json.loads(b''.join(streamed.streaming_content)), json.loads(paged.content))
+
+    def test_stream_user_posts(self):
+        """Custom post actions can be streamed as well."""
+        response = self.client.get(f'/api/posts/{self.user.id}/user_posts/?stream=1')
+
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(data, [{
+            'userId': str(self.user.id), 'id': self.post.id, 'title': 'Post', 'body': 'Body', 'comment_count': 150,
+        }])
+
+
+class PostBulkCreateTests(APITestCase):
+    """Test creating posts and comments from a JSON array."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='user@example.com', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.post = Post.objects.create(user=self.user, title='Post', body='Body')
+
+    def test_bulk_create_posts(self):
+        """Bir istekte birden fazla post oluşturma."""
+        data = [{'title': f'Post {i}', 'body': 'Body'} for i in range(5)]
+        response = self.client.post('/api/posts/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(Post.objects.filter(user=self.user).count(), 6)
+
+    def test_bulk_create_comments_query_count(self):
+        """Referenced posts are validated with one query for the whole batch."""
+        other_post = Post.objects.create(user=self.user, title='Other', body='Body')
+        data = [
+            {'postId': post.id, 'body': f'Comment {i}'}
+            for i in range(20) for post in (self.post, other_post)
+        ]
+        with self.assertNumQueries(6):
+            response = self.client.post('/api/comments/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Comment.objects.filter(user=self.user).count(), 40)
+        self.assertEqual(response.data[0]['email'], self.user.email)
+
+    def test_bulk_create_reports_item_errors(self):
+        """Invalid items are reported by position and nothing is written."""
+        data = [
+            {'postId': self.post.id, 'body': 'Valid'},
+            {'postId': 9999, 'body': 'Missing post'},
+            {'postId': self.post.id, 'body': ''},
+        ]
+        response = self.client.post('/api/comments/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('postId', response.data[1])
+        self.assertIn('body', response.data[2])
+        self.assertEqual(Comment.objects.count(), 0)
+
+    def test_bulk_create_max_items(self):
+        """Batches larger than the configured maximum are rejected."""
+        data = [{'title': 'Post', 'body': 'Body'}] * 3
+        with self.settings(BULK_CREATE_MAX_ITEMS=2):
+            response = self.client.post('/api/posts/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Post.objects.count(), 1)
+
+
+class PostExpandCommentsTests(APITestCase):
+    """Test nesting comments into post responses with ?expand=comments."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='user@example.com', password='testpassword', name='User')
+        self.client.force_authenticate(user=self.user)
+        self.posts = [Post.objects.create(user=self.user, title=f'Post {i}', body='Body') for i in range(5)]
+        for post in self.posts:
+            Comment.objects.bulk_create(
+                Comment(postId=post, user=self.user, body=f'{post.title} comment {i}') for i in range(8)
+            )
+
+    def test_expand_comments_query_count(self):
+        """All nested comments of a page are loaded with one extra query."""
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/posts/?expand=comments&comments_limit=3')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+        for post in response.data:
+            self.assertEqual(
+                [comment['body'] for comment in post['comments']],
+                [f"{post['title']} comment {i}" for i in range(3)],
+            )
+        self.assertEqual(response.data[0]['comments'][0]['email'], 'user@example.com')
+
+    def test_expand_comments_default_limit(self):
+        """Without comments_limit a default number of comments is nested."""
+        response = self.client.get('/api/posts/?expand=comments')
+
+        self.assertEqual(len(response.data[0]['comments']), 5)
+
+    def test_expand_comments_retrieve(self):
+        """Retrieving a single post can nest its comments too."""
+        url = f'/api/posts/{self.posts[2].id}/?expand=comments&comments_limit=2'
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['comments']), 2)
+        self.assertEqual(response.data['comments'][0]['postId'], self.posts[2].id)
+
+    def test_no_expand(self):
+        """Without expand posts carry no comments."""
+        response = self.client.get(f'/api/posts/{self.posts[0].id}/')
+
+        self.assertNotIn('comments', response.data)
+
+
+class PostCommentCacheTests(APITestCase):
+    """Test caching of the per-post comment listings."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email='user@example.com', password='testpassword', name='User')
+        self.client.force_authenticate(user=self.user)
+        self.post = Post.objects.create(user=self.user, title='Post', body='Body')
+        self.comment = Comment.objects.create(postId=self.post, user=self.user, body='Comment')
+        self.url = f'/api/posts/{self.post.id}/comments/'
+
+    def test_second_request_is_served_from_cache(self):
+        """Aynı sayfa ikinci kez veritabanına gitmeden dönmeli."""
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(self.client.get(f'/api/comments/{self.post.id}/filter-by-post/').data, first.data)
+
+    def test_pages_are_cached_separately(self):
+        """Her sayfa ayrı anahtarla saklanmalı."""
+        Comment.objects.create(postId=self.post, user=self.user, body='Second')
+        first_page = self.client.get(self.url, {'page_size': 1})
+        self.client.get(self.url)
+
+        cached = self.client.get(self.url, {'page_size': 1})
+        self.assertEqual(len(cached.data), 1)
+        self.assertEqual(cached['Link'], first_page['Link'])
+
+    def test_comment_writes_invalidate(self):
+        """Yorum ekleme, güncelleme ve silme önbelleği geçersiz kılmalı."""
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            new_comment = Comment.objects.create(postId=self.post, user=self.user, body='New')
+        self.assertEqual(len(self.client.get(self.url).data), 2)
+
+        new_comment.body = 'Edited'
+        with self.captureOnCommitCallbacks(execute=True):
+            new_comment.save()
+        self.assertEqual(self.client.get(self.url).data[1]['body'], 'Edited')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            new_comment.delete()
+        self.assertEqual(len(self.client.get(self.url).data), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.bulk_create([Comment(postId=self.post, body='Bulk')])
+        self.assertEqual(len(self.client.get(self.url).data), 2)
+
+    def test_moving_comment_invalidates_both_posts(self):
+        """Başka posta taşınan yorum iki postun önbelleğini de temizlemeli."""
+        other = Post.objects.create(user=self.user, title='Other', body='Body')
+        other_url = f'/api/posts/{other.id}/comments/'
+        self.client.get(self.url)
+        self.client.get(other_url)
+
+        comment = Comment.objects.get(pk=self.comment.pk)
+        comment.postId = other
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.save()
+
+        self.assertEqual(len(self.client.get(self.url).data), 0)
+        self.assertEqual(len(self.client.get(other_url).data), 1)
+
+    def test_user_rename_invalidates(self):
+        """Yorum yapan kullanıcının adı değişince önbellek temizlenmeli."""
+        self.client.get(self.url)
+
+        user = get_user_model().objects.get(pk=self.user.pk)
+        user.name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+        self.assertEqual(self.client.get(self.url).data[0]['name'], 'Renamed')
+
+    def test_user_delete_invalidates(self):
+        """Yorum yapan kullanıcı silinince önbellek temizlenmeli."""
+        commenter = get_user_model().objects.create_user(email='commenter@example.com', password='testpassword')
+        Comment.objects.create(postId=self.post, user=commenter, body='By commenter')
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            commenter.delete()
+
+        self.assertNotIn('email', self.client.get(self.url).data[1])
+
+    def test_invalidated_after_commit(self):
+        """Önbellek yazma işlemi commit edilince temizlenmeli, daha önce değil."""
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Comment.objects.create(postId=self.post, user=self.user, body='New')
+            with self.assertNumQueries(0):
+                self.client.get(self.url)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+
+        self.assertEqual(len(self.client.get(self.url).data), 2)
+
+    def test_missing_post_is_not_cached(self):
+        """Var olmayan post için 404 önbelleğe alınmamalı."""
+        self.assertEqual(self.client.get('/api/posts/9999/comments/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/api/posts/9999/comments/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cache_stats(self):
+        """Önbellek isabet ve ıskalama sayaçları yöneticilere açık olmalı."""
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.client.get(self.url)
+
+        response = self.client.get('/api/comments/cache-stats/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/api/comments/cache-stats/')
+        self.assertEqual(response.data, {'hits': 2, 'misses': 1})
+
+    def test_evicted_version_does_not_revive_pages(self):
+        """Sürüm anahtarı silinse de eski sayfalar geri dönmemeli."""
+        request = Request(APIRequestFactory().get(self.url))
+        request.accepted_renderer = JSONRenderer()
+        cached, version = comment_cache.get_response(self.post.id, request)
+        comment_cache.set_response(self.post.id, request, Response(['stale']), version)
+        comment_cache.invalidate(self.post.id)
+        cached, version = comment_cache.get_response(self.post.id, request)
+        comment_cache.set_response(self.post.id, request, Response(['fresh']), version)
+
+        cache.delete(comment_cache._version_key(self.post.id))
+        self.assertIsNone(comment_cache.get_response(self.post.id, request)[0])
+        comment_cache.invalidate(self.post.id)
+        self.assertIsNone(comment_cache.get_response(self.post.id, request)[0])
+
+    def test_write_during_render_is_not_cached(self):
+        """Sayfa hazırlanırken yazılan yorum eski sayfanın saklanmasına yol açmamalı."""
+        list_response = PostViewSet.list_response
+
+        def racing_list_response(view, *args, **kwargs):
+            response = list_response(view, *args, **kwargs)
+            with self.captureOnCommitCallbacks(execute=True):
+                Comment.objects.create(postId=self.post, user=self.user, body='Racing')
+            return response
+
+        with mock.patch.object(PostViewSet, 'list_response', racing_list_response):
+            self.assertEqual(len(self.client.get(self.url).data), 1)
+
+        self.assertEqual(len(self.client.get(self.url).data), 2)
+
+    def test_routes_cached_separately(self):
+        """İki yorum rotası birbirinin Link başlığını döndürmemeli."""
+        Comment.objects.create(postId=self.post, user=self.user, body='Second')
+        other_url = f'/api/comments/{self.post.id}/filter-by-post/'
+        self.client.get(self.url, {'page_size': 1})
+
+        response = self.client.get(other_url, {'page_size': 1})
+
+        self.assertIn(other_url, response['Link'])
+        self.assertNotIn(self.url, response['Link'])
@@ -1,30 +1,60 @@
 """
 Views for the Posts API.
 """
-from rest_framework import viewsets, authentication, permissions
+from django.db.models import Prefetch, prefetch_related_objects
+from rest_framework import viewsets, permissions, serializers
+from core.authentication import CachedTokenAuthentication, SignedAccessTokenAuthentication
+from core.mixins import BulkCreateMixin, ExpandMixin, ListActionMixin, QueryParamFilterMixin
 from core.models import Post, Comment, User
-from post.serializers import PostSerializer, CommentSerializer
+from core.queries import limit_per_group
+from post import cache
+from post.serializers import (
+    PostSerializer,
+    PostValuesSerializer,
+    PostWithCommentsSerializer,
+    CommentSerializer,
+    CommentValuesSerializer,
+)
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(ExpandMixin, BulkCreateMixin, ListActionMixin, viewsets.ModelViewSet):
     """Manage posts in the database."""
-    queryset = Post.objects.all()
+    queryset = PostSerializer.setup_eager_loading(Post.objects.all())
     serializer_class = PostSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedAccessTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]  # Sadece giriş yapan kullanıcılar görebilir.
+    allow_streaming = True
+    values_serializers = [PostValuesSerializer, CommentValuesSerializer]
+    expansions = {'comments': PostWithCommentsSerializer}
 
     def perform_create(self, serializer):
         """Create a new post."""
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
+
+    def expand_comments(self, posts, limit):
+        """Load the first comments of every post in one query."""
+        comments = limit_per_group(
+            Comment.objects.filter(postId__in=[post.pk for post in posts]), 'postId', limit,
+        )
+        prefetch_related_objects(posts, Prefetch(
+            'comments',
+            queryset=CommentSerializer.setup_eager_loading(comments),
+            to_attr='expanded_comments',
+        ))
 
     @action(detail=True, methods=['get'])
     def comments(self, request, pk=None):
         """Belirli bir postun yorumlarını listele."""
+        cached, version = cache.get_response(pk, request)
+        if cached is not None:
+            return cached
         post = self.get_object()
-        comments = post.comments.all()  # İlgili yorumları al
-        return Response(CommentSerializer(comments, many=True).data)
+        comments = CommentSerializer.setup_eager_loading(post.comments.all())  # İlgili yorumları al
+        response = self.list_response(comments, CommentSerializer)
+        cache.set_response(pk, request, response, version)
+        return response
 
     @action(detail=True, methods=['get'], url_path='user_posts')
     def user_posts(self, request, pk=None):
@@ -34,33 +64,47 @@ class PostViewSet(viewsets.ModelViewSet):
                 {"detail": "Belirtilen user_id'ye sahip bir kullanıcı bulunamadı."},
                 status=404
             )
-        posts = Post.objects.filter(user__id=pk)
-        # Serileştirme işlemi
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data)
+        posts = PostSerializer.setup_eager_loading(Post.objects.filter(user_id=pk))
+        return self.list_response(posts, PostSerializer)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(QueryParamFilterMixin, BulkCreateMixin, ListActionMixin, viewsets.ModelViewSet):
     """Manage comments in the database."""
-    queryset = Comment.objects.all()
+    queryset = CommentSerializer.setup_eager_loading(Comment.objects.all())
     serializer_class = CommentSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedAccessTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]  # Sadece giriş yapan kullanıcılar görebilir.
+    allow_streaming = True
+    values_serializers = [CommentValuesSerializer]
+    # Query parametreleri: (model alanı, değeri doğrulayan alan)
+    filter_params = {
+        'userId': ('user_id', serializers.IntegerField()),
+    }
 
     def perform_create(self, serializer):
         """Create a new comment."""
-        user = self.request.user  # Oturum açmış kullanıcıyı alıyoruz
-        serializer.save(user=user)
+        # Yorumlar kullanıcının adını ve e-postasını gösterdiği için kullanıcı nesnesini veriyoruz.
+        serializer.save(user=self.request.user)
 
     @action(detail=True, methods=['get'], url_path='filter-by-post')
     def filter_by_post(self, request, pk=None):
         """Filter comments by post ID."""
+        cached, version = cache.get_response(pk, request)
+        if cached is not None:
+            return cached
         if not Post.objects.filter(id=pk).exists():
             return Response(
                 {"detail": "Belirtilen post_id'ye sahip bir post bulunamadı."},
                 status=404
             )
-        comments = Comment.objects.filter(postId=pk)
+        comments = CommentSerializer.setup_eager_loading(Comment.objects.filter(postId=pk))
+
+        response = self.list_response(comments, CommentSerializer)
+        cache.set_response(pk, request, response, version)
+        return response
 
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data)
+    @action(detail=False, methods=['get'], url_path='cache-stats',
+            permission_classes=[permissions.IsAdminUser])
+    def cache_stats(self, request):
+        """Hit and miss counters of the comment listing cache."""
+        return Response(cache.get_stats())
@@ -3,6 +3,7 @@ Serializers for the to-do API View
 """
 
 from core.models import ToDo
+from core.serializers import BulkCreateListSerializer, ValuesSerializer
 
 from rest_framework import serializers
 
@@ -10,8 +11,41 @@ from rest_framework import serializers
 class ToDoSerializer(serializers.ModelSerializer):
     """ Serializer for the to-do object."""
 
-    userId = serializers.CharField(source='user.id', read_only=True)
+    userId = serializers.CharField(source='user_id', read_only=True)
+    version_fields = ('id', 'version')
 
     class Meta:
         model = ToDo
         fields = ['userId', 'id', 'title', 'completed']
+        list_serializer_class = BulkCreateListSerializer
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """To-dos only expose the user's id, which lives on the to-do row."""
+        return queryset
+
+
+class ToDoValuesSerializer(ValuesSerializer):
+    """Fast read path rendering to-dos like ToDoSerializer."""
+    model_serializer = ToDoSerializer
+    values = ('user_id', 'id', 'title', 'completed')
+
+    def to_representation(self, row):
+        return {
+            'userId': str(row.user_id),
+            'id': row.id,
+            'title': row.title,
+            'completed': bool(row.completed),
+        }
+
+
+class ToDoStatsSerializer(serializers.Serializer):
+    """ Serializer for the to-do completion of one user."""
+
+    userId = serializers.CharField(source='user_id')
+    total = serializers.IntegerField()
+    completed = serializers.IntegerField()
+    percentage = serializers.SerializerMethodField()
+
+    def get_percentage(self, row) -> float:
+        return round(100 * row['completed'] / row['total'], 2)
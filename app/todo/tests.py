@@ -2,6 +2,8 @@
 Tests for the todo API.
 """
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
 from rest_framework.test import APITestCase
 from rest_framework import status
 from core.models import ToDo
@@ -128,3 +130,134 @@ class ToDoViewSetTest(APITestCase):
         self.todo.refresh_from_db()
         self.assertNotEqual(self.todo.title, "Unauthorized Full Update")
         self.assertNotEqual(self.todo.completed, "Unauthorized completed")
+
+
+class ToDoQueryCountTest(APITestCase):
+    """Test that to-do endpoints run a fixed number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+        for i in range(10):
+            other = get_user_model().objects.create_user(
+                email=f'user{i}@example.com',
+                password='password123'
+            )
+            ToDo.objects.create(user=other, title=f"ToDo {i}", completed=bool(i % 2))
+            ToDo.objects.create(user=self.user, title=f"Own ToDo {i}", completed=False)
+
+    def test_list_todos_query_count(self):
+        """Listing to-dos runs one query regardless of the number of to-dos."""
+        with self.assertNumQueries(1):
+            response = self.client.get(ToDo_URL)
+        self.assertEqual(len(response.data), 20)
+
+    def test_user_todos_query_count(self):
+        """Listing a user's to-dos runs an existence check and one query."""
+        with self.assertNumQueries(2):
+            response = self.client.get(f'{ToDo_URL}{self.user.id}/user_todos/')
+        self.assertEqual(len(response.data), 10)
+
+
+class ToDoBulkCreateTest(APITestCase):
+    """Test creating to-dos from a JSON array."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_create_todos(self):
+        """Test creating several to-dos in one request."""
+        data = [{"title": f"ToDo {i}", "completed": i % 2 == 0} for i in range(10)]
+        response = self.client.post(ToDo_URL, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(ToDo.objects.filter(user=self.user).count(), 10)
+        self.assertEqual(ToDo.objects.filter(user=self.user, completed=True).count(), 5)
+
+
+class ToDoFilterTest(APITestCase):
+    """Test filtering to-dos and their completion statistics."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='password123'
+        )
+        self.other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='password123'
+        )
+        ToDo.objects.bulk_create([ToDo(user=self.user, title=f'ToDo {i}', completed=i < 3) for i in range(4)])
+        ToDo.objects.create(user=self.other, title='Other', completed=False)
+        self.client.force_authenticate(user=self.user)
+
+    def test_filter_todos(self):
+        """Test listing only the to-dos matching userId and completed."""
+        with self.assertNumQueries(1):
+            response = self.client.get(ToDo_URL, {'userId': self.user.id, 'completed': 'false'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([todo['title'] for todo in response.data], ['ToDo 3'])
+
+        response = self.client.get(ToDo_URL, {'completed': 'true'})
+        self.assertEqual(len(response.data), 3)
+
+        response = self.client.get(f'{ToDo_URL}{self.other.id}/user_todos/', {'completed': 'false'})
+        self.assertEqual(len(response.data), 1)
+
+    def test_filter_todos_invalid(self):
+        """Test malformed filter values are rejected."""
+        response = self.client.get(ToDo_URL, {'userId': 'abc'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('userId', response.data)
+
+    def test_todo_stats(self):
+        """Test per-user statistics come from one grouped query."""
+        with self.assertNumQueries(1):
+            response = self.client.get(f'{ToDo_URL}stats/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {'userId': str(self.user.id), 'total': 4, 'completed': 3, 'percentage': 75.0},
+            {'userId': str(self.other.id), 'total': 1, 'completed': 0, 'percentage': 0.0},
+        ])
+
+        response = self.client.get(f'{ToDo_URL}stats/', {'userId': self.other.id, 'completed': 'true'})
+        self.assertEqual(response.data, [
+            {'userId': str(self.other.id), 'total': 1, 'completed': 0, 'percentage': 0.0},
+        ])
+
+    def test_todo_stats_paginated(self):
+        """Test the statistics are paged by user with cursor links."""
+        response = self.client.get(f'{ToDo_URL}stats/', {'page_size': 1})
+
+        self.assertEqual([row['userId'] for row in response.data], [str(self.user.id)])
+        next_url = response['Link'].split('>')[0].lstrip('<')
+        response = self.client.get(next_url)
+        self.assertEqual([row['userId'] for row in response.data], [str(self.other.id)])
+        self.assertNotIn('next', response.get('Link', ''))
+
+    def test_todo_stats_snapshot(self):
+        """Test the all-users statistics are served from a cached snapshot."""
+        self.client.get(f'{ToDo_URL}stats/')
+        ToDo.objects.create(user=self.other, title='New', completed=True)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(f'{ToDo_URL}stats/')
+        self.assertEqual(response.data[1]['total'], 1)
+
+        with override_settings(TODO_STATS_CACHE_TIMEOUT=0):
+            response = self.client.get(f'{ToDo_URL}stats/')
+        self.assertEqual(response.data[1]['total'], 2)
@@ -1,23 +1,44 @@
 """
 Views for the To-Do API.
 """
-from rest_framework import viewsets, authentication, permissions
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from rest_framework import viewsets, permissions, serializers
+from core.authentication import CachedTokenAuthentication, SignedAccessTokenAuthentication
+from core.mixins import BulkCreateMixin, ListActionMixin, QueryParamFilterMixin
 from core.models import ToDo, User
-from todo.serializers import ToDoSerializer
+from core.pagination import UserIdCursorPagination
+from todo.serializers import ToDoSerializer, ToDoStatsSerializer, ToDoValuesSerializer
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+STATS_CACHE_KEY = 'todo-stats-page'
 
-class ToDoViewSet(viewsets.ModelViewSet):
+
+class ToDoViewSet(QueryParamFilterMixin, BulkCreateMixin, ListActionMixin, viewsets.ModelViewSet):
     """Manage to-do in the database."""
-    queryset = ToDo.objects.all()
+    queryset = ToDoSerializer.setup_eager_loading(ToDo.objects.all())
     serializer_class = ToDoSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication, SignedAccessTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]  # Sadece giriş yapan kullanıcılar görebilir.
+    values_serializers = [ToDoValuesSerializer]
+    # Query parametreleri: (model alanı, değeri doğrulayan alan)
+    filter_params = {
+        'userId': ('user_id', serializers.IntegerField()),
+        'completed': ('completed', serializers.BooleanField()),
+    }
+    filter_actions = ('list', 'user_todos', 'stats')
+
+    def get_filter_params(self):
+        # İstatistikler yalnızca kullanıcıya göre süzülür.
+        if self.action == 'stats':
+            return {'userId': self.filter_params['userId']}
+        return self.filter_params
 
     def perform_create(self, serializer):
         """Create a new to-do."""
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
 
     @action(detail=True, methods=['get'], url_path='user_todos')
     def user_todos(self, request, pk=None):
@@ -28,7 +49,26 @@ class ToDoViewSet(viewsets.ModelViewSet):
                 {"detail": "Belirtilen user_id'ye sahip bir kullanıcı bulunamadı."},
                 status=404
             )
-        todos = ToDo.objects.filter(user__id=pk)
-        # Serileştirme işlemi
-        serializer = ToDoSerializer(todos, many=True)
-        return Response(serializer.data)
+        todos = ToDoSerializer.setup_eager_loading(ToDo.objects.filter(user_id=pk))
+        return self.list_response(self.filter_queryset(todos), ToDoSerializer)
+
+    @action(detail=False, methods=['get'], serializer_class=ToDoStatsSerializer)
+    def stats(self, request):
+        """Get the to-do total, completed count and percentage of every user, a page of users at a time."""
+        # Tüm kullanıcıların ilk sayfası kısa süreliğine önbellekten verilir.
+        snapshot = not request.query_params and settings.TODO_STATS_CACHE_TIMEOUT
+        cached = cache.get(STATS_CACHE_KEY) if snapshot else None
+        if cached is not None:
+            data, headers = cached
+            return Response(data, headers=headers)
+        rows = self.filter_queryset(ToDo.objects.all()).values('user_id').annotate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(completed=True)),
+        )
+        paginator = UserIdCursorPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        response = paginator.get_paginated_response(ToDoStatsSerializer(page, many=True).data)
+        if snapshot:
+            headers = {'Link': response['Link']} if response.has_header('Link') else None
+            cache.set(STATS_CACHE_KEY, (response.data, headers), settings.TODO_STATS_CACHE_TIMEOUT)
+        return response
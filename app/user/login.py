@@ -0,0 +1,122 @@
+"""
+Password login for the token endpoint.
+
+Failed attempts are counted per email and per client IP in the cache, and
+further attempts are refused before any hashing once over their limit.
+Passwords are verified in a process pool, so hashing never runs on
+request threads. The pool is used through PooledPasswordBackend, so
+logins go through django.contrib.auth.authenticate and its signals.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.throttling import BaseThrottle
+
+from core.hashing import PasswordHashPool, PasswordHashPoolBusy
+
+KEY_PREFIX = 'login-attempts'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+_pools = {}
+_pools_lock = threading.Lock()
+_dummy_password = []
+
+
+class LoginUnavailable(exceptions.APIException):
+    status_code = 503
+    default_detail = _('Too many logins in progress, try again shortly.')
+    default_code = 'login_unavailable'
+
+
+def parse_rate(rate):
+    """Return (attempts, seconds) for a rate such as ``'10/min'``."""
+    attempts, period = rate.split('/')
+    return int(attempts), PERIODS[period[0]]
+
+
+def _counters(email, request):
+    """Yield (cache key, allowed failures, window end) for each limit."""
+    now = time.time()
+    idents = {'email': email.lower(), 'ip': BaseThrottle().get_ident(request)}
+    for scope, rate in settings.LOGIN_RATE_LIMITS.items():
+        attempts, seconds = parse_rate(rate)
+        window = int(now // seconds)
+        ident = hashlib.sha1(idents[scope].encode('utf-8')).hexdigest()
+        yield f'{KEY_PREFIX}:{scope}:{ident}:{window}', attempts, (window + 1) * seconds
+
+
+def check_attempts(email, request):
+    """Raise Throttled if the email or IP has used up its failed attempts."""
+    counters = list(_counters(email, request))
+    counts = cache.get_many([key for key, attempts, end in counters])
+    waits = [end - time.time() for key, attempts, end in counters if counts.get(key, 0) >= attempts]
+    if waits:
+        raise exceptions.Throttled(wait=max(waits))
+
+
+def record_failure(email, request):
+    """Count a failed login against the email and IP."""
+    for key, attempts, end in _counters(email, request):
+        cache.add(key, 0, max(1, int(end - time.time()) + 1))
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The window expired between add() and incr().
+            pass
+
+
+def _dummy_encoded():
+    if not _dummy_password:
+        _dummy_password.append(make_password('dummy-login-password'))
+    return _dummy_password[0]
+
+
+def get_pool():
+    """Return the hashing pool for the current settings, creating it on first use."""
+    key = (settings.LOGIN_HASH_WORKERS, settings.LOGIN_HASH_QUEUE_LIMIT)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = PasswordHashPool(*key)
+        return _pools[key]
+
+
+def check_password(password, encoded):
+    try:
+        return get_pool().check_password(password, encoded, settings.LOGIN_HASH_TIMEOUT)
+    except PasswordHashPoolBusy:
+        raise LoginUnavailable()
+
+
+class PooledPasswordBackend(ModelBackend):
+    """ModelBackend checking passwords in the hashing pool.
+
+    Unknown emails still cost one hash check so response times don't
+    reveal which emails exist, and hashes made with outdated parameters
+    are upgraded on a successful login.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        User = get_user_model()
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            check_password(password, _dummy_encoded())
+            return None
+        if not check_password(password, user.password) or not self.user_can_authenticate(user):
+            return None
+        if identify_hasher(user.password).must_update(user.password):
+            user.set_password(password)
+            user.save(update_fields=['password'])
+        return user
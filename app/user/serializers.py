@@ -2,11 +2,14 @@
 Serializers for the user API View
 """
 from django.contrib.auth import authenticate
-
+from django.db import transaction
 from django.utils.translation import gettext as _
 from core.models import User, Address, Company, Geo
 
 from rest_framework import serializers
+from rest_framework.authtoken.models import Token
+
+from user import login
 
 
 class GeoSerializer(serializers.ModelSerializer):
@@ -30,6 +33,8 @@ class CompanySerializer(serializers.ModelSerializer):
     class Meta:
         model = Company
         fields = ['name']
+        # Users of the same company share its row instead of failing.
+        extra_kwargs = {'name': {'validators': []}}
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -37,87 +42,130 @@ class UserSerializer(serializers.ModelSerializer):
 
     address = AddressSerializer(required=False, allow_null=True)  # Address alanını include et
     company = CompanySerializer(required=False, allow_null=True)  # Company alanını include et
+    # Address and company changes go through a save of the user, which
+    # renews its stamp.
+    version_fields = ('id', 'version')
 
     class Meta:
         model = User
         fields = ['email', 'password', 'name', 'username', 'address', 'phone', 'website', 'company']
         extra_kwargs = {'password': {'write_only': True, 'min_length': 5}}
 
+    # Nested fields and the joins that load them.
+    nested_relations = {'address': 'address__geo', 'company': 'company'}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, query_params):
+        """Return the fields asked for with ``?fields=`` and ``?expand=``, or None for all.
+
+        ``?fields=`` lists the fields to render; without it every plain
+        field is rendered. Nested address and company are then only
+        rendered if listed in either parameter.
+        """
+        if 'fields' not in query_params and 'expand' not in query_params:
+            return None
+        readable = [name for name in cls.Meta.fields if name != 'password']
+        if 'fields' in query_params:
+            requested = query_params['fields'].split(',')
+            fields = [name for name in readable if name in requested]
+        else:
+            fields = [name for name in readable if name not in cls.nested_relations]
+        expand = query_params.get('expand', '').split(',')
+        return fields + [name for name in cls.nested_relations if name in expand and name not in fields]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        """Join address, geo and company so nesting costs no extra queries.
+
+        Given ``fields``, only their columns and the joins they need are loaded.
+        """
+        if fields is None:
+            return queryset.select_related('address__geo', 'company')
+        joins = [cls.nested_relations[name] for name in fields if name in cls.nested_relations]
+        return queryset.select_related(*joins).only(*cls.version_fields, *fields)
+
+    @transaction.atomic
     def create(self, validated_data):
-        """Create and return a user with encrypted password."""
+        """Create and return a user with encrypted password.
+
+        Related rows are written first so the user is inserted once, with
+        its password hashed once, all in one transaction.
+        """
         address_data = validated_data.pop('address', None)
         company_data = validated_data.pop('company', None)
         password = validated_data.pop('password', None)
 
-        # Kullanıcıyı oluştur
-        user = User.objects.create_user(**validated_data)
+        user = User(**validated_data)
+        user.email = User.objects.normalize_email(user.email)
+        user.set_password(password)
 
         # Address ve Company verilerini işle
         if address_data:
-            self._handle_address_creation(user, address_data)
+            user.address = self._create_address(address_data)
         if company_data:
-            self._handle_company_creation(user, company_data)
-
-        if password:
-            user.set_password(password)
-            user.save()
+            user.company = Company.objects.intern(company_data['name'])
 
+        user.save()
         return user
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Update and return user."""
+        """Update and return user, saving each changed row once."""
         address_data = validated_data.pop('address', None)
         company_data = validated_data.pop('company', None)
         password = validated_data.pop('password', None)
 
         # Kullanıcıyı güncelle
-        user = super().update(instance, validated_data)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        if password:
+            instance.set_password(password)
 
         # Address ve Company verilerini güncelle
         if address_data:
-            self._handle_address_update(user, address_data)
+            if instance.address is None:
+                instance.address = self._create_address(address_data)
+            else:
+                self._update_address(instance.address, address_data)
         if company_data:
-            self._handle_company_update(user, company_data)
+            # Şirket satırı paylaşılıyor; yeniden adlandırmak yerine kullanıcıyı taşıyoruz.
+            instance.company = Company.objects.intern(company_data['name'])
 
-        if password:
-            user.set_password(password)
-            user.save()
+        instance.save()
+        return instance
 
-        return user
-
-    def _handle_address_creation(self, user, address_data):
-        """Handle the creation of an address and associate with user."""
+    def _create_address(self, address_data):
+        """Create and return an address with its geo."""
         geo_data = address_data.pop('geo', None)
-        geo_instance = None
-        if geo_data:
-            geo_instance = Geo.objects.create(**geo_data)
-        address = Address.objects.create(**address_data, geo=geo_instance)
-        user.address = address
-        user.save()
-
-    def _handle_company_creation(self, user, company_data):
-        """Handle the creation of a company and associate with user."""
-        company = Company.objects.create(**company_data)
-        user.company = company
-        user.save()
+        geo_instance = Geo.objects.intern(geo_data['lat'], geo_data['lng']) if geo_data else None
+        return Address.objects.create(**address_data, geo=geo_instance)
 
-    def _handle_address_update(self, user, address_data):
-        """Handle updating the address data for the user."""
+    def _update_address(self, address, address_data):
+        """Update the address in place and point it at its new geo."""
         geo_data = address_data.pop('geo', None)
-        geo_instance = user.address.geo
         if geo_data:
-            for attr, value in geo_data.items():
-                setattr(geo_instance, attr, value)
-            geo_instance.save()
+            address.geo = Geo.objects.intern(geo_data['lat'], geo_data['lng'])
         for attr, value in address_data.items():
-            setattr(user.address, attr, value)
-        user.address.save()
+            setattr(address, attr, value)
+        address.save()
 
-    def _handle_company_update(self, user, company_data):
-        """Handle updating the company data for the user."""
-        for attr, value in company_data.items():
-            setattr(user.company, attr, value)
-        user.company.save()
+
+class UserSummarySerializer(serializers.Serializer):
+    """Serializer for the activity counts of a user."""
+    id = serializers.IntegerField()
+    posts = serializers.IntegerField(source='post_count')
+    comments = serializers.IntegerField(source='comment_count')
+    albums = serializers.IntegerField(source='album_count')
+    photos = serializers.IntegerField(source='photo_count')
+    todos = serializers.IntegerField(source='todo_count')
+    completedTodos = serializers.IntegerField(source='completed_todo_count')
 
 
 class AuthTokenSerializer(serializers.Serializer):
@@ -132,14 +180,29 @@ class AuthTokenSerializer(serializers.Serializer):
         """Validate and authenticate the user"""
         email = attrs.get('email')
         password = attrs.get('password')
-        user = authenticate(
-            request=self.context.get('request'),
-            email=email,
-            password=password,
-        )
+        request = self.context.get('request')
+        # Deneme sınırı, şifre kontrolünden önce uygulanır.
+        login.check_attempts(email, request)
+        user = authenticate(request=request, email=email, password=password)
         if not user:
+            login.record_failure(email, request)
             msg = _('Unable to authenticate with provided credentials')
             raise serializers.ValidationError(msg, code='authorization')
 
         attrs['user'] = user
         return attrs
+
+
+class RefreshAccessTokenSerializer(serializers.Serializer):
+    """Serializer trading a stored token for a new access token."""
+    token = serializers.CharField()
+
+    def validate(self, attrs):
+        """Validate the token still exists and belongs to an active user."""
+        token = Token.objects.select_related('user').filter(key=attrs['token']).first()
+        if token is None or not token.user.is_active:
+            msg = _('Invalid or revoked token.')
+            raise serializers.ValidationError(msg, code='authorization')
+
+        attrs['user'] = token.user
+        return attrs
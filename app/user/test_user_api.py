@@ -1,15 +1,27 @@
 """
 Tests for the user API.
 """
-from django.test import TestCase
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.contrib.auth.hashers import make_password
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.hashing import PasswordHashPoolBusy
+from core.models import Address, Album, Comment, Company, Geo, Photo, Post, ToDo
+from user import login
+
 
 TOKEN_URL = reverse('user:token')
+TOKEN_REFRESH_URL = reverse('user:token-refresh')
 ME_URL = '/api/users/'
 
 
@@ -22,6 +34,7 @@ class PublicUserApiTests(TestCase):
     """Test the public features of the user API."""
 
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_create_user_success(self):
@@ -84,6 +97,33 @@ class PublicUserApiTests(TestCase):
         self.assertIn('token', res.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_create_token_returns_access_token(self):
+        """Test the token response carries a working access token."""
+        create_user(email='test@example.com', password='test-user-password123')
+
+        res = self.client.post(TOKEN_URL, {'email': 'test@example.com', 'password': 'test-user-password123'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {res.data['access']}")
+
+        self.assertIn('expires', res.data)
+        self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_200_OK)
+
+    def test_refresh_access_token(self):
+        """Test trading the stored token for a new access token."""
+        create_user(email='test@example.com', password='test-user-password123')
+        token = self.client.post(TOKEN_URL, {'email': 'test@example.com', 'password': 'test-user-password123'})
+
+        res = self.client.post(TOKEN_REFRESH_URL, {'token': token.data['token']})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('access', res.data)
+
+    def test_refresh_invalid_token(self):
+        """Test unknown tokens can't be refreshed."""
+        res = self.client.post(TOKEN_REFRESH_URL, {'token': 'invalid'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('access', res.data)
+
     def test_create_token_bad_credentials(self):
         """Test returns error if credentials invalid"""
         create_user(email='test@example.com', password='goodpass')
@@ -163,3 +203,295 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.name, payload['name'])
         self.assertTrue(self.user.check_password(payload['password']))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class UserQueryCountTests(TestCase):
+    """Test that user endpoints run a fixed number of queries."""
+
+    def setUp(self):
+        self.user = create_user(email='test@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        for i in range(10):
+            geo = Geo.objects.create(lat=i, lng=i)
+            address = Address.objects.create(street='Street', city='City', zipcode='1', geo=geo)
+            company = Company.objects.create(name=f'Company {i}')
+            create_user(
+                email=f'user{i}@example.com',
+                password='testpass123',
+                address=address,
+                company=company,
+            )
+
+    def test_list_users_query_count(self):
+        """Listing users joins address, geo and company in one query."""
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(len(res.data), 11)
+        self.assertEqual(res.data[1]['company']['name'], 'Company 0')
+
+    def test_list_users_sparse_fields(self):
+        """Listing only email and name skips the joins."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ME_URL, {'fields': 'email,name,password,nope'})
+
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('JOIN', queries[0]['sql'])
+        self.assertNotIn('password', queries[0]['sql'])
+        self.assertEqual(set(res.data[0]), {'email', 'name'})
+
+    def test_list_users_expand_company(self):
+        """Expanding only the company joins just the company."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ME_URL, {'expand': 'company'})
+
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('core_address', queries[0]['sql'])
+        self.assertNotIn('address', res.data[1])
+        self.assertEqual(res.data[1]['company']['name'], 'Company 0')
+        self.assertIn('phone', res.data[1])
+
+    def test_retrieve_user_sparse_fields(self):
+        """Retrieve honours ?fields= and ?expand= too."""
+        user = get_user_model().objects.get(email='user0@example.com')
+
+        with self.assertNumQueries(1):
+            res = self.client.get(f'{ME_URL}{user.id}/', {'fields': 'email', 'expand': 'address'})
+
+        self.assertEqual(set(res.data), {'email', 'address'})
+        self.assertIn('geo', res.data['address'])
+
+    def test_retrieve_user_query_count(self):
+        """Retrieving a user runs a single query."""
+        user = get_user_model().objects.get(email='user0@example.com')
+        with self.assertNumQueries(1):
+            res = self.client.get(f'{ME_URL}{user.id}/')
+
+        self.assertEqual(res.data['address']['city'], 'City')
+
+
+class UserSummaryTests(TestCase):
+    """Test the per-user activity summary."""
+
+    def setUp(self):
+        self.user = create_user(email='test@example.com', password='testpass123')
+        self.other = create_user(email='other@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_summary(self):
+        """Test every count comes back in a single query."""
+        post = Post.objects.create(user=self.user, title='Post', body='Body')
+        Post.objects.create(user=self.other, title='Other', body='Body')
+        Comment.objects.create(postId=post, user=self.user, body='Mine')
+        Comment.objects.create(postId=post, user=self.other, body='Theirs')
+        album = Album.objects.create(user=self.user, title='Album')
+        for i in range(3):
+            Photo.objects.create(albumId=album, title=f'Photo {i}', url=f'http://example.com/{i}.jpg',
+                                 thumbnailUrl=f'http://example.com/{i}_thumb.jpg')
+        ToDo.objects.create(user=self.user, title='Done', completed=True)
+        ToDo.objects.create(user=self.user, title='Open', completed=False)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(f'{ME_URL}{self.user.id}/summary/')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'id': self.user.id,
+            'posts': 1,
+            'comments': 1,
+            'albums': 1,
+            'photos': 3,
+            'todos': 2,
+            'completedTodos': 1,
+        })
+
+    def test_summary_without_activity(self):
+        """Test a user with nothing yet gets zeros."""
+        res = self.client.get(f'{ME_URL}{self.other.id}/summary/')
+
+        self.assertEqual(res.data['posts'], 0)
+        self.assertEqual(res.data['completedTodos'], 0)
+
+    def test_summary_not_found(self):
+        """Test unknown and malformed user ids are a 404."""
+        for pk in (self.other.id + 100, 'abc'):
+            res = self.client.get(f'{ME_URL}{pk}/summary/')
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class LoginLimitTests(TestCase):
+    """Test the token endpoint's attempt limits and hashing pool."""
+
+    def setUp(self):
+        cache.clear()
+        create_user(email='test@example.com', password='testpass123')
+        self.client = APIClient()
+        self.payload = {'email': 'test@example.com', 'password': 'testpass123'}
+
+    @override_settings(LOGIN_RATE_LIMITS={'email': '2/min', 'ip': '100/min'})
+    def test_email_limit_rejects_before_hashing(self):
+        """Test failures over the per-email limit get a 429 without a hash check."""
+        for _ in range(2):
+            self.client.post(TOKEN_URL, {**self.payload, 'password': 'wrong'})
+
+        with mock.patch.object(login.get_pool(), 'check_password') as check_password:
+            res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        check_password.assert_not_called()
+        self.assertIn('Retry-After', res)
+
+    @override_settings(LOGIN_RATE_LIMITS={'email': '100/min', 'ip': '2/min'})
+    def test_ip_limit(self):
+        """Test failures over the per-IP limit get a 429 whatever the email."""
+        for i in range(2):
+            self.client.post(TOKEN_URL, {'email': f'user{i}@example.com', 'password': 'x'})
+
+        res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(LOGIN_RATE_LIMITS={'email': '2/min', 'ip': '2/min'})
+    def test_successful_logins_not_limited(self):
+        """Test successful logins don't use up attempts."""
+        for _ in range(3):
+            res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_busy_pool_returns_503(self):
+        """Test a full hashing queue is refused with a 503."""
+        with mock.patch.object(login.get_pool(), 'check_password', side_effect=PasswordHashPoolBusy):
+            res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertNotIn('token', res.data)
+
+    def test_unknown_email_still_hashes(self):
+        """Test unknown emails cost a hash check like known ones."""
+        with mock.patch.object(login.get_pool(), 'check_password', return_value=False) as check_password:
+            res = self.client.post(TOKEN_URL, {'email': 'nobody@example.com', 'password': 'x'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        check_password.assert_called_once()
+
+    def test_login_signals(self):
+        """Test failed and successful logins send the auth signals."""
+        failed = mock.Mock()
+        logged_in = mock.Mock()
+        user_login_failed.connect(failed)
+        user_logged_in.connect(logged_in)
+        self.addCleanup(user_login_failed.disconnect, failed)
+        self.addCleanup(user_logged_in.disconnect, logged_in)
+
+        self.client.post(TOKEN_URL, {**self.payload, 'password': 'wrong'})
+        failed.assert_called_once()
+        logged_in.assert_not_called()
+
+        self.client.post(TOKEN_URL, self.payload)
+        logged_in.assert_called_once()
+        self.assertIsNotNone(get_user_model().objects.get(email='test@example.com').last_login)
+
+    def test_pool_follows_settings(self):
+        """Test the hashing pool is built for the settings in effect."""
+        with override_settings(LOGIN_HASH_WORKERS=0, LOGIN_HASH_QUEUE_LIMIT=3):
+            pool = login.get_pool()
+            res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertEqual((pool.workers, pool.max_pending), (0, 3))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class UserWriteTests(TestCase):
+    """Test signup and profile updates write each row once."""
+
+    payload = {
+        'email': 'new@example.com',
+        'password': 'testpass123',
+        'name': 'New User',
+        'username': 'new',
+        'address': {
+            'street': 'Street',
+            'suite': 'Suite 1',
+            'city': 'City',
+            'zipcode': '12345',
+            'geo': {'lat': '1.5', 'lng': '2.5'},
+        },
+        'company': {'name': 'Company'},
+    }
+
+    def setUp(self):
+        cache.clear()
+        Company.objects.ids.clear()
+        Geo.objects.ids.clear()
+        self.client = APIClient()
+
+    def test_signup_query_count(self):
+        """Signup interns geo and company, then inserts address and user once."""
+        with self.assertNumQueries(11):
+            res = self.client.post(ME_URL, self.payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        user = get_user_model().objects.select_related('address__geo', 'company').get(email='new@example.com')
+        self.assertTrue(user.check_password('testpass123'))
+        self.assertEqual(user.address.geo.lng, 2.5)
+        self.assertEqual(user.company.name, 'Company')
+
+    def test_signup_reuses_interned_rows(self):
+        """A second user at the same company and place shares their rows."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(ME_URL, self.payload, format='json')
+
+        with self.assertNumQueries(5):
+            res = self.client.post(ME_URL, {**self.payload, 'email': 'other@example.com'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['company'], {'name': 'Company'})
+        self.assertEqual(Company.objects.count(), 1)
+        self.assertEqual(Geo.objects.count(), 1)
+
+    def test_signup_hashes_password_once(self):
+        """Signup runs the password hasher once."""
+        with mock.patch('django.contrib.auth.base_user.make_password', wraps=make_password) as hasher:
+            self.client.post(ME_URL, self.payload, format='json')
+
+        hasher.assert_called_once_with('testpass123')
+
+    def test_update_query_count(self):
+        """Updating the profile saves user, address, geo and company once each."""
+        self.client.post(ME_URL, self.payload, format='json')
+        user = get_user_model().objects.get(email='new@example.com')
+        self.client.force_authenticate(user=user)
+        payload = {
+            'name': 'Renamed',
+            'password': 'newpass123',
+            'address': {**self.payload['address'], 'city': 'Town', 'geo': {'lat': '3.5', 'lng': '4.5'}},
+            'company': {'name': 'Other'},
+        }
+
+        # Besides the writes: load the user, intern the new geo and company,
+        # and the comment cache invalidation lookup of the rename. The cached
+        # tokens are looked up once the change commits.
+        with self.assertNumQueries(12):
+            res = self.client.patch(f'{ME_URL}{user.id}/', payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user = get_user_model().objects.select_related('address__geo', 'company').get(id=user.id)
+        self.assertEqual(user.name, 'Renamed')
+        self.assertTrue(user.check_password('newpass123'))
+        self.assertEqual(user.address.city, 'Town')
+        self.assertEqual(user.address.geo.lat, 3.5)
+        self.assertEqual(user.company.name, 'Other')
+
+    def test_update_creates_missing_address(self):
+        """Updating a user without an address creates one."""
+        user = create_user(email='plain@example.com', password='testpass123')
+        self.client.force_authenticate(user=user)
+
+        res = self.client.patch(f'{ME_URL}{user.id}/', {'address': self.payload['address']}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertEqual(user.address.street, 'Street')
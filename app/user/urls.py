@@ -5,7 +5,7 @@ URL mappings for user API
 
 from django.urls import path
 from rest_framework.routers import DefaultRouter
-from user.views import UserViewSet, CreateTokenView
+from user.views import UserViewSet, CreateTokenView, RefreshAccessTokenView
 
 app_name = 'user'
 
@@ -18,4 +18,5 @@ router.register('users', UserViewSet)
 
 urlpatterns = [
     path('token/', CreateTokenView.as_view(), name='token'),
+    path('token/refresh/', RefreshAccessTokenView.as_view(), name='token-refresh'),
 ] + router.urls
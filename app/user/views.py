@@ -1,24 +1,65 @@
 """
 Views for the user API.
 """
-from rest_framework import viewsets, authentication, permissions
+from django.contrib.auth.signals import user_logged_in
+from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from core.authentication import (
+    CachedTokenAuthentication,
+    SignedAccessTokenAuthentication,
+    issue_access_token,
+)
+from core.mixins import ListActionMixin
 from core.models import User
-from user.serializers import UserSerializer, AuthTokenSerializer
+from user.serializers import (
+    UserSerializer,
+    UserSummarySerializer,
+    AuthTokenSerializer,
+    RefreshAccessTokenSerializer,
+)
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ListActionMixin, viewsets.ModelViewSet):
     """Manage users in the system."""
     serializer_class = UserSerializer
-    queryset = User.objects.all()  # Tüm kullanıcıları sorgula
-    authentication_classes = [authentication.TokenAuthentication]
+    queryset = UserSerializer.setup_eager_loading(User.objects.all())  # Tüm kullanıcıları sorgula
+    authentication_classes = [CachedTokenAuthentication, SignedAccessTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_requested_fields(self):
+        """Return the fields to render for ``?fields=``/``?expand=``, or None for all."""
+        if self.action not in ('list', 'retrieve'):
+            return None
+        return UserSerializer.requested_fields(self.request.query_params)
+
+    def get_queryset(self):
+        fields = self.get_requested_fields()
+        if fields is None:
+            return super().get_queryset()
+        # Sadece istenen kolonlar ve gereken join'ler yüklenir.
+        return UserSerializer.setup_eager_loading(User.objects.all(), fields)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_requested_fields()
+        return context
+
     def perform_create(self, serializer):
         """Override perform_create to handle user creation"""
         serializer.save()
 
+    @action(detail=True, methods=['get'], serializer_class=UserSummarySerializer)
+    def summary(self, request, pk=None):
+        """Get how many posts, comments, albums, photos and to-dos a user has."""
+        # Tüm sayılar tek sorguda, kullanıcı satırıyla birlikte gelir.
+        user = get_object_or_404(User.objects.with_activity_counts().only('id'), pk=pk)
+        return Response(UserSummarySerializer(user).data)
+
     def get_permissions(self):
         """
         Override get_permissions to handle authentication only on non-create operations.
@@ -36,3 +77,29 @@ class CreateTokenView(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
     # Token oluşturma işlemi için özel bir view kullanmaya devam ediyoruz.
+
+    def post(self, request, *args, **kwargs):
+        """Return the stored token and a short-lived signed access token.
+
+        The stored token works with ``Authorization: Token`` and as the
+        refresh token; the access token is sent as ``Authorization: Bearer``.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        user_logged_in.send(sender=user.__class__, request=request, user=user)
+        token, created = Token.objects.get_or_create(user=user)
+        access, expires = issue_access_token(user.id)
+        return Response({'token': token.key, 'access': access, 'expires': expires})
+
+
+class RefreshAccessTokenView(ObtainAuthToken):
+    """Issue a new access token for a stored token."""
+    serializer_class = RefreshAccessTokenSerializer
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        access, expires = issue_access_token(serializer.validated_data['user'].id)
+        return Response({'access': access, 'expires': expires})